@@ -1,75 +1,78 @@
-from flask import Flask, request, jsonify
+import time
+
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
+from llm import log
 from llm.LLM import LLM
-import os
+from llm.cache import result_cache
+from llm.jobs import submit_job, get_job, stream_job_events, sse_frame
+from llm.streaming import stream_review
+from llm.batch import run_batch, BATCH_MAX_ITEMS
+from llm.workspace import PipelineBusyError
+from llm.reports import report_store
+from llm.hedging import model_stats
+from llm.metrics import collect_timings, timings_summary, render_metrics, request_seconds
 
 app = Flask(__name__)
 CORS(app)
 
-COMPILER_DIR = os.path.join(os.path.dirname(__file__), "compiler")
-SOURCE_FILE = os.path.join(COMPILER_DIR, "source.c")
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    # Streamed responses are timed up to the first byte only
+    started = g.get("request_started")
+    if started is not None and request.url_rule is not None:
+        request_seconds.observe(
+            time.perf_counter() - started,
+            endpoint=request.url_rule.rule,
+            status=response.status_code,
+        )
+    return response
+
 
 @app.route("/")
 def home():
     return "Flask backend is running successfully!"
 
+def get_source_code():
+    # Get code from request body (JSON or plain text)
+    if request.is_json:
+        data = request.get_json()
+        return data.get("code", "")
+    return request.data.decode("utf-8")
+
+
+def wants_timings():
+    # ?timings=1 or {"timings": true} adds per-stage timings to the response
+    if request.args.get("timings", "").lower() in ("1", "true", "yes"):
+        return True
+    data = request.get_json(silent=True) if request.is_json else None
+    return isinstance(data, dict) and bool(data.get("timings"))
+
+
 @app.route("/run-llm", methods=["POST"])
 def run_llm():
     try:
-        # Get code from request body (JSON or plain text)
-        if request.is_json:
-            data = request.get_json()
-            source_code = data.get("code", "")
-        else:
-            source_code = request.data.decode("utf-8")
+        source_code = get_source_code()
 
         if not source_code.strip():
             return jsonify({"success": False, "message": "No source code provided."}), 400
 
-        # Ensure compiler directory exists
-        os.makedirs(COMPILER_DIR, exist_ok=True)
-        
-        # Remove old files to ensure fresh compilation
-        old_files = [SOURCE_FILE, 
-                     os.path.join(COMPILER_DIR, "IR.txt"),
-                     os.path.join(COMPILER_DIR, "Output.txt")]
-        
-        for old_file in old_files:
-            if os.path.exists(old_file):
-                os.remove(old_file)
-                print(f"🗑️ Removed old file: {old_file}")
-
-        # Write to source.c with explicit flush and sync
-        print(f"📝 Writing source code to {SOURCE_FILE}")
-        print(f"📄 Source code length: {len(source_code)} characters")
-        
-        with open(SOURCE_FILE, "w", encoding="utf-8") as f:
-            f.write(source_code)
-            f.flush()  # Force write to disk
-            os.fsync(f.fileno())  # Ensure OS writes to disk
-        
-        # Verify the file was written correctly
-        if os.path.exists(SOURCE_FILE):
-            with open(SOURCE_FILE, "r", encoding="utf-8") as f:
-                written_content = f.read()
-            print(f"✅ File written successfully. Size: {len(written_content)} bytes")
-            
-            # Check if content matches
-            if written_content == source_code:
-                print("✅ Content verification successful!")
-            else:
-                print("⚠️ Content mismatch detected!")
-        else:
-            print(f"❌ File not found after writing: {SOURCE_FILE}")
-            return jsonify({"success": False, "message": "Failed to write source file"}), 500
-
-        # Run the full LLM pipeline
-        print("🚀 Running LLM review pipeline...")
-        result = LLM()  # Waits until everything finishes
+        # Run the full LLM pipeline; each run gets its own workspace, so concurrent requests don't collide
+        log.info("🚀 Running LLM review pipeline...")
+        started = time.perf_counter()
+        with collect_timings() as spans:
+            result = LLM(source_code)  # Waits until everything finishes
 
         # Return result to frontend
         if isinstance(result, dict):
-            print(result)
+            log.debug(result)
+            if wants_timings():
+                result["timings"] = timings_summary(spans, time.perf_counter() - started)
             return jsonify(result)
         else:
             return jsonify({
@@ -77,13 +80,155 @@ def run_llm():
                 "success": False
             }), 500
 
+    except PipelineBusyError as e:
+        log.warning(f"⏳ /run-llm rejected: {e}")
+        return jsonify({"message": str(e), "success": False}), 503
+
     except Exception as e:
-        print(f"❌ Error in /run-llm: {e}")
+        log.error(f"❌ Error in /run-llm: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"message": f"Error: {str(e)}", "success": False}), 500
 
 
+@app.route("/run-llm/batch", methods=["POST"])
+def run_llm_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        # Accept ["src", ...] or [{"code": "src"}, ...]
+        items = data.get("sources") or data.get("programs") or []
+        sources = [item.get("code", "") if isinstance(item, dict) else str(item) for item in items]
+
+        if not sources:
+            return jsonify({"success": False, "message": "No sources provided."}), 400
+        if len(sources) > BATCH_MAX_ITEMS:
+            return jsonify({
+                "success": False,
+                "message": f"At most {BATCH_MAX_ITEMS} sources per batch."
+            }), 400
+
+        log.info(f"🚀 Running batch pipeline for {len(sources)} sources...")
+        started = time.perf_counter()
+        with collect_timings() as spans:
+            results = run_batch(sources)
+
+        response = {
+            "success": all(r.get("success") for r in results),
+            "results": results,
+        }
+        if wants_timings():
+            response["timings"] = timings_summary(spans, time.perf_counter() - started)
+        return jsonify(response)
+
+    except PipelineBusyError as e:
+        log.warning(f"⏳ /run-llm/batch rejected: {e}")
+        return jsonify({"message": str(e), "success": False}), 503
+
+    except Exception as e:
+        log.error(f"❌ Error in /run-llm/batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"message": f"Error: {str(e)}", "success": False}), 500
+
+
+@app.route("/run-llm/stream", methods=["POST"])
+def run_llm_stream():
+    source_code = get_source_code()
+    if not source_code.strip():
+        return jsonify({"success": False, "message": "No source code provided."}), 400
+
+    def generate():
+        try:
+            for event, data in stream_review(source_code):
+                yield sse_frame(event, data)
+        except Exception as e:
+            log.error(f"❌ Error in /run-llm/stream: {e}")
+            yield sse_frame("failed", {"success": False, "message": f"Error: {str(e)}"})
+
+    # Suggestions and optimized TAC are forwarded as soon as Gemini finishes each one
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    source_code = get_source_code()
+    if not source_code.strip():
+        return jsonify({"success": False, "message": "No source code provided."}), 400
+
+    # Runs on a background executor; progress is reported per stage
+    job_id = submit_job(source_code)
+    return jsonify({
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events",
+    }), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown job"}), 404
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    return Response(
+        stream_job_events(job_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Prometheus text format; like the cache counters, values are per worker
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    # Counters are per worker; the disk tier itself is shared
+    return jsonify(result_cache.stats())
+
+
+@app.route("/gemini/stats", methods=["GET"])
+def gemini_stats():
+    # Calls, win rate and latency percentiles per model in GEMINI_MODELS (per worker)
+    return jsonify(model_stats.snapshot())
+
+
+@app.route("/reports", methods=["GET"])
+def list_reports():
+    # Newest first; follow next_cursor for older pages. ?full=1 includes each stored result
+    try:
+        page = report_store.query(
+            source_hash=request.args.get("source_hash"),
+            status=request.args.get("status"),
+            since=float(request.args["since"]) if "since" in request.args else None,
+            until=float(request.args["until"]) if "until" in request.args else None,
+            limit=int(request.args.get("limit", "20")),
+            cursor=int(request.args["cursor"]) if "cursor" in request.args else None,
+            include_payload=request.args.get("full", "").lower() in ("1", "true", "yes"),
+        )
+    except ValueError:
+        return jsonify({"success": False, "message": "since/until must be numbers, limit/cursor integers"}), 400
+    return jsonify(page)
+
+
+@app.route("/reports/<int:report_id>", methods=["GET"])
+def get_report(report_id):
+    report = report_store.get(report_id)
+    if report is None:
+        return jsonify({"success": False, "message": "Unknown report"}), 404
+    return jsonify(report)
+
+
 if __name__ == "__main__":
     print("🧠 LLM Flask API running at http://127.0.0.1:5001/run-llm")
     app.run(host="0.0.0.0", port=10000)
@@ -0,0 +1,150 @@
+"""
+Pipeline benchmark: per-stage timings on generated programs and end-to-end
+/run-llm throughput, with the Gemini API replaced by stubs/gemini_stub.py.
+
+    cd backend
+    python -m bench --sizes 10,25,50 --latency 0.2 --concurrency 1,2,4,8
+    python -m bench --save-baseline bench/results/baseline.json
+    python -m bench --baseline bench/results/baseline.json --fail-on-regression
+    python -m bench --skip-stages --skip-throughput --scale-sizes 1000,10000,100000
+"""
+import argparse
+import contextlib
+import os
+import platform
+import sys
+import time
+
+from bench.generator import SHAPES, generate_program
+from bench.report import compare_to_baseline, load_results, print_comparison, save_baseline, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="NeuroFold pipeline benchmark")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma-separated program shapes")
+    parser.add_argument("--sizes", type=_int_list, default=[10, 25, 50], help="comma-separated program sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per program for the stage table")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument("--gemini-base", help="use this Gemini API base instead of starting the stub")
+    parser.add_argument("--url", help="benchmark a running server instead of app.py in-process")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=16, help="requests per concurrency level")
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--skip-throughput", action="store_true")
+    parser.add_argument("--scale-sizes", type=_int_list, default=[],
+                        help="also time the C stages on uncapped programs of these sizes")
+    parser.add_argument("--scale-shape", default="variables", choices=SHAPES)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    # Absolute timings only compare on the machine that recorded them, so there is no default baseline
+    parser.add_argument("--baseline", metavar="PATH", help="results.json recorded on this machine to compare against")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store these results as a baseline at PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+    if args.fail_on_regression and not args.baseline:
+        parser.error("--fail-on-regression needs --baseline PATH")
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} not found; record one with --save-baseline {args.baseline}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    shapes = [shape.strip() for shape in args.shapes.split(",") if shape.strip()]
+
+    # The pipeline reads its endpoint and cache settings at import time
+    if args.gemini_base:
+        os.environ["GEMINI_API_BASE"] = args.gemini_base
+    else:
+        from stubs.gemini_stub import start_stub
+        _, stub_base = start_stub(latency=args.latency)
+        os.environ["GEMINI_API_BASE"] = stub_base
+        print(f"🧪 Gemini stub at {stub_base} ({args.latency}s latency)")
+    os.environ.setdefault("PIPELINE_CACHE_ENABLED", "0")
+    # Measure the pipeline, not the shared Gemini quota limiter
+    os.environ.setdefault("GEMINI_LIMITER_ENABLED", "0")
+    # Keep benchmark reviews out of the app's report history
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.environ.setdefault("REPORT_STORE_DB", os.path.join(args.output_dir, "reports.sqlite3"))
+
+    from llm import native
+    import llm.LLM as pipeline
+
+    cases = [
+        (shape, size, generate_program(shape, size, seed=args.seed))
+        for shape in shapes for size in args.sizes
+    ]
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pipeline_mode": pipeline.PIPELINE_MODE,
+            "native": native.available(),
+            "gemini_base": os.environ["GEMINI_API_BASE"],
+            "stub_latency": None if args.gemini_base else args.latency,
+            "seed": args.seed,
+        },
+        "stages": [],
+        "throughput": [],
+        "scaling": [],
+    }
+
+    if not args.skip_stages:
+        from bench.stages import benchmark_stages
+        print(f"⏱️ Timing pipeline stages for {len(cases)} programs ({args.repeats} runs each)...")
+        results["stages"] = benchmark_stages(cases, repeats=args.repeats)
+
+    if args.scale_sizes:
+        from bench.scale import benchmark_scaling
+        print(f"📈 Scaling {args.scale_shape} programs to {max(args.scale_sizes)}...")
+        results["scaling"] = benchmark_scaling(args.scale_shape, args.scale_sizes, seed=args.seed)
+
+    if not args.skip_throughput:
+        from bench.throughput import measure_throughput, start_app_server
+        sources = [source for _, _, source in cases]
+        if args.url:
+            results["throughput"] = measure_throughput(args.url, sources, args.concurrency, args.requests)
+        else:
+            server, base_url = start_app_server()
+            print(f"🚦 Measuring throughput against app.py at {base_url}...")
+            # app.py logs every request in detail; keep the benchmark output readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results["throughput"] = measure_throughput(base_url, sources, args.concurrency, args.requests)
+            server.shutdown()
+            for row in results["throughput"]:
+                print(f"🚦 concurrency {row['concurrency']}: {row['requests_per_second']} req/s, "
+                      f"{row['succeeded']}/{row['requests']} ok, p95 {row.get('p95_ms', '-')} ms")
+        results["meta"]["throughput_target"] = args.url or "app.py (in-process)"
+
+    for path in write_results(results, args.output_dir):
+        print(f"📦 Wrote {path}")
+
+    regressions = []
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+        print(f"📌 Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        print(f"📊 Comparing with baseline {args.baseline} (tolerance {args.tolerance:.0%})")
+        comparisons = compare_to_baseline(results, load_results(args.baseline), args.tolerance)
+        print_comparison(comparisons)
+        regressions = [row for row in comparisons if row["regression"]]
+        results["baseline_comparison"] = comparisons
+        write_results(results, args.output_dir)
+
+    if regressions and args.fail_on_regression:
+        print(f"❌ {len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
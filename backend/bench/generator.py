@@ -0,0 +1,163 @@
+"""
+Synthetic C programs for the subset compiler.c parses: int declarations,
+assignments, + - * / % and comparisons, if/else, while, for, calls and
+return. Every shape grows with `size`; variable names are unique across the
+whole program because the compiler keeps a single global symbol table.
+"""
+import random
+
+SHAPES = ("expressions", "variables", "nested", "functions")
+OPERATORS = ("+", "-", "*", "/", "%")
+COMPARISONS = ("<", "<=", ">", ">=", "==", "!=")
+
+
+class _Program:
+    def __init__(self, seed, max_symbols):
+        self.rng = random.Random(seed)
+        self.max_symbols = max_symbols
+        self.symbols = 0
+        self.lines = []
+
+    def new_name(self, prefix):
+        self.symbols += 1
+        return f"{prefix}{self.symbols}"
+
+    def has_room(self, count=1):
+        return self.max_symbols is None or self.symbols + count <= self.max_symbols
+
+    def term(self, names):
+        # Mix literals and variables so the optimizer has something to fold
+        if names and self.rng.random() < 0.5:
+            return self.rng.choice(names)
+        return str(self.rng.randint(1, 9))
+
+    def expression_terms(self, names, terms):
+        """The first term, then one "operator term" string per further term."""
+        parts = [self.term(names)]
+        for _ in range(terms - 1):
+            operator = self.rng.choice(OPERATORS)
+            # Literal divisors only, so folding never divides by zero
+            operand = str(self.rng.randint(1, 9)) if operator in "/%" else self.term(names)
+            parts.append(f"{operator} {operand}")
+        return parts
+
+    def expression(self, names, terms):
+        return " ".join(self.expression_terms(names, terms))
+
+    def condition(self, names):
+        return f"{self.term(names)} {self.rng.choice(COMPARISONS)} {self.term(names)}"
+
+    def emit(self, depth, text):
+        self.lines.append("    " * depth + text)
+
+    def statement(self, depth, names, terms=4):
+        """Declare a new variable while the symbol budget lasts, then reassign."""
+        value = self.expression(names, terms)
+        if self.has_room():
+            name = self.new_name("v")
+            self.emit(depth, f"int {name} = {value};")
+            names.append(name)
+        else:
+            self.emit(depth, f"{self.rng.choice(names)} = {value};")
+
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def _expressions(program, size):
+    names = []
+    for _ in range(4):
+        program.statement(1, names, terms=1)
+    result = program.new_name("r")
+    # One term per line, so source lines (and bench/scale.py's µs/line) grow with size
+    first, *rest = program.expression_terms(names, max(size, 1))
+    program.emit(1, f"int {result} = {first}" + ("" if rest else ";"))
+    for index, part in enumerate(rest):
+        program.emit(2, part + (";" if index == len(rest) - 1 else ""))
+    program.emit(1, f"return {result};")
+
+
+def _variables(program, size):
+    names = []
+    for _ in range(max(size, 1)):
+        program.statement(1, names)
+    program.emit(1, f"return {names[-1]};")
+
+
+def _nested(program, size, max_depth=4):
+    names = []
+    program.statement(1, names, terms=1)
+    remaining = max(size, 1)
+    depth = 1
+    while remaining > 0:
+        kind = program.rng.choice(("if", "while", "for", "plain"))
+        if depth <= max_depth and kind == "if":
+            program.emit(depth, f"if ({program.condition(names)}) {{")
+            depth += 1
+        elif depth <= max_depth and kind == "while":
+            program.emit(depth, f"while ({program.condition(names)}) {{")
+            depth += 1
+        elif depth <= max_depth and kind == "for" and program.has_room():
+            counter = program.new_name("i")
+            # The for-update must be an expression, so the counter moves in the body
+            program.emit(depth, f"for (int {counter} = 0; {counter} < 8; {counter}) {{")
+            program.emit(depth + 1, f"{counter} = {counter} + 1;")
+            names.append(counter)
+            depth += 1
+        else:
+            program.statement(depth, names)
+            remaining -= 1
+            if depth > 1 and program.rng.random() < 0.3:
+                depth -= 1
+                program.emit(depth, "}")
+    while depth > 1:
+        depth -= 1
+        program.emit(depth, "}")
+    program.emit(1, f"return {names[0]};")
+
+
+def _functions(program, size):
+    # Each function costs three symbols (two parameters and a result)
+    count = size if program.max_symbols is None else max(1, min(size, (program.max_symbols - 2) // 3))
+    per_function = max(1, size // count)
+    functions = []
+    for index in range(count):
+        name = f"f{index}"
+        a, b, result = program.new_name("p"), program.new_name("p"), program.new_name("r")
+        program.emit(0, f"int {name}(int {a}, int {b}) {{")
+        program.emit(1, f"int {result} = {program.expression([a, b], 3)};")
+        for _ in range(per_function - 1):
+            program.emit(1, f"{result} = {program.expression([a, b, result], 3)};")
+        program.emit(1, f"return {result};")
+        program.emit(0, "}")
+        program.emit(0, "")
+        functions.append(name)
+
+    program.emit(0, "int main() {")
+    total = program.new_name("s")
+    program.emit(1, f"int {total} = 0;")
+    for name in functions:
+        program.emit(1, f"{total} = {total} + {name}({program.rng.randint(1, 9)}, {program.rng.randint(1, 9)});")
+    program.emit(1, f"return {total};")
+    program.emit(0, "}")
+
+
+def generate_program(shape, size, seed=0, max_symbols=90):
+    """
+    Build a program of the given shape. `size` is the number of expression
+    terms (expressions), statements (variables, nested) or functions.
+    `max_symbols` caps declarations (None for no cap); the default keeps
+    programs comparable with baselines recorded under the old 100-symbol table.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape {shape!r}; expected one of {', '.join(SHAPES)}")
+
+    program = _Program(seed, max_symbols)
+    if shape == "functions":
+        _functions(program, size)
+        return program.source()
+
+    program.emit(0, "int main() {")
+    {"expressions": _expressions, "variables": _variables, "nested": _nested}[shape](program, size)
+    program.emit(0, "}")
+    return program.source()
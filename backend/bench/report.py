@@ -0,0 +1,113 @@
+"""
+Benchmark result files (JSON plus one CSV per table) and baseline comparison.
+"""
+import csv
+import json
+import os
+
+
+def write_results(results, output_dir):
+    """Write results.json plus stages.csv, throughput.csv and scaling.csv into `output_dir`."""
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, "results.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    paths = [json_path]
+    for table in ("stages", "throughput", "scaling"):
+        rows = results.get(table) or []
+        if not rows:
+            continue
+        path = os.path.join(output_dir, f"{table}.csv")
+        fieldnames = []
+        for row in rows:
+            fieldnames.extend(key for key in row if key not in fieldnames)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({
+                    key: json.dumps(value) if isinstance(value, dict) else value
+                    for key, value in row.items()
+                })
+        paths.append(path)
+    return paths
+
+
+def save_baseline(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _change(current, baseline):
+    return round((current - baseline) / baseline * 100, 1) if baseline else 0.0
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Compare mean stage times and scaling totals (lower is better) and
+    requests/second (higher is better) with a stored baseline. Returns rows with the % change and a
+    `regression` flag when a metric is worse by more than `tolerance`.
+    """
+    comparisons = []
+
+    baseline_stages = {
+        (row["shape"], row["size"], row["stage"]): row
+        for row in baseline.get("stages", []) if "mean_ms" in row
+    }
+    for row in results.get("stages", []):
+        old = baseline_stages.get((row["shape"], row["size"], row["stage"]))
+        if old is None or "mean_ms" not in row:
+            continue
+        comparisons.append({
+            "metric": f"{row['shape']}/{row['size']}/{row['stage']} mean_ms",
+            "baseline": old["mean_ms"],
+            "current": row["mean_ms"],
+            "change_pct": _change(row["mean_ms"], old["mean_ms"]),
+            "regression": row["mean_ms"] > old["mean_ms"] * (1 + tolerance),
+        })
+
+    baseline_scaling = {
+        (row["shape"], row["size"]): row
+        for row in baseline.get("scaling", []) if "total_ms" in row
+    }
+    for row in results.get("scaling", []):
+        old = baseline_scaling.get((row["shape"], row["size"]))
+        if old is None or "total_ms" not in row:
+            continue
+        comparisons.append({
+            "metric": f"scaling {row['shape']}/{row['size']} total_ms",
+            "baseline": old["total_ms"],
+            "current": row["total_ms"],
+            "change_pct": _change(row["total_ms"], old["total_ms"]),
+            "regression": row["total_ms"] > old["total_ms"] * (1 + tolerance),
+        })
+
+    baseline_throughput = {row["concurrency"]: row for row in baseline.get("throughput", [])}
+    for row in results.get("throughput", []):
+        old = baseline_throughput.get(row["concurrency"])
+        if old is None:
+            continue
+        comparisons.append({
+            "metric": f"concurrency {row['concurrency']} requests_per_second",
+            "baseline": old["requests_per_second"],
+            "current": row["requests_per_second"],
+            "change_pct": _change(row["requests_per_second"], old["requests_per_second"]),
+            "regression": row["requests_per_second"] < old["requests_per_second"] * (1 - tolerance),
+        })
+    return comparisons
+
+
+def print_comparison(comparisons):
+    if not comparisons:
+        print("ℹ️ Nothing in common with the baseline to compare")
+        return
+    width = max(len(row["metric"]) for row in comparisons)
+    for row in comparisons:
+        marker = "❌" if row["regression"] else "✅"
+        print(f"{marker} {row['metric']:<{width}}  {row['baseline']:>10} → {row['current']:>10}  ({row['change_pct']:+.1f}%)")
@@ -0,0 +1,84 @@
+"""
+Scaling of the C stages on very large generated programs: compile and
+optimize time and per-line cost at growing sizes, to check that both stay
+linear.
+"""
+import os
+import subprocess
+import time
+
+import llm.LLM as pipeline
+from llm import native
+
+from bench.generator import generate_program
+
+
+def _run_stage(executable, input_text):
+    """Run one --stdio --quiet stage; returns (stdout, stats, wall_ms)."""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [executable, "--stdio", "--quiet"],
+        input=input_text,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(executable)} failed:\n{completed.stderr[-2000:]}")
+    return completed.stdout, pipeline.parse_stage_stats(completed.stderr), wall_ms
+
+
+def _stage_ms(stats, wall_ms):
+    # Prefer the stage's own timing, which leaves out process start-up and pipe I/O
+    if stats and "total" in stats.get("ms", {}):
+        return stats["ms"]["total"]
+    return wall_ms
+
+
+def benchmark_scaling(shape, sizes, seed=0):
+    """
+    Compile and optimize one generated program per size with no symbol cap.
+    Returns one row per size; `us_per_line` should stay flat as size grows.
+    """
+    rows = []
+    for size in sizes:
+        source_code = generate_program(shape, size, seed=seed, max_symbols=None)
+        source_lines = source_code.count("\n")
+        try:
+            ir_code, compile_stats, compile_wall = _run_stage(pipeline.COMPILER_EXECUTABLE, source_code)
+            _, optimize_stats, optimize_wall = _run_stage(pipeline.OPTIMIZER_EXECUTABLE, ir_code)
+        except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+            rows.append({"shape": shape, "size": size, "source_lines": source_lines, "error": str(e)})
+            print(f"❌ {shape}/{size}: {e}")
+            continue
+
+        compile_ms = _stage_ms(compile_stats, compile_wall)
+        optimize_ms = _stage_ms(optimize_stats, optimize_wall)
+        row = {
+            "shape": shape,
+            "size": size,
+            "source_lines": source_lines,
+            "tac_lines": ir_code.count("\n"),
+            "symbols": (compile_stats or {}).get("symbols"),
+            "folds": (optimize_stats or {}).get("folds"),
+            "compile_ms": round(compile_ms, 3),
+            "optimize_ms": round(optimize_ms, 3),
+            "total_ms": round(compile_ms + optimize_ms, 3),
+            "wall_ms": round(compile_wall + optimize_wall, 3),
+            "us_per_line": round((compile_ms + optimize_ms) * 1000 / max(source_lines, 1), 3),
+        }
+        if native.available():
+            start = time.perf_counter()
+            native.compile_and_optimize(source_code)
+            row["native_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        rows.append(row)
+        print(f"📈 {shape}/{size}: {source_lines} lines, {row['total_ms']} ms "
+              f"({row['wall_ms']} ms wall), {row['us_per_line']} µs/line")
+
+    timed = [row for row in rows if "us_per_line" in row]
+    if len(timed) >= 2:
+        growth = timed[-1]["us_per_line"] / timed[0]["us_per_line"] if timed[0]["us_per_line"] else 0.0
+        print(f"📈 Per-line cost changed x{growth:.2f} from {timed[0]['source_lines']} "
+              f"to {timed[-1]['source_lines']} lines (≈1 means linear)")
+    return rows
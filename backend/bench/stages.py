@@ -0,0 +1,125 @@
+"""
+Per-stage timings for one pass of LLM(): the same functions the pipeline
+calls, run one after another in a scratch workspace so each can be clocked
+on its own. Point GEMINI_API_BASE at stubs/gemini_stub.py before importing.
+"""
+import contextlib
+import os
+import statistics
+import time
+
+import llm.LLM as pipeline
+from llm import native
+from llm.workspace import scratch_workspace
+
+STAGES = (
+    "source_write",
+    "compile",
+    "optimize",
+    "native_compile_optimize",
+    "prompt_build",
+    "gemini_call",
+    "response_parse",
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+
+def time_pipeline_once(source_code):
+    """
+    Run every stage once and return ({stage: milliseconds}, error or None).
+    The pipeline's own progress prints are discarded while timing.
+    """
+    clock = _Clock()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with scratch_workspace() as workspace:
+            with clock.stage("source_write"):
+                written = workspace.write_source(source_code)
+            if not written:
+                return clock.timings, "source write failed"
+
+            with clock.stage("compile"):
+                compiled = pipeline.run_c_compiler(workspace)
+            if not compiled:
+                return clock.timings, "compiler failed"
+
+            with clock.stage("optimize"):
+                optimized = pipeline.run_c_optimizer(workspace)
+            if not optimized:
+                return clock.timings, "optimizer failed"
+
+            with open(workspace.ir_file, "r", encoding="utf-8") as f:
+                ir_code = f.read()
+            with open(workspace.output_file, "r", encoding="utf-8") as f:
+                optimized_code = f.read()
+
+        if native.available():
+            with clock.stage("native_compile_optimize"):
+                native.compile_and_optimize(source_code)
+
+        with clock.stage("prompt_build"):
+            reduction = pipeline.reduce_tac(optimized_code)
+            prompt = pipeline.build_review_prompt(reduction[0])
+
+        with clock.stage("gemini_call"):
+            review_text, _ = pipeline.call_gemini_api(prompt)
+
+        with clock.stage("response_parse"):
+            result = pipeline.build_structured_output(review_text, optimized_code, reduction)
+            pipeline.attach_cost_analysis([result], [ir_code])
+
+    return clock.timings, None
+
+
+def summarize(samples):
+    """min / mean / p50 / p95 / max over a list of millisecond samples."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "min_ms": round(ordered[0], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def benchmark_stages(cases, repeats=5):
+    """
+    `cases` is a list of (shape, size, source_code). Returns one row per
+    (case, stage) with timing statistics, plus a row per failed case.
+    """
+    rows = []
+    for shape, size, source_code in cases:
+        samples = {stage: [] for stage in STAGES}
+        error = None
+        for _ in range(repeats):
+            timings, error = time_pipeline_once(source_code)
+            if error:
+                break
+            for stage, elapsed in timings.items():
+                samples[stage].append(elapsed)
+
+        base = {"shape": shape, "size": size, "source_lines": source_code.count("\n")}
+        if error:
+            rows.append({**base, "stage": "error", "error": error})
+            print(f"❌ {shape}/{size}: {error}")
+            continue
+
+        for stage in STAGES:
+            if samples[stage]:
+                rows.append({**base, "stage": stage, "runs": len(samples[stage]), **summarize(samples[stage])})
+        total = sum(statistics.fmean(values) for values in samples.values() if values)
+        print(f"⏱️ {shape}/{size}: {total:.1f} ms per pipeline pass")
+    return rows
@@ -0,0 +1,80 @@
+"""
+End-to-end throughput of POST /run-llm at several concurrency levels, either
+against a running server (--url) or against app.py served in-process.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench.stages import summarize
+
+
+def start_app_server(port=0):
+    """Serve app.py on a daemon thread with Werkzeug's threaded server."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", port, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _post(session, url, source_code, timeout):
+    start = time.perf_counter()
+    try:
+        response = session.post(url, json={"code": source_code}, timeout=timeout)
+        ok = response.status_code == 200 and response.json().get("success", True) is not False
+        status = response.status_code
+    except requests.exceptions.RequestException:
+        ok, status = False, None
+    return ok, status, (time.perf_counter() - start) * 1000
+
+
+def measure_throughput(base_url, sources, concurrency_levels, requests_per_level, timeout=120):
+    """
+    Fire `requests_per_level` requests (cycling through `sources`) at each
+    concurrency level. Returns one row per level with requests/second,
+    latency statistics and error counts by status.
+    """
+    url = f"{base_url.rstrip('/')}/run-llm"
+    rows = []
+    for concurrency in concurrency_levels:
+        sessions = [requests.Session() for _ in range(concurrency)]
+        jobs = [sources[i % len(sources)] for i in range(requests_per_level)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(
+                lambda item: _post(sessions[item[0] % concurrency], url, item[1], timeout),
+                enumerate(jobs),
+            ))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for ok, _, latency in outcomes if ok]
+        errors = {}
+        for ok, status, _ in outcomes:
+            if not ok:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+        row = {
+            "concurrency": concurrency,
+            "requests": len(jobs),
+            "succeeded": len(latencies),
+            "seconds": round(elapsed, 3),
+            "requests_per_second": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+            "errors": errors,
+        }
+        if latencies:
+            row.update(summarize(latencies))
+        rows.append(row)
+        print(f"🚦 concurrency {concurrency}: {row['requests_per_second']} req/s, {len(latencies)}/{len(jobs)} ok")
+
+        for session in sessions:
+            session.close()
+    return rows
@@ -25,5 +25,13 @@ else
     exit 1
 fi
 
+# Shared library for in-process use (llm/native.py); optional
+gcc -O2 -shared -fPIC -o libneurofold.so neurofold_lib.c -lm
+if [ $? -eq 0 ]; then
+    echo "✅ Native library built successfully"
+else
+    echo "⚠️ Failed to build native library, the executables will be used"
+fi
+
 cd ..
 echo "✅ All executables built successfully"
\ No newline at end of file
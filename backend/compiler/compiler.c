@@ -3,6 +3,11 @@
 #include <string.h>
 #include <ctype.h>
 #include <stdbool.h>
+#include <setjmp.h>
+#include <time.h>
+#include <unistd.h>
+
+#include "nf_support.h"
 
 // ==================== LEXICAL ANALYZER ====================
 
@@ -52,6 +57,13 @@ void skipWhitespace(Lexer* lex) {
     }
 }
 
+// Over-long lexemes are truncated to the token buffer
+void copyLexeme(Token* tok, const char* start, int len) {
+    if (len > (int)sizeof(tok->value) - 1) len = sizeof(tok->value) - 1;
+    memcpy(tok->value, start, len);
+    tok->value[len] = '\0';
+}
+
 Token getNextToken(Lexer* lex) {
     Token tok;
     skipWhitespace(lex);
@@ -76,8 +88,7 @@ Token getNextToken(Lexer* lex) {
             lex->column++;
             len++;
         }
-        strncpy(tok.value, &lex->source[start], len);
-        tok.value[len] = '\0';
+        copyLexeme(&tok, &lex->source[start], len);
         
         tok.type = TOK_IDENTIFIER;
         for (int i = 0; i < 9; i++) {
@@ -99,8 +110,7 @@ Token getNextToken(Lexer* lex) {
             lex->column++;
             len++;
         }
-        strncpy(tok.value, &lex->source[start], len);
-        tok.value[len] = '\0';
+        copyLexeme(&tok, &lex->source[start], len);
         tok.type = isFloat ? TOK_FLOAT_LITERAL : TOK_INTEGER_LITERAL;
         return tok;
     }
@@ -127,8 +137,7 @@ Token getNextToken(Lexer* lex) {
             lex->column++;
             len++;
         }
-        strncpy(tok.value, &lex->source[start], len);
-        tok.value[len] = '\0';
+        copyLexeme(&tok, &lex->source[start], len);
         tok.type = TOK_STRING_LITERAL;
         return tok;
     }
@@ -149,8 +158,7 @@ Token getNextToken(Lexer* lex) {
             lex->column++;
             len++;
         }
-        strncpy(tok.value, &lex->source[start], len);
-        tok.value[len] = '\0';
+        copyLexeme(&tok, &lex->source[start], len);
         tok.type = TOK_CHAR_LITERAL;
         return tok;
     }
@@ -238,33 +246,62 @@ typedef enum {
     NODE_INTEGER, NODE_FLOAT, NODE_CHAR, NODE_STRING
 } NodeType;
 
+// Identifiers, literals and operators are interned: nodes and the symbol
+// table share one copy of each name, released by freeNames()
+StringPool compilerNames;
+
+const char* internName(const char* name) {
+    return poolIntern(&compilerNames, name);
+}
+
+void freeNames() {
+    poolFree(&compilerNames);
+}
+
 typedef struct ASTNode {
     NodeType type;
-    char value[256];
+    const char* value;
     TokenType dataType;
     struct ASTNode* left;
     struct ASTNode* right;
     struct ASTNode* extra;
     struct ASTNode** children;
     int childCount;
+    int childCapacity;
 } ASTNode;
 
 ASTNode* createNode(NodeType type) {
     ASTNode* node = (ASTNode*)malloc(sizeof(ASTNode));
     node->type = type;
-    node->value[0] = '\0';
+    node->value = "";
     node->dataType = TOK_VOID;
     node->left = node->right = node->extra = NULL;
     node->children = NULL;
     node->childCount = 0;
+    node->childCapacity = 0;
     return node;
 }
 
 void addChild(ASTNode* parent, ASTNode* child) {
-    parent->children = realloc(parent->children, sizeof(ASTNode*) * (parent->childCount + 1));
+    if (parent->childCount >= parent->childCapacity) {
+        parent->childCapacity = parent->childCapacity ? parent->childCapacity * 2 : 4;
+        parent->children = realloc(parent->children, sizeof(ASTNode*) * parent->childCapacity);
+    }
     parent->children[parent->childCount++] = child;
 }
 
+void freeAST(ASTNode* node) {
+    if (!node) return;
+    freeAST(node->left);
+    freeAST(node->right);
+    freeAST(node->extra);
+    for (int i = 0; i < node->childCount; i++) {
+        freeAST(node->children[i]);
+    }
+    free(node->children);
+    free(node);
+}
+
 // ==================== PARSER ====================
 
 typedef struct {
@@ -272,18 +309,27 @@ typedef struct {
     Token currentToken;
 } Parser;
 
+// Tokens consumed by the parser, reported in the stats record
+int tokenCount = 0;
+
 void advance(Parser* p) {
     p->currentToken = getNextToken(p->lexer);
+    if (p->currentToken.type != TOK_EOF) tokenCount++;
 }
 
 bool match(Parser* p, TokenType type) {
     return p->currentToken.type == type;
 }
 
+// Set by callers that must survive a parse error (the shared library)
+jmp_buf parseErrorJump;
+bool parseErrorJumpSet = false;
+
 bool expect(Parser* p, TokenType type) {
     if (!match(p, type)) {
         printf("Parse error at line %d col %d: expected token type %d, got %d ('%s')\n", 
                p->currentToken.line, p->currentToken.column, type, p->currentToken.type, p->currentToken.value);
+        if (parseErrorJumpSet) longjmp(parseErrorJump, 1);
         exit(1); // Exit on parse error to prevent infinite loops
     }
     advance(p);
@@ -299,28 +345,28 @@ ASTNode* parsePrimary(Parser* p) {
     
     if (match(p, TOK_INTEGER_LITERAL)) {
         node = createNode(NODE_INTEGER);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
     } else if (match(p, TOK_FLOAT_LITERAL)) {
         node = createNode(NODE_FLOAT);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
     } else if (match(p, TOK_CHAR_LITERAL)) {
         node = createNode(NODE_CHAR);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
     } else if (match(p, TOK_STRING_LITERAL)) {
         node = createNode(NODE_STRING);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
     } else if (match(p, TOK_IDENTIFIER)) {
         node = createNode(NODE_IDENTIFIER);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         
         if (match(p, TOK_LPAREN)) {
             ASTNode* callNode = createNode(NODE_CALL);
-            strcpy(callNode->value, node->value);
+            callNode->value = node->value;
             free(node);
             advance(p);
             
@@ -343,7 +389,7 @@ ASTNode* parsePrimary(Parser* p) {
 ASTNode* parseUnary(Parser* p) {
     if (match(p, TOK_MINUS) || match(p, TOK_NOT)) {
         ASTNode* node = createNode(NODE_UNARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = parseUnary(p);
         return node;
@@ -356,7 +402,7 @@ ASTNode* parseMultiplicative(Parser* p) {
     
     while (match(p, TOK_MULTIPLY) || match(p, TOK_DIVIDE) || match(p, TOK_MODULO)) {
         ASTNode* node = createNode(NODE_BINARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = left;
         node->right = parseUnary(p);
@@ -370,7 +416,7 @@ ASTNode* parseAdditive(Parser* p) {
     
     while (match(p, TOK_PLUS) || match(p, TOK_MINUS)) {
         ASTNode* node = createNode(NODE_BINARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = left;
         node->right = parseMultiplicative(p);
@@ -384,7 +430,7 @@ ASTNode* parseRelational(Parser* p) {
     
     while (match(p, TOK_LT) || match(p, TOK_LE) || match(p, TOK_GT) || match(p, TOK_GE)) {
         ASTNode* node = createNode(NODE_BINARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = left;
         node->right = parseAdditive(p);
@@ -398,7 +444,7 @@ ASTNode* parseEquality(Parser* p) {
     
     while (match(p, TOK_EQ) || match(p, TOK_NE)) {
         ASTNode* node = createNode(NODE_BINARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = left;
         node->right = parseRelational(p);
@@ -412,7 +458,7 @@ ASTNode* parseLogicalAnd(Parser* p) {
     
     while (match(p, TOK_AND)) {
         ASTNode* node = createNode(NODE_BINARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = left;
         node->right = parseEquality(p);
@@ -426,7 +472,7 @@ ASTNode* parseLogicalOr(Parser* p) {
     
     while (match(p, TOK_OR)) {
         ASTNode* node = createNode(NODE_BINARY_OP);
-        strcpy(node->value, p->currentToken.value);
+        node->value = internName(p->currentToken.value);
         advance(p);
         node->left = left;
         node->right = parseLogicalAnd(p);
@@ -444,7 +490,7 @@ ASTNode* parseVarDecl(Parser* p) {
     node->dataType = p->currentToken.type;
     advance(p);
     
-    strcpy(node->value, p->currentToken.value);
+    node->value = internName(p->currentToken.value);
     expect(p, TOK_IDENTIFIER);
     
     if (match(p, TOK_ASSIGN)) {
@@ -571,7 +617,7 @@ ASTNode* parseFunction(Parser* p) {
     node->dataType = p->currentToken.type;
     advance(p);
     
-    strcpy(node->value, p->currentToken.value);
+    node->value = internName(p->currentToken.value);
     expect(p, TOK_IDENTIFIER);
     expect(p, TOK_LPAREN);
     
@@ -579,7 +625,7 @@ ASTNode* parseFunction(Parser* p) {
         ASTNode* param = createNode(NODE_VAR_DECL);
         param->dataType = p->currentToken.type;
         advance(p);
-        strcpy(param->value, p->currentToken.value);
+        param->value = internName(p->currentToken.value);
         expect(p, TOK_IDENTIFIER);
         addChild(node, param);
         
@@ -603,33 +649,71 @@ ASTNode* parseProgram(Parser* p) {
 
 // ==================== SEMANTIC ANALYZER ====================
 
+// Names are interned, so lookups hash and compare pointers
 typedef struct {
-    char name[256];
+    const char* name;
     TokenType type;
+    int next;           // next symbol in the same bucket, -1 at the end
 } Symbol;
 
 typedef struct {
-    Symbol symbols[100];
+    Symbol* symbols;    // in declaration order
     int count;
+    int capacity;
+    int* buckets;       // index of the first symbol per bucket, -1 if empty
+    int bucketCount;    // power of two
 } SymbolTable;
 
 SymbolTable symbolTable;
 
+void freeSymbolTable() {
+    free(symbolTable.symbols);
+    free(symbolTable.buckets);
+    memset(&symbolTable, 0, sizeof(symbolTable));
+}
+
 void initSymbolTable() {
-    symbolTable.count = 0;
+    freeSymbolTable();
+}
+
+void rehashSymbols(int bucketCount) {
+    free(symbolTable.buckets);
+    symbolTable.buckets = (int*)malloc(sizeof(int) * bucketCount);
+    symbolTable.bucketCount = bucketCount;
+    for (int i = 0; i < bucketCount; i++) symbolTable.buckets[i] = -1;
+    for (int i = 0; i < symbolTable.count; i++) {
+        int bucket = hashPointer(symbolTable.symbols[i].name) & (bucketCount - 1);
+        symbolTable.symbols[i].next = symbolTable.buckets[bucket];
+        symbolTable.buckets[bucket] = i;
+    }
 }
 
 void addSymbol(const char* name, TokenType type) {
-    strcpy(symbolTable.symbols[symbolTable.count].name, name);
-    symbolTable.symbols[symbolTable.count].type = type;
-    symbolTable.count++;
+    if (symbolTable.count >= symbolTable.capacity) {
+        symbolTable.capacity = symbolTable.capacity ? symbolTable.capacity * 2 : 64;
+        symbolTable.symbols = realloc(symbolTable.symbols, sizeof(Symbol) * symbolTable.capacity);
+    }
+    if (symbolTable.count * 2 >= symbolTable.bucketCount) {
+        rehashSymbols(symbolTable.bucketCount ? symbolTable.bucketCount * 2 : 128);
+    }
+
+    int bucket = hashPointer(name) & (symbolTable.bucketCount - 1);
+    Symbol* symbol = &symbolTable.symbols[symbolTable.count];
+    symbol->name = name;
+    symbol->type = type;
+    symbol->next = symbolTable.buckets[bucket];
+    symbolTable.buckets[bucket] = symbolTable.count++;
 }
 
+// `name` must come from internName()
 Symbol* findSymbol(const char* name) {
-    for (int i = 0; i < symbolTable.count; i++) {
-        if (strcmp(symbolTable.symbols[i].name, name) == 0) {
+    if (symbolTable.bucketCount == 0) return NULL;
+    int i = symbolTable.buckets[hashPointer(name) & (symbolTable.bucketCount - 1)];
+    while (i >= 0) {
+        if (symbolTable.symbols[i].name == name) {
             return &symbolTable.symbols[i];
         }
+        i = symbolTable.symbols[i].next;
     }
     return NULL;
 }
@@ -710,23 +794,23 @@ bool semanticAnalysis(ASTNode* node) {
 int tempCount = 0;
 int labelCount = 0;
 
-char* newTemp() {
-    char* temp = (char*)malloc(20);
+const char* newTemp() {
+    char temp[20];
     sprintf(temp, "t%d", tempCount++);
-    return temp;
+    return internName(temp);
 }
 
-char* newLabel() {
-    char* label = (char*)malloc(20);
+const char* newLabel() {
+    char label[20];
     sprintf(label, "L%d", labelCount++);
-    return label;
+    return internName(label);
 }
 
 // Modified signature - returns the temp variable used
-char* generateIR(ASTNode* node, FILE *fptr) {
+const char* generateIR(ASTNode* node, FILE *fptr) {
     if (!node) return NULL;
     
-    char* temp = NULL;
+    const char* temp = NULL;
     
     switch (node->type) {
         case NODE_PROGRAM:
@@ -765,24 +849,24 @@ char* generateIR(ASTNode* node, FILE *fptr) {
         }
             
         case NODE_BINARY_OP: {
-            char* leftTemp = generateIR(node->left, fptr);
-            char* rightTemp = generateIR(node->right, fptr);
-            char* resultTemp = newTemp();
+            const char* leftTemp = generateIR(node->left, fptr);
+            const char* rightTemp = generateIR(node->right, fptr);
+            const char* resultTemp = newTemp();
             fprintf(fptr, "  %s = %s %s %s\n", resultTemp, leftTemp, node->value, rightTemp);
             return resultTemp;  // Return the result temp
         }
             
         case NODE_UNARY_OP: {
-            char* operandTemp = generateIR(node->left, fptr);
-            char* resultTemp = newTemp();
+            const char* operandTemp = generateIR(node->left, fptr);
+            const char* resultTemp = newTemp();
             fprintf(fptr, "  %s = %s%s\n", resultTemp, node->value, operandTemp);
             return resultTemp;
         }
             
         case NODE_IF: {
-            char* condTemp = generateIR(node->left, fptr);
-            char* elseLabel = newLabel();
-            char* endLabel = newLabel();
+            const char* condTemp = generateIR(node->left, fptr);
+            const char* elseLabel = newLabel();
+            const char* endLabel = newLabel();
             
             fprintf(fptr, "  IF_FALSE %s GOTO %s\n", condTemp, elseLabel);
             generateIR(node->right, fptr);
@@ -794,11 +878,11 @@ char* generateIR(ASTNode* node, FILE *fptr) {
         }
             
         case NODE_WHILE: {
-            char* startLabel = newLabel();
-            char* endLabel = newLabel();
+            const char* startLabel = newLabel();
+            const char* endLabel = newLabel();
             
             fprintf(fptr, "%s:\n", startLabel);
-            char* condTemp = generateIR(node->left, fptr);
+            const char* condTemp = generateIR(node->left, fptr);
             fprintf(fptr, "  IF_FALSE %s GOTO %s\n", condTemp, endLabel);
             generateIR(node->right, fptr);
             fprintf(fptr, "  GOTO %s\n", startLabel);
@@ -807,13 +891,13 @@ char* generateIR(ASTNode* node, FILE *fptr) {
         }
             
         case NODE_FOR: {
-            char* startLabel = newLabel();
-            char* endLabel = newLabel();
+            const char* startLabel = newLabel();
+            const char* endLabel = newLabel();
             
             generateIR(node->left, fptr);
             fprintf(fptr, "%s:\n", startLabel);
             if (node->right) {
-                char* condTemp = generateIR(node->right, fptr);
+                const char* condTemp = generateIR(node->right, fptr);
                 fprintf(fptr, "  IF_FALSE %s GOTO %s\n", condTemp, endLabel);
             }
             for (int i = 0; i < node->childCount; i++) {
@@ -836,16 +920,16 @@ char* generateIR(ASTNode* node, FILE *fptr) {
             
         case NODE_CALL: {
             for (int i = 0; i < node->childCount; i++) {
-                char* argTemp = generateIR(node->children[i], fptr);
+                const char* argTemp = generateIR(node->children[i], fptr);
                 fprintf(fptr, "  PUSH_PARAM %s\n", argTemp);
             }
-            char* callTemp = newTemp();
+            const char* callTemp = newTemp();
             fprintf(fptr, "  %s = CALL %s, %d\n", callTemp, node->value, node->childCount);
             return callTemp;
         }
             
         case NODE_IDENTIFIER: {
-            char* idTemp = newTemp();
+            const char* idTemp = newTemp();
             fprintf(fptr, "  %s = %s\n", idTemp, node->value);
             return idTemp;
         }
@@ -854,7 +938,7 @@ char* generateIR(ASTNode* node, FILE *fptr) {
         case NODE_FLOAT:
         case NODE_CHAR:
         case NODE_STRING: {
-            char* litTemp = newTemp();
+            const char* litTemp = newTemp();
             fprintf(fptr, "  %s = %s\n", litTemp, node->value);
             return litTemp;
         }
@@ -865,13 +949,102 @@ char* generateIR(ASTNode* node, FILE *fptr) {
 }
 
 
-// ==================== MAIN ====================
+// ==================== IN-MEMORY COMPILATION ====================
+
+typedef struct {
+    int tokens;
+    int functions;
+    int symbols;
+    double parseMs;
+    double semanticMs;
+    double irgenMs;
+} CompileStats;
+
+// Parse, check and generate TAC for `source` into `out` without touching
+// the filesystem. Returns 0 on success, 1 on a parse error and 2 on a
+// semantic error. `stats` may be NULL.
+int compileSourceToStream(const char* source, FILE* out, CompileStats* stats) {
+    CompileStats local = {0};
+    if (stats == NULL) stats = &local;
+    memset(stats, 0, sizeof(*stats));
+
+    Lexer lexer;
+    initLexer(&lexer, source);
+    Parser parser;
+    parser.lexer = &lexer;
+    tokenCount = 0;
+
+    ASTNode* volatile ast = NULL;
+    double start = nowMs();
+    parseErrorJumpSet = true;
+    if (setjmp(parseErrorJump) != 0) {
+        // Nodes built before the error are unreachable; accept the small leak
+        parseErrorJumpSet = false;
+        stats->tokens = tokenCount;
+        stats->parseMs = nowMs() - start;
+        freeNames();
+        return 1;
+    }
+    advance(&parser);
+    ast = parseProgram(&parser);
+    parseErrorJumpSet = false;
+    stats->tokens = tokenCount;
+    stats->functions = ast->childCount;
+    stats->parseMs = nowMs() - start;
+
+    start = nowMs();
+    initSymbolTable();
+    bool checked = semanticAnalysis(ast);
+    stats->symbols = symbolTable.count;
+    stats->semanticMs = nowMs() - start;
+    if (!checked) {
+        freeAST(ast);
+        freeSymbolTable();
+        freeNames();
+        return 2;
+    }
+
+    start = nowMs();
+    tempCount = 0;
+    labelCount = 0;
+    generateIR(ast, out);
+    freeAST(ast);
+    freeSymbolTable();
+    freeNames();
+    stats->irgenMs = nowMs() - start;
+    return 0;
+}
+
+// ==================== SOURCE INPUT ====================
 
-int main() {
-    FILE *fptr = fopen("source.c", "r");
+// Read a whole stream (e.g. stdin) into a NUL-terminated buffer
+char* readStream(FILE* fp) {
+    size_t capacity = 4096, length = 0;
+    char* buffer = (char*)malloc(capacity);
+    if (buffer == NULL) return NULL;
+
+    size_t n;
+    while ((n = fread(buffer + length, 1, capacity - length - 1, fp)) > 0) {
+        length += n;
+        if (capacity - length - 1 == 0) {
+            capacity *= 2;
+            char* grown = (char*)realloc(buffer, capacity);
+            if (grown == NULL) {
+                free(buffer);
+                return NULL;
+            }
+            buffer = grown;
+        }
+    }
+    buffer[length] = '\0';
+    return buffer;
+}
+
+char* readSourceFile(const char* filename) {
+    FILE *fptr = fopen(filename, "r");
     if (fptr == NULL){
         printf("Error opening source\n");
-        return 1;
+        return NULL;
     }
 
     fseek(fptr, 0, SEEK_END);
@@ -882,7 +1055,7 @@ int main() {
     if (source == NULL) {
         printf("Memory allocation failed!\n");
         fclose(fptr);
-        return 1;
+        return NULL;
     }
 
     // Read entire file into buffer
@@ -890,6 +1063,80 @@ int main() {
     source[filesize] = '\0';  // Null-terminate the string
 
     fclose(fptr);
+    return source;
+}
+
+// ==================== MAIN ====================
+
+#ifndef NEUROFOLD_LIBRARY
+// Quiet mode: no source echo, token dump or symbol table. Compiles once and
+// prints a single JSON stats record as the last diagnostic line.
+int compileQuiet(const char* source, FILE* out, const char* outputPath, double readMs) {
+    CompileStats stats;
+    double start = nowMs();
+    int status = compileSourceToStream(source, out, &stats);
+    if (fclose(out) != 0 && status == 0) status = 3;
+    double totalMs = readMs + (nowMs() - start);
+
+    if (status != 0) {
+        // Don't leave a partial IR.txt behind for the caller to pick up
+        if (outputPath != NULL) remove(outputPath);
+        const char* error = status == 1 ? "parse" : status == 2 ? "semantic" : "io";
+        printf("{\"stage\":\"compiler\",\"ok\":false,\"error\":\"%s\",\"tokens\":%d,"
+               "\"ms\":{\"read\":%.3f,\"parse\":%.3f,\"semantic\":%.3f,\"total\":%.3f}}\n",
+               error, stats.tokens, readMs, stats.parseMs, stats.semanticMs, totalMs);
+        return 1;
+    }
+
+    printf("{\"stage\":\"compiler\",\"ok\":true,\"tokens\":%d,\"functions\":%d,"
+           "\"temps\":%d,\"labels\":%d,\"symbols\":%d,"
+           "\"ms\":{\"read\":%.3f,\"parse\":%.3f,\"semantic\":%.3f,\"irgen\":%.3f,\"total\":%.3f}}\n",
+           stats.tokens, stats.functions, tempCount, labelCount, stats.symbols,
+           readMs, stats.parseMs, stats.semanticMs, stats.irgenMs, totalMs);
+    return 0;
+}
+
+// Usage:
+//   compiler           reads source.c, writes IR.txt
+//   compiler --stdio   reads source from stdin, writes TAC to stdout
+//                      (diagnostics go to stderr)
+//   compiler --quiet   skip the diagnostic trace; print one JSON stats line
+int main(int argc, char* argv[]) {
+    bool stdioMode = false;
+    bool quietMode = false;
+    for (int i = 1; i < argc; i++) {
+        if (strcmp(argv[i], "--stdio") == 0) stdioMode = true;
+        if (strcmp(argv[i], "--quiet") == 0) quietMode = true;
+    }
+
+    FILE* irOut = NULL;
+    char* source;
+    double readStart = nowMs();
+    if (stdioMode) {
+        // Keep the real stdout for TAC only; every printf below goes to stderr
+        irOut = fdopen(dup(STDOUT_FILENO), "w");
+        dup2(STDERR_FILENO, STDOUT_FILENO);
+        source = readStream(stdin);
+        if (source == NULL || irOut == NULL) {
+            printf("Memory allocation failed!\n");
+            return 1;
+        }
+    } else {
+        source = readSourceFile("source.c");
+        if (source == NULL) return 1;
+    }
+
+    if (quietMode) {
+        double readMs = nowMs() - readStart;
+        FILE* out = stdioMode ? irOut : fopen("IR.txt", "w");
+        if (out == NULL) {
+            printf("{\"stage\":\"compiler\",\"ok\":false,\"error\":\"io\"}\n");
+            return 1;
+        }
+        int status = compileQuiet(source, out, stdioMode ? NULL : "IR.txt", readMs);
+        free(source);
+        return status;
+    }
     
     printf("SOURCE CODE:\n");
     printf("============\n%s\n", source);
@@ -950,7 +1197,7 @@ int main() {
     printf("\n=== PHASE 4: INTERMEDIATE CODE GENERATION ===\n");
     tempCount = 0;
     labelCount = 0;
-    FILE *ofptr = fopen("IR.txt", "w");
+    FILE *ofptr = stdioMode ? irOut : fopen("IR.txt", "w");
     if (ofptr == NULL){
         printf("Error opening file\n");
         return 1;
@@ -966,3 +1213,4 @@ int main() {
     
     return 0;
 }
+#endif
@@ -0,0 +1,111 @@
+// Shared-library build of the compiler and optimizer for in-process use.
+//
+//   gcc -O2 -shared -fPIC -o libneurofold.so neurofold_lib.c -lm
+//
+// Both stages are compiled into one translation unit with their main()
+// functions left out; nf_run() takes source text and hands back TAC,
+// optimized TAC and a small JSON stats record, all as malloc'd strings.
+// The stages keep global tables, so callers must serialize nf_run().
+
+#define NEUROFOLD_LIBRARY
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <stdbool.h>
+#include <setjmp.h>
+#include <stdint.h>
+#include <time.h>
+#include <unistd.h>
+
+// Keep the stages' generic names (match, advance, trim...) private to the
+// library so they can't bind to same-named symbols in the host process.
+#pragma GCC visibility push(hidden)
+#include "compiler.c"
+#include "optimizer.c"
+#pragma GCC visibility pop
+
+// ==================== LIBRARY ENTRY POINTS ====================
+
+enum {
+    NF_OK = 0,
+    NF_PARSE_ERROR = 1,
+    NF_SEMANTIC_ERROR = 2,
+    NF_IO_ERROR = 3
+};
+
+int nf_run(const char* source, char** irOut, char** optimizedOut, char** statsOut) {
+    *irOut = *optimizedOut = *statsOut = NULL;
+
+    // Phase 1-4: source -> TAC
+    char* irBuffer = NULL;
+    size_t irSize = 0;
+    FILE* irStream = open_memstream(&irBuffer, &irSize);
+    if (!irStream) return NF_IO_ERROR;
+
+    CompileStats compileStats;
+    int status = compileSourceToStream(source, irStream, &compileStats);
+    fclose(irStream);
+    if (status != 0) {
+        free(irBuffer);
+        return status == 1 ? NF_PARSE_ERROR : NF_SEMANTIC_ERROR;
+    }
+
+    // Constant folding: TAC -> optimized TAC
+    IRCode irCode;
+    initIRCode(&irCode);
+    initConstantTable();
+    if (irSize > 0) {
+        FILE* irIn = fmemopen(irBuffer, irSize, "r");
+        if (!irIn) {
+            freeIRCode(&irCode);
+            free(irBuffer);
+            return NF_IO_ERROR;
+        }
+        readIRFromStream(irIn, &irCode);
+        fclose(irIn);
+    }
+
+    double foldStart = nowMs();
+    int foldsApplied = optimizeIRCode(&irCode);
+    double foldMs = nowMs() - foldStart;
+    int optimizedCount = 0;
+    for (int i = 0; i < irCode.count; i++) {
+        if (irCode.instructions[i].isOptimized) optimizedCount++;
+    }
+
+    char* optBuffer = NULL;
+    size_t optSize = 0;
+    FILE* optStream = open_memstream(&optBuffer, &optSize);
+    if (!optStream) {
+        freeIRCode(&irCode);
+        free(irBuffer);
+        return NF_IO_ERROR;
+    }
+    writeIRToStream(optStream, &irCode);
+    fclose(optStream);
+
+    char* statsBuffer = NULL;
+    size_t statsSize = 0;
+    FILE* statsStream = open_memstream(&statsBuffer, &statsSize);
+    if (statsStream) {
+        fprintf(statsStream,
+                "{\"tokens\": %d, \"functions\": %d, \"temps\": %d, \"labels\": %d, \"symbols\": %d, "
+                "\"instructions\": %d, \"folds\": %d, \"optimized\": %d, "
+                "\"ms\": {\"parse\": %.3f, \"semantic\": %.3f, \"irgen\": %.3f, \"fold\": %.3f}}",
+                compileStats.tokens, compileStats.functions, tempCount, labelCount, compileStats.symbols,
+                irCode.count, foldsApplied, optimizedCount,
+                compileStats.parseMs, compileStats.semanticMs, compileStats.irgenMs, foldMs);
+        fclose(statsStream);
+    }
+
+    freeIRCode(&irCode);
+    *irOut = irBuffer;
+    *optimizedOut = optBuffer;
+    *statsOut = statsBuffer;
+    return NF_OK;
+}
+
+void nf_free(char* buffer) {
+    free(buffer);
+}
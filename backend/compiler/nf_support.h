@@ -0,0 +1,123 @@
+// Helpers shared by compiler.c and optimizer.c. Header-only, so each tool
+// still builds from its own .c file and neurofold_lib.c can include both.
+
+#ifndef NF_SUPPORT_H
+#define NF_SUPPORT_H
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+// ==================== PHASE TIMING ====================
+
+// Monotonic clock in milliseconds for the per-phase stats
+static inline double nowMs(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
+// ==================== HASHING ====================
+
+// FNV-1a
+static inline size_t hashString(const char* s) {
+    uint64_t hash = 1469598103934665603ULL;
+    while (*s) {
+        hash ^= (unsigned char)*s++;
+        hash *= 1099511628211ULL;
+    }
+    return (size_t)hash;
+}
+
+// For interned strings: equal names share one pointer, so hash the address
+static inline size_t hashPointer(const void* p) {
+    uint64_t x = (uint64_t)(uintptr_t)p;
+    x ^= x >> 33;
+    x *= 0xff51afd7ed558ccdULL;
+    x ^= x >> 33;
+    return (size_t)x;
+}
+
+// ==================== STRING POOL ====================
+
+// Every distinct string is copied once into large chunks and indexed by an
+// open-addressing table, so names compare with == and memory grows with the
+// number of distinct names rather than the number of uses.
+
+typedef struct PoolChunk {
+    struct PoolChunk* next;
+    size_t used;
+    size_t size;
+    char data[];
+} PoolChunk;
+
+typedef struct {
+    PoolChunk* chunks;
+    const char** slots;
+    size_t slotCount;   // power of two
+    size_t used;
+} StringPool;
+
+#define POOL_CHUNK_SIZE (64 * 1024)
+
+static inline char* poolAlloc(StringPool* pool, size_t length) {
+    PoolChunk* chunk = pool->chunks;
+    if (chunk == NULL || chunk->size - chunk->used < length) {
+        size_t size = length > POOL_CHUNK_SIZE ? length : POOL_CHUNK_SIZE;
+        chunk = (PoolChunk*)malloc(sizeof(PoolChunk) + size);
+        chunk->next = pool->chunks;
+        chunk->used = 0;
+        chunk->size = size;
+        pool->chunks = chunk;
+    }
+    char* out = chunk->data + chunk->used;
+    chunk->used += length;
+    return out;
+}
+
+static inline void poolGrow(StringPool* pool) {
+    size_t slotCount = pool->slotCount ? pool->slotCount * 2 : 1024;
+    const char** slots = (const char**)calloc(slotCount, sizeof(const char*));
+    for (size_t i = 0; i < pool->slotCount; i++) {
+        const char* s = pool->slots[i];
+        if (s == NULL) continue;
+        size_t j = hashString(s) & (slotCount - 1);
+        while (slots[j]) j = (j + 1) & (slotCount - 1);
+        slots[j] = s;
+    }
+    free(pool->slots);
+    pool->slots = slots;
+    pool->slotCount = slotCount;
+}
+
+static inline const char* poolIntern(StringPool* pool, const char* s) {
+    if ((pool->used + 1) * 2 > pool->slotCount) poolGrow(pool);
+
+    size_t mask = pool->slotCount - 1;
+    size_t i = hashString(s) & mask;
+    while (pool->slots[i]) {
+        if (strcmp(pool->slots[i], s) == 0) return pool->slots[i];
+        i = (i + 1) & mask;
+    }
+
+    size_t length = strlen(s) + 1;
+    char* copy = poolAlloc(pool, length);
+    memcpy(copy, s, length);
+    pool->slots[i] = copy;
+    pool->used++;
+    return copy;
+}
+
+static inline void poolFree(StringPool* pool) {
+    PoolChunk* chunk = pool->chunks;
+    while (chunk) {
+        PoolChunk* next = chunk->next;
+        free(chunk);
+        chunk = next;
+    }
+    free(pool->slots);
+    memset(pool, 0, sizeof(*pool));
+}
+
+#endif
@@ -3,6 +3,10 @@
 #include <string.h>
 #include <ctype.h>
 #include <stdbool.h>
+#include <time.h>
+#include <unistd.h>
+
+#include "nf_support.h"
 
 // ==================== IR INSTRUCTION TYPES ====================
 
@@ -33,15 +37,17 @@ typedef enum {
     IR_UNKNOWN
 } IROpcode;
 
+// Operands point into the interned operand pool ("" when absent), which
+// keeps each instruction small however long the names get
 typedef struct {
     IROpcode opcode;
-    char result[64];
-    char arg1[64];
-    char arg2[64];
-    char label[64];
-    char originalLine[256];
-    bool isConstant;
+    const char* result;
+    const char* arg1;
+    const char* arg2;
+    const char* label;
+    const char* originalLine;   // only kept for lines printed verbatim
     int constantValue;
+    bool isConstant;
     bool isOptimized;
 } IRInstruction;
 
@@ -51,55 +57,108 @@ typedef struct {
     int capacity;
 } IRCode;
 
+// ==================== OPERAND STRINGS ====================
+
+StringPool irStrings;
+
+const char* internOperand(const char* operand) {
+    return poolIntern(&irStrings, operand);
+}
+
+const char* internNumber(int value) {
+    char text[16];
+    sprintf(text, "%d", value);
+    return internOperand(text);
+}
+
 // ==================== CONSTANT TABLE ====================
 
+// Open-addressing map keyed by interned variable names. Entries are only
+// ever marked non-constant, never deleted, and the per-function reset
+// clears just the slots that were used.
 typedef struct {
-    char var[64];
+    const char* var;
     int value;
     bool isConstant;
 } ConstantEntry;
 
 typedef struct {
-    ConstantEntry entries[512];
+    ConstantEntry* entries;
+    int* usedSlots;
+    int capacity;       // power of two
     int count;
 } ConstantTable;
 
 ConstantTable constTable;
 
 void initConstantTable() {
+    for (int i = 0; i < constTable.count; i++) {
+        constTable.entries[constTable.usedSlots[i]].var = NULL;
+    }
     constTable.count = 0;
 }
 
+void freeConstantTable() {
+    free(constTable.entries);
+    free(constTable.usedSlots);
+    memset(&constTable, 0, sizeof(constTable));
+}
+
+// Slot holding `var`, or the empty slot where it would go
+ConstantEntry* findConstantSlot(const char* var) {
+    int mask = constTable.capacity - 1;
+    int i = hashPointer(var) & mask;
+    while (constTable.entries[i].var != NULL && constTable.entries[i].var != var) {
+        i = (i + 1) & mask;
+    }
+    return &constTable.entries[i];
+}
+
+void growConstantTable() {
+    ConstantEntry* oldEntries = constTable.entries;
+    int* oldSlots = constTable.usedSlots;
+    int oldCount = constTable.count;
+
+    constTable.capacity = constTable.capacity ? constTable.capacity * 2 : 256;
+    constTable.entries = (ConstantEntry*)calloc(constTable.capacity, sizeof(ConstantEntry));
+    constTable.usedSlots = (int*)malloc(sizeof(int) * (constTable.capacity / 2));
+    constTable.count = 0;
+
+    for (int i = 0; i < oldCount; i++) {
+        ConstantEntry* old = &oldEntries[oldSlots[i]];
+        ConstantEntry* entry = findConstantSlot(old->var);
+        *entry = *old;
+        constTable.usedSlots[constTable.count++] = entry - constTable.entries;
+    }
+    free(oldEntries);
+    free(oldSlots);
+}
+
 void addConstant(const char* var, int value) {
-    for (int i = 0; i < constTable.count; i++) {
-        if (strcmp(constTable.entries[i].var, var) == 0) {
-            constTable.entries[i].value = value;
-            constTable.entries[i].isConstant = true;
-            return;
-        }
+    if ((constTable.count + 1) * 2 > constTable.capacity) growConstantTable();
+    ConstantEntry* entry = findConstantSlot(var);
+    if (entry->var == NULL) {
+        entry->var = var;
+        constTable.usedSlots[constTable.count++] = entry - constTable.entries;
     }
-    strcpy(constTable.entries[constTable.count].var, var);
-    constTable.entries[constTable.count].value = value;
-    constTable.entries[constTable.count].isConstant = true;
-    constTable.count++;
+    entry->value = value;
+    entry->isConstant = true;
 }
 
 void removeConstant(const char* var) {
-    for (int i = 0; i < constTable.count; i++) {
-        if (strcmp(constTable.entries[i].var, var) == 0) {
-            constTable.entries[i].isConstant = false;
-            return;
-        }
+    if (constTable.capacity == 0) return;
+    ConstantEntry* entry = findConstantSlot(var);
+    if (entry->var != NULL) {
+        entry->isConstant = false;
     }
 }
 
 bool getConstant(const char* var, int* value) {
-    for (int i = 0; i < constTable.count; i++) {
-        if (strcmp(constTable.entries[i].var, var) == 0 && 
-            constTable.entries[i].isConstant) {
-            *value = constTable.entries[i].value;
-            return true;
-        }
+    if (constTable.capacity == 0) return false;
+    ConstantEntry* entry = findConstantSlot(var);
+    if (entry->var != NULL && entry->isConstant) {
+        *value = entry->value;
+        return true;
     }
     return false;
 }
@@ -136,6 +195,22 @@ void addInstruction(IRCode* ir, IRInstruction instr) {
     ir->instructions[ir->count++] = instr;
 }
 
+// Scratch space for parseIRLine, grown to fit the longest line seen
+char* lineScratch = NULL;
+size_t lineScratchSize = 0;
+
+// Release the instructions and everything they point into
+void freeIRCode(IRCode* ir) {
+    free(ir->instructions);
+    ir->instructions = NULL;
+    ir->count = ir->capacity = 0;
+    poolFree(&irStrings);
+    freeConstantTable();
+    free(lineScratch);
+    lineScratch = NULL;
+    lineScratchSize = 0;
+}
+
 // ==================== STRING UTILITIES ====================
 
 char* trim(char* str) {
@@ -149,76 +224,96 @@ char* trim(char* str) {
 
 // ==================== IR PARSER ====================
 
+// sscanf one field out of `input` and intern it ("" when nothing matched)
+const char* scanOperand(const char* input, const char* format, char* scratch) {
+    scratch[0] = '\0';
+    sscanf(input, format, scratch);
+    return internOperand(scratch);
+}
+
 IRInstruction parseIRLine(const char* line) {
     IRInstruction instr;
     memset(&instr, 0, sizeof(IRInstruction));
+    instr.result = instr.arg1 = instr.arg2 = instr.label = instr.originalLine = "";
     instr.isConstant = false;
     instr.isOptimized = false;
-    strcpy(instr.originalLine, line);
     
-    char buffer[256];
-    strcpy(buffer, line);
+    // A copy of the line to cut up plus two field buffers, each as long as
+    // the line so no sscanf field can overflow
+    size_t length = strlen(line) + 1;
+    if (lineScratchSize < length * 3) {
+        lineScratchSize = length * 3;
+        lineScratch = (char*)realloc(lineScratch, lineScratchSize);
+    }
+    char* buffer = lineScratch;
+    char* field = lineScratch + length;
+    char* field2 = lineScratch + 2 * length;
+    memcpy(buffer, line, length);
     char* ptr = trim(buffer);
     
     // Empty line or comment
     if (strlen(ptr) == 0) {
         instr.opcode = IR_COMMENT;
+        instr.originalLine = internOperand(line);
         return instr;
     }
     
     // Check for label (ends with :)
     if (strchr(ptr, ':') && ptr[strlen(ptr) - 1] == ':') {
         instr.opcode = IR_LABEL;
-        sscanf(ptr, "%[^:]", instr.label);
+        instr.label = scanOperand(ptr, "%[^:]", field);
         return instr;
     }
     
     // Check for FUNCTION
     if (strncmp(ptr, "FUNCTION", 8) == 0) {
         instr.opcode = IR_FUNCTION;
-        sscanf(ptr, "FUNCTION %[^:]", instr.label);
+        instr.label = scanOperand(ptr, "FUNCTION %[^:]", field);
         return instr;
     }
     
     // Check for END FUNCTION
     if (strncmp(ptr, "END FUNCTION", 12) == 0) {
         instr.opcode = IR_END_FUNCTION;
-        sscanf(ptr + 13, "%s", instr.label);
+        instr.label = scanOperand(ptr + 12, "%s", field);
         return instr;
     }
     
     // Check for DECLARE
     if (strncmp(ptr, "DECLARE", 7) == 0) {
         instr.opcode = IR_DECLARE;
-        sscanf(ptr, "DECLARE %s", instr.result);
+        instr.result = scanOperand(ptr, "DECLARE %s", field);
         return instr;
     }
     
     // Check for PARAM (both styles)
     if (strncmp(ptr, "PARAM", 5) == 0) {
         instr.opcode = IR_PARAM;
-        sscanf(ptr, "PARAM %s", instr.arg1);
+        instr.arg1 = scanOperand(ptr, "PARAM %s", field);
         return instr;
     }
     
     // Check for PUSH_PARAM
     if (strncmp(ptr, "PUSH_PARAM", 10) == 0) {
         instr.opcode = IR_PARAM;
-        sscanf(ptr, "PUSH_PARAM %s", instr.arg1);
+        instr.arg1 = scanOperand(ptr, "PUSH_PARAM %s", field);
         return instr;
     }
     
     // Check for GOTO
     if (strncmp(ptr, "GOTO", 4) == 0) {
         instr.opcode = IR_GOTO;
-        sscanf(ptr, "GOTO %s", instr.label);
+        instr.label = scanOperand(ptr, "GOTO %s", field);
         return instr;
     }
     
     // Check for IF_FALSE
     if (strncmp(ptr, "IF_FALSE", 8) == 0) {
         instr.opcode = IR_IF_FALSE;
-        sscanf(ptr, "IF_FALSE %s GOTO %s", instr.arg1, instr.label);
+        field[0] = field2[0] = '\0';
+        sscanf(ptr, "IF_FALSE %s GOTO %s", field, field2);
+        instr.arg1 = internOperand(field);
+        instr.label = internOperand(field2);
         return instr;
     }
     
@@ -227,7 +322,7 @@ IRInstruction parseIRLine(const char* line) {
         instr.opcode = IR_RETURN;
         char* retVal = strchr(ptr, ' ');
         if (retVal) {
-            sscanf(retVal, "%s", instr.arg1);
+            instr.arg1 = scanOperand(retVal, "%s", field);
         }
         return instr;
     }
@@ -238,8 +333,8 @@ IRInstruction parseIRLine(const char* line) {
         char* equalSign = strchr(ptr, '=');
         if (equalSign) {
             *equalSign = '\0';
-            sscanf(ptr, "%s", instr.result);
-            sscanf(equalSign + 1, "CALL %[^,]", instr.arg1);
+            instr.result = scanOperand(ptr, "%s", field);
+            instr.arg1 = scanOperand(equalSign + 1, "CALL %[^,]", field);
         }
         return instr;
     }
@@ -248,14 +343,14 @@ IRInstruction parseIRLine(const char* line) {
     char* equals = strchr(ptr, '=');
     if (equals) {
         *equals = '\0';
-        sscanf(ptr, "%s", instr.result);
+        instr.result = scanOperand(ptr, "%s", field);
         ptr = equals + 1;
         ptr = trim(ptr);
         
         // Check for unary minus
         if (*ptr == '-' && !strchr(ptr + 1, ' ')) {
             instr.opcode = IR_UMINUS;
-            sscanf(ptr + 1, "%s", instr.arg1);
+            instr.arg1 = scanOperand(ptr + 1, "%s", field);
             return instr;
         }
         
@@ -290,20 +385,21 @@ IRInstruction parseIRLine(const char* line) {
         if (op && opcode != IR_UNKNOWN) {
             instr.opcode = opcode;
             *op = '\0';
-            sscanf(trim(ptr), "%s", instr.arg1);
+            instr.arg1 = scanOperand(trim(ptr), "%s", field);
             // Skip the operator (might be 2 chars like <=)
             char* arg2Start = op + 1;
             if (*arg2Start == '=' || *arg2Start == '<' || *arg2Start == '>') {
                 arg2Start++;
             }
-            sscanf(trim(arg2Start), "%s", instr.arg2);
+            instr.arg2 = scanOperand(trim(arg2Start), "%s", field);
         } else {
             // Simple assignment
             instr.opcode = IR_ASSIGN;
-            sscanf(ptr, "%s", instr.arg1);
+            instr.arg1 = scanOperand(ptr, "%s", field);
         }
     } else {
         instr.opcode = IR_UNKNOWN;
+        instr.originalLine = internOperand(line);
     }
     
     return instr;
@@ -326,7 +422,7 @@ bool performConstantFolding(IRInstruction* instr) {
             } else if (getConstant(instr->arg1, &val1)) {
                 instr->isConstant = true;
                 instr->constantValue = val1;
-                sprintf(instr->arg1, "%d", val1);
+                instr->arg1 = internNumber(val1);
                 addConstant(instr->result, val1);
                 instr->isOptimized = true;
                 return true;
@@ -388,8 +484,8 @@ bool performConstantFolding(IRInstruction* instr) {
                 
                 // Replace with constant assignment
                 instr->opcode = IR_ASSIGN;
-                sprintf(instr->arg1, "%d", result);
-                instr->arg2[0] = '\0';
+                instr->arg1 = internNumber(result);
+                instr->arg2 = "";
                 instr->isConstant = true;
                 instr->constantValue = result;
                 instr->isOptimized = true;
@@ -399,11 +495,11 @@ bool performConstantFolding(IRInstruction* instr) {
                 // Propagate constants in operands
                 bool changed = false;
                 if (isConst1 && !isNumber(instr->arg1)) {
-                    sprintf(instr->arg1, "%d", val1);
+                    instr->arg1 = internNumber(val1);
                     changed = true;
                 }
                 if (isConst2 && !isNumber(instr->arg2)) {
-                    sprintf(instr->arg2, "%d", val2);
+                    instr->arg2 = internNumber(val2);
                     changed = true;
                 }
                 removeConstant(instr->result);
@@ -416,7 +512,7 @@ bool performConstantFolding(IRInstruction* instr) {
                 val1 = toNumber(instr->arg1);
                 result = -val1;
                 instr->opcode = IR_ASSIGN;
-                sprintf(instr->arg1, "%d", result);
+                instr->arg1 = internNumber(result);
                 instr->isConstant = true;
                 instr->constantValue = result;
                 instr->isOptimized = true;
@@ -425,7 +521,7 @@ bool performConstantFolding(IRInstruction* instr) {
             } else if (getConstant(instr->arg1, &val1)) {
                 result = -val1;
                 instr->opcode = IR_ASSIGN;
-                sprintf(instr->arg1, "%d", result);
+                instr->arg1 = internNumber(result);
                 instr->isConstant = true;
                 instr->constantValue = result;
                 instr->isOptimized = true;
@@ -444,7 +540,7 @@ bool performConstantFolding(IRInstruction* instr) {
         case IR_PARAM:
             // Propagate constant parameters
             if (getConstant(instr->arg1, &val1)) {
-                sprintf(instr->arg1, "%d", val1);
+                instr->arg1 = internNumber(val1);
                 return true;
             }
             break;
@@ -452,15 +548,15 @@ bool performConstantFolding(IRInstruction* instr) {
         case IR_IF_FALSE:
             // Propagate constant in condition
             if (getConstant(instr->arg1, &val1)) {
-                sprintf(instr->arg1, "%d", val1);
+                instr->arg1 = internNumber(val1);
                 return true;
             }
             break;
             
         case IR_RETURN:
             // Propagate constant in return value
-            if (strlen(instr->arg1) > 0 && getConstant(instr->arg1, &val1)) {
-                sprintf(instr->arg1, "%d", val1);
+            if (instr->arg1[0] != '\0' && getConstant(instr->arg1, &val1)) {
+                instr->arg1 = internNumber(val1);
                 return true;
             }
             break;
@@ -472,7 +568,7 @@ bool performConstantFolding(IRInstruction* instr) {
     return false;
 }
 
-void optimizeIRCode(IRCode* ir) {
+int optimizeIRCode(IRCode* ir) {
     int optimizationsMade = 0;
     
     for (int i = 0; i < ir->count; i++) {
@@ -486,7 +582,7 @@ void optimizeIRCode(IRCode* ir) {
         }
     }
     
-    printf("Total constant folding optimizations: %d\n", optimizationsMade);
+    return optimizationsMade;
 }
 
 // ==================== IR PRINTER ====================
@@ -570,7 +666,7 @@ void printIRInstruction(FILE* fp, IRInstruction* instr) {
             break;
             
         case IR_RETURN:
-            if (strlen(instr->arg1) > 0) {
+            if (instr->arg1[0] != '\0') {
                 fprintf(fp, "  RETURN %s\n", instr->arg1);
             } else {
                 fprintf(fp, "  RETURN\n");
@@ -582,7 +678,7 @@ void printIRInstruction(FILE* fp, IRInstruction* instr) {
             break;
             
         case IR_END_FUNCTION:
-            if (strlen(instr->label) > 0) {
+            if (instr->label[0] != '\0') {
                 fprintf(fp, "END FUNCTION %s\n\n", instr->label);
             } else {
                 fprintf(fp, "END FUNCTION\n\n");
@@ -605,22 +701,33 @@ void printIRInstruction(FILE* fp, IRInstruction* instr) {
 
 // ==================== FILE I/O ====================
 
-bool readIRFromFile(const char* filename, IRCode* ir) {
-    FILE* fp = fopen(filename, "r");
-    if (!fp) {
-        printf("Error: Cannot open input file '%s'\n", filename);
-        return false;
-    }
-    
-    char line[256];
-    while (fgets(line, sizeof(line), fp)) {
+void readIRFromStream(FILE* fp, IRCode* ir) {
+    char* line = NULL;
+    size_t size = 0;
+    while (getline(&line, &size, fp) != -1) {
         // Remove newline
         line[strcspn(line, "\n")] = 0;
         
         IRInstruction instr = parseIRLine(line);
         addInstruction(ir, instr);
     }
+    free(line);
+}
+
+void writeIRToStream(FILE* fp, IRCode* ir) {
+    for (int i = 0; i < ir->count; i++) {
+        printIRInstruction(fp, &ir->instructions[i]);
+    }
+}
+
+bool readIRFromFile(const char* filename, IRCode* ir) {
+    FILE* fp = fopen(filename, "r");
+    if (!fp) {
+        printf("Error: Cannot open input file '%s'\n", filename);
+        return false;
+    }
     
+    readIRFromStream(fp, ir);
     fclose(fp);
     return true;
 }
@@ -632,17 +739,82 @@ bool writeIRToFile(const char* filename, IRCode* ir) {
         return false;
     }
         
-    for (int i = 0; i < ir->count; i++) {
-        printIRInstruction(fp, &ir->instructions[i]);
-    }
-    
+    writeIRToStream(fp, ir);
     fclose(fp);
     return true;
 }
 
 // ==================== MAIN ====================
 
-int main() {
+#ifndef NEUROFOLD_LIBRARY
+// Quiet mode: no banners or summary, one JSON stats record as the last
+// diagnostic line instead.
+int optimizeQuiet(bool stdioMode, FILE* tacOut) {
+    IRCode irCode;
+    initIRCode(&irCode);
+    initConstantTable();
+
+    double start = nowMs();
+    if (stdioMode) {
+        readIRFromStream(stdin, &irCode);
+    } else if (!readIRFromFile("IR.txt", &irCode)) {
+        freeIRCode(&irCode);
+        printf("{\"stage\":\"optimizer\",\"ok\":false,\"error\":\"io\"}\n");
+        return 1;
+    }
+    double readMs = nowMs() - start;
+
+    start = nowMs();
+    int folds = optimizeIRCode(&irCode);
+    double foldMs = nowMs() - start;
+
+    start = nowMs();
+    bool written;
+    if (stdioMode) {
+        writeIRToStream(tacOut, &irCode);
+        written = fclose(tacOut) == 0;
+    } else {
+        written = writeIRToFile("Output.txt", &irCode);
+    }
+    double writeMs = nowMs() - start;
+
+    int optimized = 0;
+    for (int i = 0; i < irCode.count; i++) {
+        if (irCode.instructions[i].isOptimized) optimized++;
+    }
+
+    printf("{\"stage\":\"optimizer\",\"ok\":%s,%s\"instructions\":%d,\"folds\":%d,\"optimized\":%d,"
+           "\"ms\":{\"read\":%.3f,\"fold\":%.3f,\"write\":%.3f,\"total\":%.3f}}\n",
+           written ? "true" : "false", written ? "" : "\"error\":\"io\",",
+           irCode.count, folds, optimized, readMs, foldMs, writeMs, readMs + foldMs + writeMs);
+
+    freeIRCode(&irCode);
+    return written ? 0 : 1;
+}
+
+// Usage:
+//   optimizer           reads IR.txt, writes Output.txt
+//   optimizer --stdio   reads TAC from stdin, writes optimized TAC to stdout
+//                       (diagnostics go to stderr)
+//   optimizer --quiet   skip the banners and summary; print one JSON stats line
+int main(int argc, char* argv[]) {
+    bool stdioMode = false;
+    bool quietMode = false;
+    for (int i = 1; i < argc; i++) {
+        if (strcmp(argv[i], "--stdio") == 0) stdioMode = true;
+        if (strcmp(argv[i], "--quiet") == 0) quietMode = true;
+    }
+
+    FILE* tacOut = NULL;
+    if (stdioMode) {
+        // Keep the real stdout for TAC only; every printf below goes to stderr
+        tacOut = fdopen(dup(STDOUT_FILENO), "w");
+        dup2(STDERR_FILENO, STDOUT_FILENO);
+        if (tacOut == NULL) return 1;
+    }
+
+    if (quietMode) return optimizeQuiet(stdioMode, tacOut);
+
     printf("=======================================================\n");
     printf("  Constant Folding Optimizer for Three-Address Code\n");
     printf("=======================================================\n\n");
@@ -650,8 +822,8 @@ int main() {
     const char* inputFile;
     const char* outputFile;
     
-    inputFile = "IR.txt";
-    outputFile = "Output.txt";
+    inputFile = stdioMode ? "<stdin>" : "IR.txt";
+    outputFile = stdioMode ? "<stdout>" : "Output.txt";
     
     printf("Input file:  %s\n", inputFile);
     printf("Output file: %s\n\n", outputFile);
@@ -663,7 +835,9 @@ int main() {
     
     // Read IR from file
     printf("Reading IR code from file...\n");
-    if (!readIRFromFile(inputFile, &irCode)) {
+    if (stdioMode) {
+        readIRFromStream(stdin, &irCode);
+    } else if (!readIRFromFile(inputFile, &irCode)) {
         return 1;
     }
     printf("Successfully read %d instructions\n\n", irCode.count);
@@ -671,13 +845,19 @@ int main() {
     // Perform constant folding optimization
     printf("Performing constant folding optimization...\n");
     initConstantTable();
-    optimizeIRCode(&irCode);
+    printf("Total constant folding optimizations: %d\n", optimizeIRCode(&irCode));
     printf("\n");
     
     // Write optimized IR to file
     printf("Writing optimized IR code to file...\n");
-    if (!writeIRToFile(outputFile, &irCode)) {
-        free(irCode.instructions);
+    if (stdioMode) {
+        writeIRToStream(tacOut, &irCode);
+        if (fclose(tacOut) != 0) {
+            freeIRCode(&irCode);
+            return 1;
+        }
+    } else if (!writeIRToFile(outputFile, &irCode)) {
+        freeIRCode(&irCode);
         return 1;
     }
     printf("Successfully wrote optimized code to '%s'\n\n", outputFile);
@@ -698,6 +878,7 @@ int main() {
     
     printf("Optimization completed successfully!\n");
     
-    free(irCode.instructions);
+    freeIRCode(&irCode);
     return 0;
-}
\ No newline at end of file
+}
+#endif
@@ -1,4 +1,7 @@
 timeout = 120  
 workers = 2
-worker_class = 'sync'
-keepalive = 5
\ No newline at end of file
+# Pipeline runs use isolated workspaces (llm/workspace.py), so each worker
+# can serve several requests at once; PIPELINE_MAX_INFLIGHT caps the runs.
+worker_class = 'gthread'
+threads = 4
+keepalive = 5
@@ -1,392 +1,1247 @@
-import os
-import subprocess
-import requests
-import json
-import time
-import re
-from dotenv import load_dotenv
-
-# ============================================================
-# CONFIGURATION
-# ============================================================
-def LLM():
-    load_dotenv()
-
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    GEMINI_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-
-    # Use project directory instead of /tmp
-    # Get backend directory (parent of llm directory)
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    COMPILER_DIR = os.path.join(BASE_DIR, "compiler")
-    
-    print(f"📂 Base directory: {BASE_DIR}")
-    print(f"📂 Compiler directory: {COMPILER_DIR}")
-    
-    # Ensure compiler directory exists
-    os.makedirs(COMPILER_DIR, exist_ok=True)
-
-    COMPILER_EXECUTABLE_NAME = "compiler"
-    OPTIMIZER_EXECUTABLE_NAME = "optimizer"
-
-    COMPILER_EXECUTABLE = os.path.join(COMPILER_DIR, COMPILER_EXECUTABLE_NAME)
-    OPTIMIZER_EXECUTABLE = os.path.join(COMPILER_DIR, OPTIMIZER_EXECUTABLE_NAME)
-
-    IR_FILE = os.path.join(COMPILER_DIR, "IR.txt")
-    OUTPUT_FILE = os.path.join(COMPILER_DIR, "Output.txt")
-    SOURCE_FILE = os.path.join(COMPILER_DIR, "source.c")
-
-    # Create llm directory for reports if it doesn't exist
-    LLM_REPORTS_DIR = os.path.join(BASE_DIR, "llm")
-    os.makedirs(LLM_REPORTS_DIR, exist_ok=True)
-    
-    REPORT_TEXT = os.path.join(LLM_REPORTS_DIR, "Gemini_Report.txt")
-    REPORT_JSON = os.path.join(LLM_REPORTS_DIR, "Gemini_Review.json")
-
-    # ============================================================
-    # CHECK IF EXECUTABLES EXIST
-    # ============================================================
-    print(f"🔍 Checking for compiler at: {COMPILER_EXECUTABLE}")
-    print(f"   Exists: {os.path.exists(COMPILER_EXECUTABLE)}")
-    
-    print(f"🔍 Checking for optimizer at: {OPTIMIZER_EXECUTABLE}")
-    print(f"   Exists: {os.path.exists(OPTIMIZER_EXECUTABLE)}")
-    
-    # Make executables executable (in case permissions were lost)
-    for exe_path in [COMPILER_EXECUTABLE, OPTIMIZER_EXECUTABLE]:
-        if os.path.exists(exe_path):
-            try:
-                os.chmod(exe_path, 0o755)
-                print(f"✅ Set executable permissions for {exe_path}")
-            except Exception as e:
-                print(f"⚠️ Could not set permissions for {exe_path}: {e}")
-
-    # ============================================================
-    # RUN COMPILER EXECUTABLE TO GENERATE OUTPUT FILE
-    # ============================================================
-
-    def run_c_compiler():
-        print("⚙️ Running C compiler to generate IR.txt...\n")
-
-        if not os.path.exists(COMPILER_EXECUTABLE):
-            print(f"❌ Compiler executable not found: {COMPILER_EXECUTABLE}")
-            return False
-
-        if not os.path.exists(SOURCE_FILE):
-            print(f"❌ Source file not found: {SOURCE_FILE}")
-            return False
-
-        try:
-            # Run compiler
-            compiled = subprocess.run(
-                [COMPILER_EXECUTABLE],
-                cwd=COMPILER_DIR,
-                capture_output=True,
-                text=True,
-                timeout=45
-            )
-
-            print("🔧 Compiler stdout:\n", compiled.stdout)
-            print("⚠️ Compiler stderr:\n", compiled.stderr)
-            print(f"🔧 Compiler return code: {compiled.returncode}")
-
-            # Wait for IR.txt to appear
-            for i in range(10):
-                if os.path.exists(IR_FILE):
-                    print("✅ IR.txt found!")
-                    return True
-                print(f"⏳ Waiting for IR.txt... ({i+1}/10)")
-                time.sleep(1)
-
-            print("❌ IR.txt not found after running compiler.")
-            return False
-
-        except subprocess.TimeoutExpired:
-            print("❌ Compiler process timed out.")
-            return False
-        except Exception as e:
-            print(f"❌ Error running compiler: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
-   
-    def run_c_optimizer():
-        """Run the optimizer and wait for Output.txt to appear."""
-        print("⚙️ Running C optimizer to generate Output.txt...\n")
-
-        if not os.path.exists(OPTIMIZER_EXECUTABLE):
-            print(f"❌ Optimizer executable not found: {OPTIMIZER_EXECUTABLE}")
-            return False
-
-        if not os.path.exists(IR_FILE):
-            print(f"❌ IR.txt not found: {IR_FILE}")
-            return False
-
-        try:
-            result = subprocess.run(
-                [OPTIMIZER_EXECUTABLE],
-                cwd=COMPILER_DIR,
-                capture_output=True,
-                text=True,
-                timeout=45
-            )
-
-            print("🔧 Optimizer stdout:\n", result.stdout)
-            print("⚠️ Optimizer stderr:\n", result.stderr)
-            print(f"🔧 Optimizer return code: {result.returncode}")
-
-            # Wait for Output.txt to appear
-            for i in range(10):
-                if os.path.exists(OUTPUT_FILE):
-                    print("✅ Output.txt found!")
-                    return True
-                print(f"⏳ Waiting for Output.txt... ({i+1}/10)")
-                time.sleep(1)
-
-            print("❌ Output.txt not found after running optimizer.")
-            return False
-
-        except subprocess.TimeoutExpired:
-            print("❌ Optimizer process timed out.")
-            return False
-        except Exception as e:
-            print(f"❌ Error running optimizer: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
-    # ============================================================
-    # GEMINI API CALL (FIXED WITH TIMEOUT & ERROR HANDLING)
-    # ============================================================
-
-    def call_gemini_api(prompt, retries=3, initial_delay=5):
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": GEMINI_API_KEY
-        }
-
-        body = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "maxOutputTokens": 6000,
-                "temperature": 0.3
-            }
-        }
-
-        delay = initial_delay
-        
-        for attempt in range(1, retries + 1):
-            print(f"🌐 Calling Gemini API (attempt {attempt}/{retries})...")
-            
-            try:
-                response = requests.post(
-                    GEMINI_ENDPOINT,
-                    headers=headers,
-                    json=body,
-                    timeout=60  # 60 second timeout for API call
-                )
-
-                if response.status_code == 200:
-                    print("✅ Gemini API responded successfully")
-                    data = response.json()
-                    
-                    try:
-                        candidates = data.get("candidates", [])
-                        if not candidates:
-                            return "⚠️ No response candidates found.", data
-
-                        content = candidates[0].get("content", {})
-                        parts = content.get("parts", [])
-                        all_text = [p["text"] for p in parts if "text" in p]
-
-                        if not all_text and "output_text" in candidates[0]:
-                            all_text.append(candidates[0]["output_text"])
-
-                        final_text = "\n".join(all_text) if all_text else "⚠️ Gemini returned no readable text."
-                        return final_text, data
-
-                    except Exception as e:
-                        print(f"⚠️ Error parsing Gemini response: {e}")
-                        return f"⚠️ Parsing error: {e}\nRaw data:\n{json.dumps(data, indent=2)}", data
-
-                elif response.status_code in (429, 503):
-                    print(f"⚠️ Gemini busy (status {response.status_code}). Retrying in {delay}s... ({attempt}/{retries})")
-                    if attempt < retries:
-                        time.sleep(delay)
-                        delay *= 2  # Exponential backoff
-                    continue
-                    
-                elif response.status_code == 400:
-                    print(f"❌ Bad request to Gemini API: {response.text}")
-                    return f"⚠️ Invalid request to Gemini: {response.text}", {}
-                    
-                else:
-                    print(f"❌ Gemini API Error {response.status_code}: {response.text}")
-                    if attempt < retries:
-                        time.sleep(delay)
-                        continue
-                    return f"⚠️ Gemini API Error {response.status_code}", {}
-
-            except requests.exceptions.Timeout:
-                print(f"⏱️ Request timed out (attempt {attempt}/{retries})")
-                if attempt < retries:
-                    time.sleep(delay)
-                    continue
-                return "⚠️ Gemini API timed out after multiple attempts", {}
-                
-            except requests.exceptions.ConnectionError as e:
-                print(f"🔌 Connection error (attempt {attempt}/{retries}): {e}")
-                if attempt < retries:
-                    time.sleep(delay)
-                    continue
-                return "⚠️ Could not connect to Gemini API", {}
-                
-            except Exception as e:
-                print(f"❌ Unexpected error calling Gemini: {e}")
-                if attempt < retries:
-                    time.sleep(delay)
-                    continue
-                return f"⚠️ Unexpected error: {str(e)}", {}
-
-        return "⚠️ Gemini API unavailable after multiple retries", {}
-    # ============================================================
-    # PARSING HELPERS
-    # ============================================================
-
-    def extract_summary(review_text):
-        lines = review_text.strip().splitlines()
-        summary_line = ""
-        for line in reversed(lines):
-            if "✅" in line or "⚠️" in line:
-                summary_line = line.strip()
-                break
-
-        if "✅" in summary_line:
-            status = "Optimization Correct"
-        elif "⚠️" in summary_line:
-            status = "Issues Found"
-        else:
-            status = "Unclear"
-
-        return {"summary": summary_line, "status": status}
-
-    import re
-
-    def extract_suggestions(review_text):
-        # Find all text enclosed between $$ ... $$ after $Suggestions:
-        match = re.search(r"\$Suggestions:\$[\s\\n]*", review_text)
-        if match:
-            # Extract all $$ ... $$ blocks
-            suggestions = re.findall(r"\$(.*?)\$", review_text, re.DOTALL)
-            # Clean up each suggestion (remove whitespace and bullets)
-            suggestions = [
-                re.sub(r"^\s*[-*•]?\s*", "", s.strip())
-                for s in suggestions if s.strip()
-            ]
-            return suggestions[1:len(suggestions) - 1]
-        return []
-
-
-
-    def extract_tac_code(review_text):
-    # Find the $Optimization:$ header and capture everything after it
-        match = re.search(
-            r"\$Optimization:\$\s*\n(.*)",
-            review_text,
-            re.IGNORECASE | re.DOTALL
-        )
-
-        if match:
-            tac_code = match.group(1).strip()
-            # Remove any extra markdown or formatting artifacts
-            tac_code = re.sub(r"```[a-zA-Z]*|```", "", tac_code).strip()
-            return tac_code
-        return None
-
-
-    # ============================================================
-    # GEMINI REVIEW FUNCTION (WITH FALLBACK)
-    # ============================================================
-
-    def review_output_file():
-        if not os.path.exists(OUTPUT_FILE):
-            print("❌ Output.txt not found! Run your optimizer first.")
-            return {"success": False, "message": "Output.txt not found"}
-
-        with open(OUTPUT_FILE, "r") as f:
-            optimized_code = f.read()
-
-        prompt = f"""
-    You are an expert compiler engineer reviewing optimized three-address code (TAC).
-
-    Analyze the code below and respond briefly:
-    1. Verify if semantics are preserved (no logic change).
-    2. Mention unsafe optimizations, if any.
-    3. Suggest at most 3 further optimizations (clear, one-liners).
-    4. Use short bullet points only — no long explanations.
-    5. End with one summary line:
-    → "✅ Optimization Correct" or "⚠️ Issues Found: <reason>"
-
-    --- Optimized TAC ---
-    {optimized_code}
-
-    Format your output as:
-    - ✅/⚠️ statements
-    - 2–4 bullet points only
-    Keep the total output under 6 lines (suitable for frontend card view).
-    Dont use any emojis.
-    Give suggestions with the heading "$Suggestions:$" and enclose each suggestions like "$...$" compulsorily.
-    Also compulsorily generate your version of the optimized three address code with the heading: "$Optimization:$" in the end of the summary.
-    All the optimized code must be in newlines. 
-    """
-
-        print("🤖 Sending optimized TAC to Gemini...\n")
-        
-        try:
-            review_text, raw_json = call_gemini_api(prompt)
-
-            print("\n=== Gemini Review ===\n")
-            print(review_text)
-
-            summary_info = extract_summary(review_text)
-            suggestions = extract_suggestions(review_text)
-            optimized_tac = extract_tac_code(review_text)
-            
-            # Save plain text
-            with open(REPORT_TEXT, "w", encoding="utf-8") as f:
-                f.write(review_text)
-
-            # Save structured JSON
-            structured_output = {
-                "summary": summary_info["summary"],
-                "status": summary_info["status"],
-                "suggestions": suggestions,
-                "full_text": review_text,
-                "optimized_code": optimized_tac,
-                "unoptimized_code": optimized_code
-            }
-
-            with open(REPORT_JSON, "w", encoding="utf-8") as f:
-                json.dump(structured_output, f, indent=2)
-
-            print(f"📦 JSON review saved to {REPORT_JSON}")
-            return structured_output
-            
-        except Exception as e:
-            print(f"❌ Error in review_output_file: {e}")
-            
-    # ============================================================
-    # MAIN EXECUTION LOGIC
-    # ============================================================
-    print("========================================================")
-    print("  Gemini Review Automation for C Optimizer Project       ")
-    print("========================================================\n")
-
-    if run_c_compiler() and run_c_optimizer():
-        json_result = review_output_file()
-        print("\n✅ Final structured JSON ready for frontend:\n")
-        print(json.dumps(json_result, indent=2))
-        return json_result
-    else:
-        return {"success": False, "message": "Compiler or optimizer failed to run."}
+import os
+import socket
+import subprocess
+import threading
+import contextlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+import json
+import time
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from llm import log, native
+from llm.metrics import span, record_stage, gemini_attempts, gemini_retries, gemini_json_reviews
+from llm.tac_passes import run_passes, enabled_passes
+from llm.cost_analysis import analyze_programs
+from llm.tac_interpreter import check_equivalence, EQUIVALENCE_CHECK
+from llm.chunking import chunk_tac, REVIEW_CHUNKING, REVIEW_CHUNK_CHAR_BUDGET, REVIEW_CHUNK_THREADS
+from llm.cache import result_cache, make_key, file_fingerprint, CACHE_ENABLED
+from llm.workspace import pipeline_slot, pipeline_workspace, scratch_workspace
+from llm.ratelimit import gemini_limiter, gemini_flight
+from llm.breaker import gemini_breaker, fallback_breaker, GeminiUnavailableError
+from llm.hedging import run_hedged, HedgeCancelled, InvalidReply
+from llm.reports import report_store
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+load_dotenv()
+
+# "pipe" chains compiler → optimizer through stdin/stdout with no temp files;
+# "files" keeps the original source.c / IR.txt / Output.txt workspace flow.
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "pipe")
+
+# Override to point at a local stub server (see stubs/gemini_stub.py)
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+# Models in order of preference, "model" or "model@api_base": the first is the
+# primary, the others are hedged in when it is slow or failing (llm/hedging.py),
+# e.g. GEMINI_MODELS=gemini-2.5-flash,gemini-2.5-flash-lite
+GEMINI_MODELS = {}
+for _entry in os.getenv("GEMINI_MODELS", "gemini-2.5-flash").split(","):
+    _model, _, _base = _entry.strip().partition("@")
+    if _model:
+        GEMINI_MODELS[_model] = _base or GEMINI_API_BASE
+GEMINI_MODEL = next(iter(GEMINI_MODELS))
+GEMINI_ENDPOINT = f"{GEMINI_MODELS[GEMINI_MODEL]}/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_ENDPOINT = f"{GEMINI_MODELS[GEMINI_MODEL]}/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse"
+
+# One keep-alive connection pool per worker instead of a new TLS handshake
+# per call, with room for a pool per model host (hedged calls share it)
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "8"))
+_pool_hosts = max(2, len(set(GEMINI_MODELS.values())))
+
+
+class _TrackedPoolMixin:
+    """Notes the connection a request checks out, so another thread can abort it (_inflight_request)."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        connections = getattr(_request_state, "connections", None)
+        if connections is not None:
+            connections.append(conn)
+        return conn
+
+
+class _TrackedHTTPPool(_TrackedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackedHTTPSPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _AbortableAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TrackedHTTPPool, "https": _TrackedHTTPSPool}
+
+
+_request_state = threading.local()
+http_session = requests.Session()
+http_session.mount("https://", _AbortableAdapter(pool_connections=_pool_hosts, pool_maxsize=GEMINI_POOL_SIZE))
+http_session.mount("http://", _AbortableAdapter(pool_connections=_pool_hosts, pool_maxsize=GEMINI_POOL_SIZE))
+
+# Get backend directory (parent of llm directory)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILER_DIR = os.path.join(BASE_DIR, "compiler")
+
+COMPILER_EXECUTABLE_NAME = "compiler"
+OPTIMIZER_EXECUTABLE_NAME = "optimizer"
+
+COMPILER_EXECUTABLE = os.path.join(COMPILER_DIR, COMPILER_EXECUTABLE_NAME)
+OPTIMIZER_EXECUTABLE = os.path.join(COMPILER_DIR, OPTIMIZER_EXECUTABLE_NAME)
+
+# The executables run with --quiet: no source echo, token dump or symbol
+# table, just one JSON stats line. COMPILER_TRACE=1 brings the trace back.
+COMPILER_TRACE = os.getenv("COMPILER_TRACE", "0") == "1"
+
+# Status of optimizer-only results served while Gemini is unavailable
+REVIEW_PENDING = "Review Pending"
+
+# Ask Gemini for a schema-constrained JSON review instead of scraping the
+# free-text one (see JSON_REVIEW_PROMPT_TEMPLATE / REVIEW_SCHEMA)
+GEMINI_JSON_MODE = os.getenv("GEMINI_JSON_MODE", "0") == "1"
+# Output budget of a JSON review: a base for status/summary/suggestions plus
+# room for Gemini's version of the TAC (~1 token per 3 characters)
+GEMINI_JSON_BASE_TOKENS = int(os.getenv("GEMINI_JSON_BASE_TOKENS", "400"))
+GEMINI_MAX_OUTPUT_TOKENS = 6000
+# Tries per listing before falling back to the free-text prompt
+GEMINI_JSON_ATTEMPTS = int(os.getenv("GEMINI_JSON_ATTEMPTS", "2"))
+
+
+# ============================================================
+# CHECK IF EXECUTABLES EXIST
+# ============================================================
+
+_executables_checked = False
+
+
+def ensure_executables():
+    # Only needed for the subprocess fallback, and only once per worker
+    global _executables_checked
+    if _executables_checked or native.available():
+        return
+    _executables_checked = True
+
+    log.debug(f"🔍 Checking for compiler at: {COMPILER_EXECUTABLE}")
+    log.debug(f"   Exists: {os.path.exists(COMPILER_EXECUTABLE)}")
+
+    log.debug(f"🔍 Checking for optimizer at: {OPTIMIZER_EXECUTABLE}")
+    log.debug(f"   Exists: {os.path.exists(OPTIMIZER_EXECUTABLE)}")
+
+    # Make executables executable (in case permissions were lost)
+    for exe_path in [COMPILER_EXECUTABLE, OPTIMIZER_EXECUTABLE]:
+        if os.path.exists(exe_path):
+            try:
+                os.chmod(exe_path, 0o755)
+                log.debug(f"✅ Set executable permissions for {exe_path}")
+            except Exception as e:
+                log.warning(f"⚠️ Could not set permissions for {exe_path}: {e}")
+
+
+# ============================================================
+# RUN COMPILER EXECUTABLE TO GENERATE OUTPUT FILE
+# ============================================================
+
+def stage_command(executable, *args):
+    return [executable, *args] if COMPILER_TRACE else [executable, *args, "--quiet"]
+
+
+def parse_stage_stats(output):
+    """The JSON record a --quiet stage prints as its last diagnostic line, or None."""
+    last_line = output.strip().rpartition("\n")[2]
+    if not last_line.startswith("{"):
+        return None
+    try:
+        return json.loads(last_line)
+    except ValueError:
+        return None
+
+
+def record_stage_stats(prefix, stats):
+    """Feed the C-side phase timings into the stage metrics as `<prefix>.<phase>`."""
+    if not stats:
+        return
+    log.debug(f"📊 {prefix} stats: {stats}")
+    for phase, ms in stats.get("ms", {}).items():
+        if phase != "total":
+            record_stage(f"{prefix}.{phase}", ms / 1000)
+
+
+def run_c_compiler(workspace):
+    log.info("⚙️ Running C compiler to generate IR.txt...\n")
+
+    if not os.path.exists(COMPILER_EXECUTABLE):
+        log.error(f"❌ Compiler executable not found: {COMPILER_EXECUTABLE}")
+        return False
+
+    if not os.path.exists(workspace.source_file):
+        log.error(f"❌ Source file not found: {workspace.source_file}")
+        return False
+
+    try:
+        with span("compile"):
+            # Run compiler inside the workspace so it reads/writes only there
+            compiled = subprocess.run(
+                stage_command(COMPILER_EXECUTABLE),
+                cwd=workspace.path,
+                capture_output=True,
+                text=True,
+                timeout=45
+            )
+
+            log.debug("🔧 Compiler stdout:\n", compiled.stdout)
+            log.debug("⚠️ Compiler stderr:\n", compiled.stderr)
+            log.debug(f"🔧 Compiler return code: {compiled.returncode}")
+            record_stage_stats("compiler", parse_stage_stats(compiled.stdout))
+            if compiled.returncode != 0:
+                log.error(f"❌ Compiler failed (code {compiled.returncode}):\n{compiled.stdout}")
+                return False
+
+            # Wait for IR.txt to appear
+            for i in range(10):
+                if os.path.exists(workspace.ir_file):
+                    log.debug("✅ IR.txt found!")
+                    return True
+                log.info(f"⏳ Waiting for IR.txt... ({i+1}/10)")
+                time.sleep(1)
+
+        log.error("❌ IR.txt not found after running compiler.")
+        return False
+
+    except subprocess.TimeoutExpired:
+        log.error("❌ Compiler process timed out.")
+        return False
+    except Exception as e:
+        log.error(f"❌ Error running compiler: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def run_c_optimizer(workspace):
+    """Run the optimizer and wait for Output.txt to appear."""
+    log.info("⚙️ Running C optimizer to generate Output.txt...\n")
+
+    if not os.path.exists(OPTIMIZER_EXECUTABLE):
+        log.error(f"❌ Optimizer executable not found: {OPTIMIZER_EXECUTABLE}")
+        return False
+
+    if not os.path.exists(workspace.ir_file):
+        log.error(f"❌ IR.txt not found: {workspace.ir_file}")
+        return False
+
+    try:
+        with span("optimize"):
+            result = subprocess.run(
+                stage_command(OPTIMIZER_EXECUTABLE),
+                cwd=workspace.path,
+                capture_output=True,
+                text=True,
+                timeout=45
+            )
+
+            log.debug("🔧 Optimizer stdout:\n", result.stdout)
+            log.debug("⚠️ Optimizer stderr:\n", result.stderr)
+            log.debug(f"🔧 Optimizer return code: {result.returncode}")
+            record_stage_stats("optimizer", parse_stage_stats(result.stdout))
+            if result.returncode != 0:
+                log.error(f"❌ Optimizer failed (code {result.returncode}):\n{result.stdout}")
+                return False
+
+            # Wait for Output.txt to appear
+            for i in range(10):
+                if os.path.exists(workspace.output_file):
+                    log.debug("✅ Output.txt found!")
+                    return True
+                log.info(f"⏳ Waiting for Output.txt... ({i+1}/10)")
+                time.sleep(1)
+
+        log.error("❌ Output.txt not found after running optimizer.")
+        return False
+
+    except subprocess.TimeoutExpired:
+        log.error("❌ Optimizer process timed out.")
+        return False
+    except Exception as e:
+        log.error(f"❌ Error running optimizer: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def _notify(on_stage, stage, data):
+    if on_stage is not None:
+        on_stage(stage, data)
+
+
+def run_c_pipeline_piped(source_code, on_stage=None):
+    """
+    Run compiler and optimizer in --stdio mode, feeding source through stdin
+    and the TAC from one into the other. Success is decided by exit codes only.
+    Returns (ir_code, optimized_code) or None on failure.
+    """
+    log.info("⚙️ Running C compiler → optimizer through pipes...\n")
+
+    for exe_path in (COMPILER_EXECUTABLE, OPTIMIZER_EXECUTABLE):
+        if not os.path.exists(exe_path):
+            log.error(f"❌ Executable not found: {exe_path}")
+            return None
+
+    try:
+        with span("compile"):
+            compiled = subprocess.run(
+                stage_command(COMPILER_EXECUTABLE, "--stdio"),
+                input=source_code,
+                capture_output=True,
+                text=True,
+                timeout=45
+            )
+        if compiled.returncode != 0:
+            log.error(f"❌ Compiler failed (code {compiled.returncode}):\n{compiled.stderr}")
+            return None
+        record_stage_stats("compiler", parse_stage_stats(compiled.stderr))
+        _notify(on_stage, "compiled", {"ir_code": compiled.stdout})
+
+        with span("optimize"):
+            optimized = subprocess.run(
+                stage_command(OPTIMIZER_EXECUTABLE, "--stdio"),
+                input=compiled.stdout,
+                capture_output=True,
+                text=True,
+                timeout=45
+            )
+        if optimized.returncode != 0:
+            log.error(f"❌ Optimizer failed (code {optimized.returncode}):\n{optimized.stderr}")
+            return None
+        record_stage_stats("optimizer", parse_stage_stats(optimized.stderr))
+        _notify(on_stage, "optimized", {"unoptimized_code": optimized.stdout})
+
+        log.info("✅ Compiler and optimizer finished")
+        return compiled.stdout, optimized.stdout
+
+    except subprocess.TimeoutExpired:
+        log.error("❌ Compiler/optimizer process timed out.")
+        return None
+    except Exception as e:
+        log.error(f"❌ Error running compiler/optimizer: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# ============================================================
+# GEMINI API CALL (FIXED WITH TIMEOUT & ERROR HANDLING)
+# ============================================================
+
+def gemini_headers():
+    return {
+        "Content-Type": "application/json",
+        "x-goog-api-key": os.getenv("GEMINI_API_KEY")
+    }
+
+
+def gemini_body(prompt, max_output_tokens=6000, response_schema=None):
+    body = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "maxOutputTokens": max_output_tokens,
+            "temperature": 0.3
+        }
+    }
+    if response_schema is not None:
+        body["generationConfig"].update({
+            "responseMimeType": "application/json",
+            "responseSchema": response_schema,
+            # Thinking tokens count against maxOutputTokens; a JSON verdict doesn't need them
+            "thinkingConfig": {"thinkingBudget": 0},
+        })
+    return body
+
+
+def gemini_endpoint(model):
+    if model == GEMINI_MODEL:
+        return GEMINI_ENDPOINT
+    return f"{GEMINI_MODELS[model]}/models/{model}:generateContent"
+
+
+def model_breaker(model):
+    return gemini_breaker if model == GEMINI_MODEL else fallback_breaker(model)
+
+
+@contextlib.contextmanager
+def _inflight_request(lease, cancel):
+    """
+    Hold the limiter `lease` for one POST. If `cancel` is set meanwhile
+    (another hedged model won), the lease goes back right away and the
+    request's socket is shut down, so the POST fails at once and the block
+    raises HedgeCancelled instead of the connection error.
+    """
+    released = threading.Lock()
+
+    def release():
+        if released.acquire(blocking=False):
+            gemini_limiter.release(lease)
+
+    if cancel is None:
+        try:
+            yield
+        finally:
+            release()
+        return
+
+    connections = []
+
+    def abort():
+        release()
+        for conn in connections:
+            sock = getattr(conn, "sock", None)
+            if sock is not None:
+                try:
+                    # socket.socket's shutdown, not SSLSocket's: only the file descriptor is touched
+                    socket.socket.shutdown(sock, socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    _request_state.connections = connections
+    remove = cancel.on_cancel(abort)
+    try:
+        yield
+    except requests.exceptions.RequestException:
+        if cancel.is_set():
+            raise HedgeCancelled()
+        raise
+    finally:
+        remove()
+        _request_state.connections = None
+        release()
+    # The reply came back anyway, too late to be used
+    if cancel.is_set():
+        raise HedgeCancelled()
+
+
+def _backoff(delay, cancel):
+    if cancel is None:
+        time.sleep(delay)
+    elif cancel.wait(delay):
+        raise HedgeCancelled()
+
+
+def _retry_after(response, default):
+    try:
+        return float(response.headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
+
+
+def call_gemini_api(prompt, retries=3, initial_delay=5, max_output_tokens=6000, response_schema=None):
+    """
+    Identical prompts already in flight in this worker share that call's
+    reply instead of issuing their own (llm/ratelimit.py single-flight).
+    With `response_schema` Gemini answers with JSON matching it.
+    Raises GeminiUnavailableError when the circuit breaker is open or the
+    retries run out without a reply.
+    """
+    mode = "json" if response_schema is not None else "text"
+    key = hashlib.sha256(f"{GEMINI_ENDPOINT}\0{max_output_tokens}\0{mode}\0{prompt}".encode("utf-8")).hexdigest()
+    return gemini_flight.do(
+        key, lambda: _call_gemini_api(prompt, retries, initial_delay, max_output_tokens, response_schema)
+    )
+
+
+def request_gemini(prompt, validate, max_output_tokens=6000, response_schema=None):
+    """
+    Ask GEMINI_MODELS for `prompt`: the primary first, then each fallback
+    once the models already asked take longer than GEMINI_HEDGE_AFTER or fail
+    (llm/hedging.py). `validate(text, data)` raises ValueError for a reply
+    that doesn't parse; the first reply it accepts wins and the other calls
+    are cancelled. Returns (model, (text, data)). Raises InvalidReply when no
+    reply was valid and GeminiUnavailableError when no model answered.
+    Identical requests in flight in this worker share one hedge.
+    """
+    mode = "json" if response_schema is not None else "text"
+    key = hashlib.sha256(
+        f"hedge\0{','.join(GEMINI_MODELS)}\0{max_output_tokens}\0{mode}\0{prompt}".encode("utf-8")
+    ).hexdigest()
+
+    def call(model):
+        return lambda cancel: _call_gemini_api(prompt, 3, 5, max_output_tokens, response_schema, model, cancel)
+
+    return gemini_flight.do(key, lambda: run_hedged(
+        [(model, call(model)) for model in GEMINI_MODELS],
+        lambda reply: validate(*reply),
+    ))
+
+
+def _call_gemini_api(prompt, retries, initial_delay, max_output_tokens, response_schema=None,
+                     model=None, cancel=None):
+    """
+    `model` defaults to the primary. `cancel` is set by run_hedged once another
+    model has won; the call then gives up wherever it is (limiter wait,
+    request on the wire or backoff) and raises HedgeCancelled.
+    """
+    model = model or GEMINI_MODEL
+    breaker = model_breaker(model)
+    # Checked once per call, so a half-open probe keeps its own retries
+    if not breaker.allow():
+        raise GeminiUnavailableError(f"Gemini circuit breaker for {model} is open")
+    try:
+        return _gemini_attempts(
+            model, breaker, gemini_body(prompt, max_output_tokens, response_schema), retries, initial_delay, cancel
+        )
+    finally:
+        breaker.release()
+
+
+def _gemini_attempts(model, breaker, body, retries, initial_delay, cancel):
+    # Every attempt takes a lease from the limiter shared by all workers
+    endpoint = gemini_endpoint(model)
+    headers = gemini_headers()
+    delay = initial_delay
+
+    for attempt in range(1, retries + 1):
+        if cancel is not None and cancel.is_set():
+            raise HedgeCancelled()
+        log.info(f"🌐 Calling Gemini API ({model}, attempt {attempt}/{retries})...")
+
+        with span("gemini_wait"):
+            lease = gemini_limiter.acquire(cancel=cancel)
+        if cancel is not None and cancel.is_set():
+            gemini_limiter.release(lease)
+            raise HedgeCancelled()
+        if lease is None:
+            gemini_attempts.inc(outcome="throttled")
+            log.warning("🚦 Gemini limiter stayed closed; giving up on this call")
+            raise GeminiUnavailableError("Gemini rate limit reached")
+
+        response = None
+        try:
+            outcome = "error"
+            started = time.monotonic()
+            with span("gemini_attempt"):
+                with _inflight_request(lease, cancel):
+                    response = http_session.post(
+                        endpoint,
+                        headers=headers,
+                        json=body,
+                        timeout=60  # 60 second timeout for API call
+                    )
+                outcome = {200: "ok", 429: "rate_limited", 503: "unavailable", 400: "bad_request"}.get(
+                    response.status_code, "error"
+                )
+            gemini_attempts.inc(outcome=outcome)
+            # A 429 is our quota, not Gemini's health; the limiter handles it
+            if response.status_code != 429:
+                breaker.record(response.status_code < 500, time.monotonic() - started)
+
+            if response.status_code == 200:
+                log.info("✅ Gemini API responded successfully")
+                gemini_limiter.record_success()
+                data = response.json()
+
+                try:
+                    candidates = data.get("candidates", [])
+                    if not candidates:
+                        return "⚠️ No response candidates found.", data
+
+                    content = candidates[0].get("content", {})
+                    parts = content.get("parts", [])
+                    all_text = [p["text"] for p in parts if "text" in p]
+
+                    if not all_text and "output_text" in candidates[0]:
+                        all_text.append(candidates[0]["output_text"])
+
+                    final_text = "\n".join(all_text) if all_text else "⚠️ Gemini returned no readable text."
+                    return final_text, data
+
+                except Exception as e:
+                    log.warning(f"⚠️ Error parsing Gemini response: {e}")
+                    return f"⚠️ Parsing error: {e}\nRaw data:\n{json.dumps(data, indent=2)}", data
+
+            elif response.status_code in (429, 503):
+                # The pause is shared: the next attempt (here or in any worker) waits in the limiter
+                cooldown = _retry_after(response, delay)
+                log.warning(f"⚠️ Gemini busy (status {response.status_code}). Retrying in {cooldown}s... ({attempt}/{retries})")
+                paused = gemini_limiter.record_throttle(cooldown)
+                delay *= 2  # Exponential backoff
+                if attempt < retries:
+                    gemini_retries.inc(reason=outcome)
+                    # Without the limiter nothing else makes the next attempt wait
+                    if not paused:
+                        _backoff(cooldown, cancel)
+                continue
+
+            elif response.status_code == 400:
+                log.error(f"❌ Bad request to Gemini API: {response.text}")
+                return f"⚠️ Invalid request to Gemini: {response.text}", {}
+
+            else:
+                log.error(f"❌ Gemini API Error {response.status_code}: {response.text}")
+                if attempt < retries:
+                    gemini_retries.inc(reason=outcome)
+                    _backoff(delay, cancel)
+                    continue
+                raise GeminiUnavailableError(f"Gemini API Error {response.status_code}")
+
+        except (GeminiUnavailableError, HedgeCancelled):
+            raise
+
+        except requests.exceptions.Timeout:
+            outcome = "timeout"
+            gemini_attempts.inc(outcome=outcome)
+            breaker.record(False)
+            log.warning(f"⏱️ Request timed out (attempt {attempt}/{retries})")
+            if attempt < retries:
+                gemini_retries.inc(reason=outcome)
+                _backoff(delay, cancel)
+                continue
+            raise GeminiUnavailableError("Gemini API timed out after multiple attempts")
+
+        except requests.exceptions.ConnectionError as e:
+            outcome = "connection_error"
+            gemini_attempts.inc(outcome=outcome)
+            breaker.record(False)
+            log.warning(f"🔌 Connection error (attempt {attempt}/{retries}): {e}")
+            if attempt < retries:
+                gemini_retries.inc(reason=outcome)
+                _backoff(delay, cancel)
+                continue
+            raise GeminiUnavailableError("Could not connect to Gemini API")
+
+        except Exception as e:
+            if response is None:
+                gemini_attempts.inc(outcome="error")
+                breaker.record(False)
+            outcome = "error"
+            log.error(f"❌ Unexpected error calling Gemini: {e}")
+            if attempt < retries:
+                gemini_retries.inc(reason=outcome)
+                _backoff(delay, cancel)
+                continue
+            raise GeminiUnavailableError(f"Unexpected error: {e}")
+
+    raise GeminiUnavailableError("Gemini API unavailable after multiple retries")
+
+
+# ============================================================
+# PARSING HELPERS
+# ============================================================
+
+def extract_summary(review_text):
+    lines = review_text.strip().splitlines()
+    summary_line = ""
+    for line in reversed(lines):
+        if "✅" in line or "⚠️" in line:
+            summary_line = line.strip()
+            break
+
+    if "✅" in summary_line:
+        status = "Optimization Correct"
+    elif "⚠️" in summary_line:
+        status = "Issues Found"
+    else:
+        status = "Unclear"
+
+    return {"summary": summary_line, "status": status}
+
+
+def extract_suggestions(review_text):
+    # Find all text enclosed between $$ ... $$ after $Suggestions:
+    match = re.search(r"\$Suggestions:\$[\s\\n]*", review_text)
+    if match:
+        # Extract all $$ ... $$ blocks
+        suggestions = re.findall(r"\$(.*?)\$", review_text, re.DOTALL)
+        # Clean up each suggestion (remove whitespace and bullets)
+        suggestions = [
+            re.sub(r"^\s*[-*•]?\s*", "", s.strip())
+            for s in suggestions if s.strip()
+        ]
+        return suggestions[1:len(suggestions) - 1]
+    return []
+
+
+def extract_tac_code(review_text):
+    # Find the $Optimization:$ header and capture everything after it
+    match = re.search(
+        r"\$Optimization:\$\s*\n(.*)",
+        review_text,
+        re.IGNORECASE | re.DOTALL
+    )
+
+    if match:
+        tac_code = match.group(1).strip()
+        # Remove any extra markdown or formatting artifacts
+        tac_code = re.sub(r"```[a-zA-Z]*|```", "", tac_code).strip()
+        return tac_code
+    return None
+
+
+def parse_json_review(review_text):
+    """Parse and validate a JSON-mode review (REVIEW_SCHEMA); raises ValueError if it doesn't fit."""
+    review = json.loads(review_text)
+    if not isinstance(review, dict):
+        raise ValueError("review is not a JSON object")
+    if review.get("status") not in ("Optimization Correct", "Issues Found"):
+        raise ValueError(f"unexpected status {review.get('status')!r}")
+    if not isinstance(review.get("summary"), str):
+        raise ValueError("summary is missing")
+    for field in ("findings", "suggestions", "optimized_tac"):
+        items = review.get(field, [])
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError(f"{field} is not a list of strings")
+    if not any(line.strip() for line in review.get("optimized_tac", [])):
+        raise ValueError("optimized_tac is empty")
+    return review
+
+
+def validate_json_review(review_text, data):
+    parse_json_review(review_text)
+
+
+def validate_review_text(review_text, data):
+    """A free-text review counts once it has its verdict line and the $Optimization:$ section."""
+    if extract_summary(review_text)["status"] == "Unclear":
+        raise ValueError("no ✅/⚠️ verdict line")
+    if extract_tac_code(review_text) is None:
+        raise ValueError("no $Optimization:$ section")
+
+
+# ============================================================
+# GEMINI REVIEW FUNCTION (WITH FALLBACK)
+# ============================================================
+
+REVIEW_PROMPT_TEMPLATE = """
+    You are an expert compiler engineer reviewing optimized three-address code (TAC).
+
+    Analyze the code below and respond briefly:
+    1. Verify if semantics are preserved (no logic change).
+    2. Mention unsafe optimizations, if any.
+    3. Suggest at most 3 further optimizations (clear, one-liners).
+    4. Use short bullet points only — no long explanations.
+    5. End with one summary line:
+    → "✅ Optimization Correct" or "⚠️ Issues Found: <reason>"
+
+    --- Optimized TAC ---
+    {optimized_code}
+
+    Format your output as:
+    - ✅/⚠️ statements
+    - 2–4 bullet points only
+    Keep the total output under 6 lines (suitable for frontend card view).
+    Dont use any emojis.
+    Give suggestions with the heading "$Suggestions:$" and enclose each suggestions like "$...$" compulsorily.
+    Also compulsorily generate your version of the optimized three address code with the heading: "$Optimization:$" in the end of the summary.
+    All the optimized code must be in newlines. 
+    """
+
+
+# Prepended to the review prompt when a large listing is reviewed in chunks
+CHUNK_PROMPT_NOTE = """
+    This is part {index} of {total} of one program's TAC, cut on function or
+    basic-block boundaries, so it may start or end inside a function.
+    Review only the code shown.
+    """
+
+
+JSON_REVIEW_PROMPT_TEMPLATE = """
+    You are an expert compiler engineer reviewing optimized three-address code (TAC).
+
+    Check whether the code below preserves the program's semantics and whether
+    any optimization is unsafe. Answer in JSON:
+    - status: "Optimization Correct" or "Issues Found"
+    - summary: one short sentence; the reason when issues were found
+    - findings: at most 3 one-line observations
+    - suggestions: at most 3 further optimizations, one line each
+    - optimized_tac: your optimized version of the TAC, one instruction per item
+
+    --- Optimized TAC ---
+    {optimized_code}
+    """
+
+REVIEW_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "status": {"type": "STRING", "enum": ["Optimization Correct", "Issues Found"]},
+        "summary": {"type": "STRING"},
+        "findings": {"type": "ARRAY", "items": {"type": "STRING"}, "maxItems": 3},
+        "suggestions": {"type": "ARRAY", "items": {"type": "STRING"}, "maxItems": 3},
+        "optimized_tac": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["status", "summary", "suggestions", "optimized_tac"],
+    "propertyOrdering": ["status", "summary", "findings", "suggestions", "optimized_tac"],
+}
+
+
+def build_review_prompt(optimized_code):
+    return REVIEW_PROMPT_TEMPLATE.format(optimized_code=optimized_code)
+
+
+def json_review_budget(code):
+    """maxOutputTokens for a JSON review of `code`: the reply is mostly Gemini's copy of the TAC."""
+    return min(GEMINI_MAX_OUTPUT_TOKENS, GEMINI_JSON_BASE_TOKENS + len(code) // 3)
+
+
+def reduce_tac(optimized_code):
+    """
+    Run the Python TAC passes (llm/tac_passes.py) over the optimizer output
+    so the prompt only carries live code. Returns (reduced_code, summary).
+    """
+    with span("tac_passes"):
+        reduced_code, report = run_passes(optimized_code)
+    summary = {
+        "lines_before": report["lines_before"],
+        "lines_after": report["lines_after"],
+        "removed": {name: info["removed"] for name, info in report["passes"].items()},
+    }
+    if report["passes"]:
+        details = ", ".join(f"{name}: {count}" for name, count in summary["removed"].items())
+        log.info(f"🧹 TAC passes: {summary['lines_before']} → {summary['lines_after']} lines ({details})")
+    return reduced_code, summary
+
+
+def publish_reports(source_code, structured_output):
+    """Queue the run's review for the append-only report store (llm/reports.py); never blocks."""
+    if isinstance(structured_output, dict) and "status" in structured_output:
+        report_store.submit(source_code, structured_output)
+
+
+def review_output_file(workspace):
+    if not os.path.exists(workspace.output_file):
+        log.error("❌ Output.txt not found! Run your optimizer first.")
+        return {"success": False, "message": "Output.txt not found"}
+
+    with open(workspace.output_file, "r") as f:
+        optimized_code = f.read()
+
+    return review_tac(optimized_code, workspace)
+
+
+def build_structured_output(review_text, optimized_code, reduction=None):
+    """`reduction` is the (reviewed_code, summary) pair from reduce_tac, if any."""
+    with span("parse"):
+        summary_info = extract_summary(review_text)
+        structured_output = {
+            "summary": summary_info["summary"],
+            "status": summary_info["status"],
+            "suggestions": extract_suggestions(review_text),
+            "full_text": review_text,
+            "optimized_code": extract_tac_code(review_text),
+            "unoptimized_code": optimized_code
+        }
+    if reduction is not None:
+        structured_output["reviewed_code"], structured_output["tac_passes"] = reduction
+    return structured_output
+
+
+def build_json_structured_output(review, optimized_code, reduction=None):
+    """
+    Same shape as build_structured_output, from a parse_json_review dict;
+    full_text is rendered in the free-text review's layout for the frontend.
+    """
+    if review["status"] == "Optimization Correct":
+        summary = "✅ Optimization Correct"
+    else:
+        summary = f"⚠️ Issues Found: {review['summary']}"
+    suggestions = [s.strip() for s in review["suggestions"] if s.strip()]
+    llm_code = "\n".join(line.rstrip() for line in review["optimized_tac"]).strip()
+    full_text = "\n".join(
+        [f"- {finding}" for finding in review.get("findings", [])]
+        + [summary, "", "$Suggestions:$"]
+        + [f"${suggestion}$" for suggestion in suggestions]
+        + ["", "$Optimization:$", llm_code]
+    )
+    structured_output = {
+        "summary": summary,
+        "status": review["status"],
+        "suggestions": suggestions,
+        "full_text": full_text,
+        "optimized_code": llm_code,
+        "unoptimized_code": optimized_code
+    }
+    if reduction is not None:
+        structured_output["reviewed_code"], structured_output["tac_passes"] = reduction
+    return structured_output
+
+
+def build_pending_output(optimized_code, reduction=None):
+    """Optimizer-only result for when Gemini can't be reached; the LLM fields stay empty."""
+    structured_output = {
+        "summary": "LLM review pending: Gemini is unavailable, showing the optimizer output only",
+        "status": REVIEW_PENDING,
+        "suggestions": [],
+        "full_text": "",
+        "optimized_code": None,
+        "unoptimized_code": optimized_code,
+        "llm_pending": True,
+    }
+    if reduction is not None:
+        structured_output["reviewed_code"], structured_output["tac_passes"] = reduction
+    return structured_output
+
+
+def attach_cost_analysis(results, ir_codes=None):
+    """
+    Add the TAC cost series (llm/cost_analysis.py) to every successful
+    structured result, costing all of them in one NumPy pass.
+    """
+    ir_codes = ir_codes if ir_codes is not None else [None] * len(results)
+    targets = [
+        (result, ir_code) for result, ir_code in zip(results, ir_codes)
+        if isinstance(result, dict) and "unoptimized_code" in result
+    ]
+    with span("cost_analysis"):
+        analyses = analyze_programs([
+            {"unoptimized": ir_code, "optimized": result["unoptimized_code"], "llm": result.get("optimized_code")}
+            for result, ir_code in targets
+        ])
+    for (result, _), analysis in zip(targets, analyses):
+        result["cost_analysis"] = analysis
+    return results
+
+
+def attach_equivalence(results, ir_codes=None):
+    """
+    Run IR.txt, the optimizer output and the LLM's version through the local
+    TAC interpreter (llm/tac_interpreter.py) on the same random inputs and
+    add the verdicts as `equivalence`.
+    """
+    if not EQUIVALENCE_CHECK:
+        return results
+    ir_codes = ir_codes if ir_codes is not None else [None] * len(results)
+    with span("equivalence"):
+        for result, ir_code in zip(results, ir_codes):
+            if not ir_code or not isinstance(result, dict) or "unoptimized_code" not in result:
+                continue
+            candidates = {"optimizer": result["unoptimized_code"]}
+            if result.get("optimized_code"):
+                candidates["llm"] = result["optimized_code"]
+            equivalence = result["equivalence"] = check_equivalence(ir_code, candidates)
+            verdicts = ", ".join(f"{label}: {equivalence[label]['verdict']}" for label in candidates)
+            log.info(f"🧪 Equivalence with IR.txt over {equivalence['trials']} trials ({verdicts})")
+    return results
+
+
+def merge_structured_outputs(parts, headers=None):
+    """
+    Combine reviews of consecutive pieces of one program (e.g. its functions)
+    into one result of the usual shape, keeping the pieces in order. The worst
+    status wins: "Issues Found", then pending, then "Unclear", then "Correct".
+    """
+    statuses = [part["status"] for part in parts]
+    if "Issues Found" in statuses:
+        status = "Issues Found"
+    elif REVIEW_PENDING in statuses:
+        status = REVIEW_PENDING
+    elif "Unclear" in statuses:
+        status = "Unclear"
+    else:
+        status = "Optimization Correct"
+
+    headers = headers or [None] * len(parts)
+    summaries = dict.fromkeys(part["summary"] for part in parts if part["status"] == status and part["summary"])
+    llm_code = [part["optimized_code"] for part in parts if part.get("optimized_code")]
+    merged = {
+        "summary": " | ".join(summaries),
+        "status": status,
+        "suggestions": list(dict.fromkeys(s for part in parts for s in part["suggestions"])),
+        "full_text": "\n\n".join(
+            f"=== {header} ===\n{part['full_text']}" if header else part["full_text"]
+            for header, part in zip(headers, parts)
+        ),
+        "optimized_code": "\n\n".join(llm_code) if llm_code else None,
+        "unoptimized_code": "".join(part["unoptimized_code"] for part in parts),
+    }
+    models = list(dict.fromkeys(part["model"] for part in parts if part.get("model")))
+    if models:
+        merged["model"] = ", ".join(models)
+    if any(part.get("llm_pending") for part in parts):
+        merged["llm_pending"] = True
+    if all("tac_passes" in part for part in parts):
+        merged["reviewed_code"] = "\n".join(part["reviewed_code"] for part in parts)
+        removed = {}
+        for part in parts:
+            for name, count in part["tac_passes"]["removed"].items():
+                removed[name] = removed.get(name, 0) + count
+        merged["tac_passes"] = {
+            "lines_before": sum(part["tac_passes"]["lines_before"] for part in parts),
+            "lines_after": sum(part["tac_passes"]["lines_after"] for part in parts),
+            "removed": removed,
+        }
+    return merged
+
+
+def review_listing(reviewed_code, optimized_code, reduction=None, preamble=""):
+    """
+    One Gemini review of `reviewed_code`, parsed into a structured output;
+    returns (review_text, structured_output). In GEMINI_JSON_MODE the reply
+    is schema-constrained JSON with a tight token budget; a reply that fails
+    validation is asked again (with double the budget if it was cut off),
+    and after GEMINI_JSON_ATTEMPTS the free-text prompt is used instead.
+    """
+    if GEMINI_JSON_MODE:
+        prompt = preamble + JSON_REVIEW_PROMPT_TEMPLATE.format(optimized_code=reviewed_code)
+        budget = json_review_budget(reviewed_code)
+        for attempt in range(1, GEMINI_JSON_ATTEMPTS + 1):
+            try:
+                model, (review_text, _) = request_gemini(
+                    prompt, validate_json_review, max_output_tokens=budget, response_schema=REVIEW_SCHEMA
+                )
+            except InvalidReply as e:
+                gemini_json_reviews.inc(outcome="invalid")
+                candidates = e.reply[1].get("candidates") or [{}]
+                truncated = candidates[0].get("finishReason") == "MAX_TOKENS"
+                log.warning(
+                    f"⚠️ Invalid JSON review{f' (cut off at {budget} tokens)' if truncated else ''}, "
+                    f"attempt {attempt}/{GEMINI_JSON_ATTEMPTS}"
+                )
+                if truncated:
+                    budget = min(GEMINI_MAX_OUTPUT_TOKENS, budget * 2)
+                continue
+            gemini_json_reviews.inc(outcome="ok")
+            with span("parse"):
+                structured_output = build_json_structured_output(
+                    parse_json_review(review_text), optimized_code, reduction
+                )
+            structured_output["model"] = model
+            return review_text, structured_output
+        gemini_json_reviews.inc(outcome="fallback")
+        log.warning("⚠️ Falling back to the free-text review prompt")
+
+    try:
+        model, (review_text, _) = request_gemini(preamble + build_review_prompt(reviewed_code), validate_review_text)
+    except InvalidReply as e:
+        # No model gave a complete review: keep the first model's, which isn't cached if it is "Unclear"
+        model, (review_text, _) = e.model, e.reply
+    structured_output = build_structured_output(review_text, optimized_code, reduction)
+    structured_output["model"] = model
+    return review_text, structured_output
+
+
+def review_chunks(chunks):
+    """Review TAC chunks concurrently; returns their structured outputs in chunk order."""
+    def review(index):
+        preamble = CHUNK_PROMPT_NOTE.format(index=index + 1, total=len(chunks))
+        return review_listing(chunks[index], chunks[index], preamble=preamble)[1]
+
+    with ThreadPoolExecutor(max_workers=min(REVIEW_CHUNK_THREADS, len(chunks))) as executor:
+        return list(executor.map(review, range(len(chunks))))
+
+
+def request_review(optimized_code):
+    """
+    Reduce the TAC, ask Gemini for a review and parse it; returns
+    (review_text, structured_output). Listings over the chunk budget are
+    reviewed in parallel chunks and merged back into one result. When Gemini
+    is unavailable the result is optimizer-only, with the LLM fields pending.
+    """
+    reduction = reduce_tac(optimized_code)
+    chunks = chunk_tac(reduction[0]) if REVIEW_CHUNKING else [reduction[0]]
+    try:
+        return _request_review(optimized_code, reduction, chunks)
+    except GeminiUnavailableError as e:
+        log.warning(f"⏳ Skipping LLM review: {e}")
+        return "", build_pending_output(optimized_code, reduction)
+
+
+def _request_review(optimized_code, reduction, chunks):
+    if len(chunks) > 1:
+        log.info(f"🤖 Sending optimized TAC to Gemini in {len(chunks)} chunks...\n")
+        structured_output = merge_structured_outputs(
+            review_chunks(chunks),
+            [f"PART {index + 1}/{len(chunks)}" for index in range(len(chunks))],
+        )
+        structured_output["unoptimized_code"] = optimized_code
+        structured_output["reviewed_code"], structured_output["tac_passes"] = reduction
+        structured_output["review_chunks"] = len(chunks)
+        return structured_output["full_text"], structured_output
+
+    log.info("🤖 Sending optimized TAC to Gemini...\n")
+    review_text, structured_output = review_listing(reduction[0], optimized_code, reduction)
+
+    log.debug("\n=== Gemini Review ===\n")
+    log.debug(review_text)
+
+    return review_text, structured_output
+
+
+def review_tac(optimized_code, workspace=None):
+    """Send optimizer output to Gemini and parse the review into the frontend's shape."""
+    try:
+        review_text, structured_output = request_review(optimized_code)
+
+        if workspace is not None:
+            with span("report_write"):
+                with open(workspace.report_text, "w", encoding="utf-8") as f:
+                    f.write(review_text)
+                with open(workspace.report_json, "w", encoding="utf-8") as f:
+                    json.dump(structured_output, f, indent=2)
+
+        return structured_output
+
+    except Exception as e:
+        log.error(f"❌ Error in review_tac: {e}")
+
+
+# ============================================================
+# MAIN EXECUTION LOGIC
+# ============================================================
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def run_pipeline(workspace, on_stage=None):
+    """Compile, optimize and review the source.c already in `workspace`."""
+    if not run_c_compiler(workspace):
+        return {"success": False, "message": "Compiler or optimizer failed to run."}
+    if on_stage is not None:
+        _notify(on_stage, "compiled", {"ir_code": _read_text(workspace.ir_file)})
+
+    if not run_c_optimizer(workspace):
+        return {"success": False, "message": "Compiler or optimizer failed to run."}
+    if on_stage is not None:
+        _notify(on_stage, "optimized", {"unoptimized_code": _read_text(workspace.output_file)})
+
+    json_result = review_output_file(workspace)
+    ir_code = _read_text(workspace.ir_file)
+    attach_cost_analysis([json_result], [ir_code])
+    attach_equivalence([json_result], [ir_code])
+    _notify(on_stage, "reviewed", json_result)
+    if log.enabled("debug"):
+        log.debug("\n✅ Final structured JSON ready for frontend:\n")
+        log.debug(json.dumps(json_result, indent=2))
+    return json_result
+
+
+def compile_and_optimize(source_code, on_stage=None):
+    """
+    Run only the C stages: in-process through the shared library when it is
+    built, otherwise via the executables in the configured PIPELINE_MODE.
+    Returns (ir_code, optimized_code) or None; the caller holds the pipeline slot.
+    """
+    if native.available():
+        try:
+            with span("native_compile_optimize"):
+                ir_code, optimized_code, stats = native.compile_and_optimize(source_code)
+        except native.NativeCompileError as e:
+            log.error(f"❌ Compilation failed: {e}")
+            return None
+        record_stage_stats("native", stats)
+        _notify(on_stage, "compiled", {"ir_code": ir_code})
+        _notify(on_stage, "optimized", {"unoptimized_code": optimized_code})
+        return ir_code, optimized_code
+
+    if PIPELINE_MODE == "pipe":
+        return run_c_pipeline_piped(source_code, on_stage)
+
+    with scratch_workspace() as workspace:
+        with span("source_write"):
+            written = workspace.write_source(source_code)
+        if not written:
+            return None
+        if not run_c_compiler(workspace):
+            return None
+        ir_code = _read_text(workspace.ir_file)
+        _notify(on_stage, "compiled", {"ir_code": ir_code})
+
+        if not run_c_optimizer(workspace):
+            return None
+        optimized_code = _read_text(workspace.output_file)
+        _notify(on_stage, "optimized", {"unoptimized_code": optimized_code})
+        return ir_code, optimized_code
+
+
+def run_pipeline_in_memory(source_code, on_stage=None):
+    """Compile, optimize and review `source_code` without a workspace."""
+    compiled = compile_and_optimize(source_code, on_stage)
+    if compiled is None:
+        return {"success": False, "message": "Compiler or optimizer failed to run."}
+
+    ir_code, optimized_code = compiled
+    json_result = review_tac(optimized_code)
+    attach_cost_analysis([json_result], [ir_code])
+    attach_equivalence([json_result], [ir_code])
+    _notify(on_stage, "reviewed", json_result)
+    if log.enabled("debug"):
+        log.debug("\n✅ Final structured JSON ready for frontend:\n")
+        log.debug(json.dumps(json_result, indent=2))
+    return json_result
+
+
+def pipeline_cache_key(source_code, *scope):
+    """
+    Everything that can change the result: source, prompt, passes, models,
+    the engine that ran the C stages (shared library or binaries, and the
+    files of each) and the review chunk budget. `scope` keeps other kinds of entry (e.g. per-function) apart.
+    """
+    return make_key(
+        source_code,
+        REVIEW_PROMPT_TEMPLATE,
+        json.dumps(REVIEW_SCHEMA) + JSON_REVIEW_PROMPT_TEMPLATE if GEMINI_JSON_MODE else "",
+        ",".join(enabled_passes()),
+        ",".join(GEMINI_MODELS),
+        "native" if native.available() else PIPELINE_MODE,
+        file_fingerprint(native.LIBRARY_PATH),
+        file_fingerprint(COMPILER_EXECUTABLE),
+        file_fingerprint(OPTIMIZER_EXECUTABLE),
+        REVIEW_CHUNK_CHAR_BUDGET if REVIEW_CHUNKING else 0,
+        *scope,
+    )
+
+
+def is_cacheable(result):
+    # Only keep real reviews; transient Gemini failures come back as "Unclear"
+    return isinstance(result, dict) and result.get("status") in ("Optimization Correct", "Issues Found")
+
+
+def LLM(source_code, on_stage=None):
+    """
+    Run the full pipeline for `source_code` and return the structured review.
+    `on_stage(stage, data)` is called as the compiled, optimized and reviewed
+    stages finish, so callers can report progress before the LLM returns.
+    """
+    log.debug("========================================================")
+    log.debug("  Gemini Review Automation for C Optimizer Project       ")
+    log.debug("========================================================\n")
+
+    cache_key = pipeline_cache_key(source_code) if CACHE_ENABLED else None
+    if cache_key:
+        with span("cache_lookup"):
+            cached = result_cache.get(cache_key)
+        if cached is not None:
+            log.info(f"⚡ Cache hit for {cache_key[:12]}")
+            _notify(on_stage, "optimized", {"unoptimized_code": cached.get("unoptimized_code")})
+            _notify(on_stage, "reviewed", cached)
+            return cached
+
+    ensure_executables()
+
+    # Imported here because llm.incremental builds on this module
+    from llm import incremental
+    units = incremental.split_functions(source_code) if incremental.INCREMENTAL_ENABLED else None
+
+    # All branches raise PipelineBusyError when every slot is taken
+    if units is not None and len(units) >= incremental.INCREMENTAL_MIN_FUNCTIONS:
+        with pipeline_slot():
+            result = incremental.run_incremental(units, on_stage)
+    elif native.available() or PIPELINE_MODE == "pipe":
+        with pipeline_slot():
+            result = run_pipeline_in_memory(source_code, on_stage)
+    else:
+        with pipeline_workspace() as workspace:
+            log.debug(f"📂 Workspace directory: {workspace.path}")
+
+            with span("source_write"):
+                written = workspace.write_source(source_code)
+            if not written:
+                return {"success": False, "message": "Failed to write source file"}
+
+            result = run_pipeline(workspace, on_stage)
+
+    publish_reports(source_code, result)
+    if cache_key and is_cacheable(result):
+        result_cache.put(cache_key, result)
+    return result
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import llm.LLM as pipeline
+from llm import log
+from llm.metrics import span
+from llm.cache import result_cache, CACHE_ENABLED
+from llm.workspace import pipeline_slot
+from llm.breaker import GeminiUnavailableError
+from llm.hedging import InvalidReply
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_PROCESSES = int(os.getenv("BATCH_PROCESSES", str(os.cpu_count() or 2)))
+# How many optimized TAC listings share one Gemini prompt
+BATCH_PROGRAMS_PER_PROMPT = int(os.getenv("BATCH_PROGRAMS_PER_PROMPT", "5"))
+BATCH_PROMPT_CHAR_BUDGET = int(os.getenv("BATCH_PROMPT_CHAR_BUDGET", "40000"))
+BATCH_TOKENS_PER_PROGRAM = int(os.getenv("BATCH_TOKENS_PER_PROGRAM", "2000"))
+BATCH_PROMPT_THREADS = int(os.getenv("BATCH_PROMPT_THREADS", "4"))
+
+BATCH_PROMPT_HEADER = """
+    You are an expert compiler engineer reviewing several independent programs
+    of optimized three-address code (TAC). Each program is delimited by
+    "=== PROGRAM <n> ===" and "=== END PROGRAM <n> ===".
+
+    Review every program separately, following exactly these rules for each one:
+    1. Verify if semantics are preserved (no logic change).
+    2. Mention unsafe optimizations, if any.
+    3. Suggest at most 3 further optimizations (clear, one-liners).
+    4. Use short bullet points only — no long explanations.
+    5. End with one summary line:
+    → "✅ Optimization Correct" or "⚠️ Issues Found: <reason>"
+    Give suggestions with the heading "$Suggestions:$" and enclose each suggestions like "$...$" compulsorily.
+    Also compulsorily generate your version of the optimized three address code with the heading: "$Optimization:$" in the end of the review.
+    All the optimized code must be in newlines.
+
+    Wrap each review in "=== REVIEW <n> ===" and "=== END REVIEW <n> ===",
+    using the same <n> as the program, and do not mix programs together.
+    """
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# ============================================================
+# PARALLEL COMPILATION
+# ============================================================
+
+def _get_pool():
+    # Spawned (not forked) children: gunicorn workers are multi-threaded
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=BATCH_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _compile_one(source_code):
+    """Runs in a pool process; each call gets its own workspace or pipes."""
+    return pipeline.compile_and_optimize(source_code)
+
+
+# ============================================================
+# MULTI-PROGRAM PROMPTS
+# ============================================================
+
+def build_batch_prompt(programs):
+    """`programs` is a list of (index, optimized_code) pairs."""
+    sections = [
+        f"=== PROGRAM {index} ===\n{code.strip()}\n=== END PROGRAM {index} ==="
+        for index, code in programs
+    ]
+    return BATCH_PROMPT_HEADER + "\n" + "\n\n".join(sections) + "\n"
+
+
+def split_batch_reply(reply_text):
+    """Map program index → that program's review text."""
+    reviews = {}
+    for match in re.finditer(r"=== REVIEW (\d+) ===\s*\n(.*?)=== END REVIEW \1 ===", reply_text, re.DOTALL):
+        reviews[int(match.group(1))] = match.group(2).strip()
+    return reviews
+
+
+def validate_batch_reply(reply_text, data):
+    if not split_batch_reply(reply_text):
+        raise ValueError("no === REVIEW n === sections")
+
+
+def group_programs(programs):
+    """Pack programs into prompts by count and by a rough character budget."""
+    groups, current, size = [], [], 0
+    for index, code in programs:
+        if current and (len(current) >= BATCH_PROGRAMS_PER_PROMPT or size + len(code) > BATCH_PROMPT_CHAR_BUDGET):
+            groups.append(current)
+            current, size = [], 0
+        current.append((index, code))
+        size += len(code)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def review_group(group):
+    """Review one packed prompt; programs missing from the reply are reviewed alone."""
+    reductions = {index: pipeline.reduce_tac(code) for index, code in group}
+    prompt = build_batch_prompt([(index, reductions[index][0]) for index, _ in group])
+    log.info(f"🤖 Sending {len(group)} programs to Gemini in one prompt...")
+    try:
+        _, (reply_text, _) = pipeline.request_gemini(
+            prompt, validate_batch_reply, max_output_tokens=BATCH_TOKENS_PER_PROGRAM * len(group)
+        )
+    except InvalidReply as e:
+        reply_text = e.reply[0]
+    except GeminiUnavailableError as e:
+        log.warning(f"⏳ Skipping LLM review of {len(group)} programs: {e}")
+        return {index: pipeline.build_pending_output(code, reductions[index]) for index, code in group}
+    reviews = split_batch_reply(reply_text)
+
+    results = {}
+    for index, code in group:
+        if index in reviews:
+            results[index] = pipeline.build_structured_output(reviews[index], code, reductions[index])
+        else:
+            log.warning(f"⚠️ Program {index} missing from batch reply, reviewing it alone")
+            results[index] = pipeline.review_tac(code)
+    return results
+
+
+# ============================================================
+# BATCH PIPELINE
+# ============================================================
+
+def run_batch(sources):
+    """
+    Compile, optimize and review every source in `sources`.
+    Returns one record per source, in input order; failed items carry
+    success=False and a message instead of the review fields.
+    """
+    results = [None] * len(sources)
+    keys = [None] * len(sources)
+
+    pending = []
+    for index, source_code in enumerate(sources):
+        if not source_code.strip():
+            results[index] = {"success": False, "message": "No source code provided."}
+            continue
+        if CACHE_ENABLED:
+            keys[index] = pipeline.pipeline_cache_key(source_code)
+            cached = result_cache.get(keys[index])
+            if cached is not None:
+                results[index] = cached
+                continue
+        pending.append(index)
+
+    if pending:
+        pipeline.ensure_executables()
+
+        with pipeline_slot():
+            pool = _get_pool()
+            with span("batch_compile"):
+                compiled = dict(zip(pending, pool.map(_compile_one, [sources[i] for i in pending])))
+
+            programs = []
+            for index in pending:
+                if compiled[index] is None:
+                    results[index] = {"success": False, "message": "Compiler or optimizer failed to run."}
+                else:
+                    programs.append((index, compiled[index][1]))
+
+            reviewed = {}
+            groups = group_programs(programs)
+            with ThreadPoolExecutor(max_workers=BATCH_PROMPT_THREADS) as executor:
+                for group_results in executor.map(review_group, groups):
+                    reviewed.update(group_results)
+
+            # One vectorized cost pass over every reviewed program in the batch
+            indexes = sorted(reviewed)
+            pipeline.attach_cost_analysis(
+                [reviewed[index] for index in indexes],
+                [compiled[index][0] for index in indexes],
+            )
+            pipeline.attach_equivalence(
+                [reviewed[index] for index in indexes],
+                [compiled[index][0] for index in indexes],
+            )
+            for index in indexes:
+                result = reviewed[index]
+                if result is None:
+                    result = {"success": False, "message": "Gemini review failed."}
+                results[index] = result
+                pipeline.publish_reports(sources[index], result)
+                if keys[index] and pipeline.is_cacheable(result):
+                    result_cache.put(keys[index], result)
+
+    for index, result in enumerate(results):
+        result.setdefault("success", True)
+        result["index"] = index
+    return results
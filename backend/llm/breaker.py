@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from collections import deque
+
+from llm import log
+from llm.metrics import Counter, register_collector
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+GEMINI_BREAKER_ENABLED = os.getenv("GEMINI_BREAKER_ENABLED", "1") != "0"
+# Outcomes older than this no longer count towards the failure rate
+GEMINI_BREAKER_WINDOW = float(os.getenv("GEMINI_BREAKER_WINDOW", "60"))
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "5"))
+GEMINI_BREAKER_FAILURE_RATE = float(os.getenv("GEMINI_BREAKER_FAILURE_RATE", "0.5"))
+# Attempts slower than this count as failures
+GEMINI_BREAKER_SLOW_SECONDS = float(os.getenv("GEMINI_BREAKER_SLOW_SECONDS", "20"))
+# How long the breaker stays open before letting one probe call through
+GEMINI_BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+# A probe that hasn't reported back by then is given up and another is allowed
+GEMINI_BREAKER_PROBE_TIMEOUT = float(os.getenv("GEMINI_BREAKER_PROBE_TIMEOUT", "90"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+breaker_rejections = Counter(
+    "neurofold_gemini_breaker_rejections_total",
+    "Gemini calls skipped because the circuit breaker was open.",
+)
+
+
+class GeminiUnavailableError(Exception):
+    """Raised when Gemini can't be asked for a review: circuit open or retries used up."""
+
+
+# ============================================================
+# CIRCUIT BREAKER
+# ============================================================
+
+class CircuitBreaker:
+    """
+    Closed: every call goes through and its outcome is recorded. Once at least
+    `min_calls` outcomes in the last `window` seconds fail (errors, timeouts,
+    5xx or slow replies) at `failure_rate` or more, the breaker opens and
+    calls are refused for `open_seconds`. Then it goes half-open and lets a
+    single probe through: success closes it, failure opens it again.
+    State is per worker process.
+    """
+
+    def __init__(self, window=GEMINI_BREAKER_WINDOW, min_calls=GEMINI_BREAKER_MIN_CALLS,
+                 failure_rate=GEMINI_BREAKER_FAILURE_RATE, slow_seconds=GEMINI_BREAKER_SLOW_SECONDS,
+                 open_seconds=GEMINI_BREAKER_OPEN_SECONDS, probe_timeout=GEMINI_BREAKER_PROBE_TIMEOUT,
+                 enabled=GEMINI_BREAKER_ENABLED):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.probe_timeout = probe_timeout
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes = deque()  # (monotonic time, failed)
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._probe_thread = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def _open(self, now, reason):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self._outcomes.clear()
+        log.warning(f"🔌 Gemini circuit open ({reason}); serving optimizer-only results for {self.open_seconds:.0f}s")
+
+    def allow(self):
+        """True if a call may go to Gemini now; in half-open state only the probe gets True."""
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    breaker_rejections.inc()
+                    return False
+                self._state = HALF_OPEN
+                self._probe_started = None
+            if self._probe_started is not None and now - self._probe_started < self.probe_timeout:
+                breaker_rejections.inc()
+                return False
+            self._probe_started = now
+            self._probe_thread = threading.get_ident()
+            log.info("🔌 Gemini circuit half-open, probing...")
+            return True
+
+    def release(self):
+        """
+        Call when a call that got allow() is over. If it was the half-open
+        probe and never recorded an outcome (throttled, limiter timeout,
+        cancelled), the next call may probe instead of waiting out
+        `probe_timeout`.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if (self._state == HALF_OPEN and self._probe_started is not None
+                    and self._probe_thread == threading.get_ident()):
+                self._probe_started = None
+                self._probe_thread = None
+
+    def record(self, ok, seconds=0.0):
+        """Record one attempt's outcome; slow successes count as failures."""
+        if not self.enabled:
+            return
+        failed = not ok or seconds > self.slow_seconds
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open(now, "probe failed")
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    self._probe_started = None
+                    log.info("🔌 Gemini circuit closed, reviews resumed")
+                return
+            if self._state == OPEN:
+                return
+
+            self._outcomes.append((now, failed))
+            while self._outcomes and now - self._outcomes[0][0] > self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _, f in self._outcomes if f)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now, f"{failures}/{len(self._outcomes)} recent calls failed or were slow")
+
+
+# The primary model's breaker; fallback models (GEMINI_MODELS) get their own
+gemini_breaker = CircuitBreaker()
+_fallback_breakers = {}
+_fallback_lock = threading.Lock()
+
+
+def fallback_breaker(model):
+    """Breaker of a fallback model, so an outage of one model doesn't stop calls to the others."""
+    with _fallback_lock:
+        breaker = _fallback_breakers.get(model)
+        if breaker is None:
+            breaker = _fallback_breakers[model] = CircuitBreaker()
+        return breaker
+
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _breaker_metrics():
+    lines = [
+        "# HELP neurofold_gemini_breaker_state Gemini circuit breaker state in this worker (0 closed, 1 half-open, 2 open).",
+        "# TYPE neurofold_gemini_breaker_state gauge",
+        f"neurofold_gemini_breaker_state {_STATE_VALUES[gemini_breaker.state]}",
+    ]
+    with _fallback_lock:
+        fallbacks = sorted(_fallback_breakers.items())
+    if fallbacks:
+        lines += [
+            "# HELP neurofold_gemini_fallback_breaker_state Circuit breaker state of each fallback model in this worker.",
+            "# TYPE neurofold_gemini_fallback_breaker_state gauge",
+        ]
+        lines += [f'neurofold_gemini_fallback_breaker_state{{model="{model}"}} {_STATE_VALUES[breaker.state]}'
+                  for model, breaker in fallbacks]
+    return lines
+
+
+register_collector(_breaker_metrics)
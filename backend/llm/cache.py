@@ -0,0 +1,245 @@
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from llm import log
+from llm.metrics import register_collector
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+CACHE_ENABLED = os.getenv("PIPELINE_CACHE_ENABLED", "1") != "0"
+CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "neurofold-cache"))
+CACHE_TTL = float(os.getenv("PIPELINE_CACHE_TTL", str(24 * 3600)))
+MEMORY_MAX_ENTRIES = int(os.getenv("PIPELINE_CACHE_MEMORY_ENTRIES", "256"))
+DISK_MAX_BYTES = int(os.getenv("PIPELINE_CACHE_DISK_BYTES", str(64 * 1024 * 1024)))
+
+
+# ============================================================
+# KEY HELPERS
+# ============================================================
+
+def normalize_source(source_code):
+    """Ignore differences that can't change the compiled program (line endings, trailing blanks)."""
+    lines = source_code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_key(source_code, *parts):
+    digest = hashlib.sha256()
+    digest.update(normalize_source(source_code).encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(str(part).encode("utf-8"))
+    return digest.hexdigest()
+
+
+_fingerprints = {}
+
+
+def file_fingerprint(path):
+    """Content hash of a file, recomputed only when its size or mtime changes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        fingerprint = hashlib.sha256(f.read()).hexdigest()[:16]
+    _fingerprints[path] = (stamp, fingerprint)
+    return fingerprint
+
+
+# ============================================================
+# TWO-TIER RESULT CACHE
+# ============================================================
+
+class ResultCache:
+    """
+    In-memory LRU in front of an on-disk store shared by every gunicorn worker.
+    Both tiers expire entries after `ttl` seconds; the disk tier also evicts
+    the least recently used files once it grows past `disk_max_bytes`.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL,
+                 memory_max_entries=MEMORY_MAX_ENTRIES, disk_max_bytes=DISK_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    # ---------------- memory tier ----------------
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key, value, stored_at):
+        with self._lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_max_entries:
+                self._memory.popitem(last=False)
+
+    # ---------------- disk tier ----------------
+
+    def _disk_get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        stored_at = entry.get("stored_at", 0)
+        if time.time() - stored_at > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used for eviction
+        except OSError:
+            pass
+        return stored_at, entry.get("value")
+
+    def _disk_put(self, key, value, stored_at):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": stored_at, "value": value}, f)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        # Oldest access first
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self._count("evictions")
+        except OSError:
+            pass
+
+    # ---------------- public API ----------------
+
+    def get(self, key):
+        value = self._memory_get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return copy.deepcopy(value)
+
+        entry = self._disk_get(key)
+        if entry is not None and entry[1] is not None:
+            self._count("disk_hits")
+            stored_at, value = entry
+            self._memory_put(key, value, stored_at)
+            return copy.deepcopy(value)
+
+        self._count("misses")
+        return None
+
+    def put(self, key, value):
+        stored_at = time.time()
+        value = copy.deepcopy(value)
+        self._memory_put(key, value, stored_at)
+        try:
+            self._disk_put(key, value, stored_at)
+        except OSError as e:
+            log.warning(f"⚠️ Could not write cache entry {key[:12]}: {e}")
+        self._count("stores")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+result_cache = ResultCache()
+
+
+def _cache_metrics():
+    stats = result_cache.stats()
+    return [
+        "# HELP neurofold_cache_lookups_total Result cache lookups by outcome.",
+        "# TYPE neurofold_cache_lookups_total counter",
+        f'neurofold_cache_lookups_total{{outcome="memory_hit"}} {stats["memory_hits"]}',
+        f'neurofold_cache_lookups_total{{outcome="disk_hit"}} {stats["disk_hits"]}',
+        f'neurofold_cache_lookups_total{{outcome="miss"}} {stats["misses"]}',
+        "# HELP neurofold_cache_stores_total Results stored in the cache.",
+        "# TYPE neurofold_cache_stores_total counter",
+        f"neurofold_cache_stores_total {stats['stores']}",
+        "# HELP neurofold_cache_evictions_total Cache entries evicted.",
+        "# TYPE neurofold_cache_evictions_total counter",
+        f"neurofold_cache_evictions_total {stats['evictions']}",
+        "# HELP neurofold_cache_memory_entries Entries in this worker's memory tier.",
+        "# TYPE neurofold_cache_memory_entries gauge",
+        f"neurofold_cache_memory_entries {stats['memory_entries']}",
+    ]
+
+
+register_collector(_cache_metrics)
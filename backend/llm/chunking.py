@@ -0,0 +1,73 @@
+import os
+import re
+
+from llm.tac_passes import Instruction
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Reduced TAC longer than this many characters (~4 per token) is reviewed in
+# chunks, so each reply's $Optimization:$ section fits the output-token cap.
+REVIEW_CHUNKING = os.getenv("REVIEW_CHUNKING", "1") != "0"
+REVIEW_CHUNK_CHAR_BUDGET = int(os.getenv("REVIEW_CHUNK_CHAR_BUDGET", "12000"))
+REVIEW_CHUNK_THREADS = int(os.getenv("REVIEW_CHUNK_THREADS", "4"))
+
+_LISTING_FUNCTIONS = re.compile(r"^(?=FUNCTION )", re.MULTILINE)
+_BLOCK_ENDS = {"goto", "branch", "return"}
+
+
+# ============================================================
+# SPLITTING
+# ============================================================
+
+def split_listing(listing):
+    """Cut a TAC listing into one piece per FUNCTION, each keeping its trailing blank lines."""
+    return [piece for piece in _LISTING_FUNCTIONS.split(listing) if piece.strip()]
+
+
+def split_blocks(function_listing):
+    """Cut one function's listing into basic blocks: a label starts one, a jump or return ends one."""
+    blocks = []
+    current = []
+    for line in function_listing.splitlines(keepends=True):
+        kind = Instruction.parse(line).kind
+        if kind == "label" and current:
+            blocks.append("".join(current))
+            current = []
+        current.append(line)
+        if kind in _BLOCK_ENDS:
+            blocks.append("".join(current))
+            current = []
+    if current:
+        blocks.append("".join(current))
+    return blocks
+
+
+def chunk_tac(tac_code, budget=None):
+    """
+    Cut a TAC listing into chunks of at most `budget` characters, in order.
+    Whole functions are packed together where they fit; a function that
+    doesn't is cut into basic blocks, and a block that doesn't into lines.
+    """
+    budget = budget or REVIEW_CHUNK_CHAR_BUDGET
+    pieces = []
+    for function_listing in split_listing(tac_code):
+        if len(function_listing) <= budget:
+            pieces.append(function_listing)
+            continue
+        for block in split_blocks(function_listing):
+            if len(block) <= budget:
+                pieces.append(block)
+            else:
+                pieces.extend(block.splitlines(keepends=True))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > budget:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,135 @@
+import re
+
+import numpy as np
+
+# ============================================================
+# COST MODEL
+# ============================================================
+# Same per-instruction weights the TAC cost chart has always used, checked in
+# the same priority order (first match wins).
+OPCODES = [
+    ("multiplication", 10),
+    ("division", 10),
+    ("modulo", 9),
+    ("addition", 5),
+    ("subtraction", 5),
+    ("assignment", 3),
+    ("return", 2),
+    ("comparison", 4),
+    ("control_flow", 2),
+    ("other", 1),
+]
+OPCODE_NAMES = [name for name, _ in OPCODES]
+OPCODE_COSTS = np.array([cost for _, cost in OPCODES], dtype=np.int32)
+OTHER = len(OPCODES) - 1
+# Whole words only, like the client's /\bif\b|\bgoto\b|\blabel\b/: names such
+# as "labels" or "goto_end" are not control flow
+CONTROL_FLOW = re.compile(r"\b(if|goto|label)\b", re.I)
+
+# Listings shown side by side, oldest first; missing ones are skipped
+VERSIONS = ("unoptimized", "optimized", "llm")
+
+
+def _contains(lines, needle):
+    return np.char.find(lines, needle) >= 0
+
+
+def encode_lines(lines):
+    """
+    Classify TAC lines into a compact uint8 opcode array. All lines of all
+    listings go through one set of vectorized string tests.
+    """
+    if len(lines) == 0:
+        return np.zeros(0, dtype=np.uint8)
+
+    lines = np.char.lower(np.char.strip(np.asarray(lines, dtype=str)))
+    has_eq = _contains(lines, "=")
+    conditions = [
+        _contains(lines, "*") | _contains(lines, "mult"),
+        _contains(lines, "/") | _contains(lines, "div"),
+        _contains(lines, "%") | _contains(lines, "mod"),
+        _contains(lines, "+") & ~_contains(lines, "++"),
+        _contains(lines, "-") & ~_contains(lines, "--") & ~_contains(lines, "->"),
+        has_eq & ~_contains(lines, "==") & ~_contains(lines, "!="),
+        _contains(lines, "return"),
+        _contains(lines, "==") | _contains(lines, "!=") | _contains(lines, "<") | _contains(lines, ">"),
+        np.array([CONTROL_FLOW.search(line) is not None for line in lines], dtype=bool),
+    ]
+    choices = list(range(len(conditions)))
+    return np.select(conditions, choices, default=OTHER).astype(np.uint8)
+
+
+def _split_lines(code):
+    if not code or not isinstance(code, str):
+        return []
+    return [line for line in code.split("\n") if line.strip()]
+
+
+# ============================================================
+# BATCHED ANALYSIS
+# ============================================================
+
+def analyze_programs(programs):
+    """
+    `programs` is a list of {version: tac_code} dicts (versions from VERSIONS).
+    Every listing of every program is encoded and costed in one pass; returns
+    one analysis per program with per-version series, totals, averages and
+    opcode counts, plus the before/after-LLM improvements.
+    """
+    listings = []  # (program index, version, line count)
+    all_lines = []
+    for index, program in enumerate(programs):
+        for version in VERSIONS:
+            if version in program and program[version] is not None:
+                lines = _split_lines(program[version])
+                listings.append((index, version, len(lines)))
+                all_lines.extend(lines)
+
+    opcodes = encode_lines(all_lines)
+    costs = OPCODE_COSTS[opcodes]
+
+    counts = np.array([count for _, _, count in listings], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    running = np.concatenate(([0], np.cumsum(costs, dtype=np.int64)))
+    totals = running[offsets[1:]] - running[offsets[:-1]]
+
+    listing_ids = np.repeat(np.arange(len(listings)), counts)
+    type_counts = np.bincount(
+        listing_ids * len(OPCODES) + opcodes, minlength=len(listings) * len(OPCODES)
+    ).reshape(len(listings), len(OPCODES))
+
+    results = [{"versions": {}} for _ in programs]
+    for listing, (index, version, count) in enumerate(listings):
+        start, end = offsets[listing], offsets[listing + 1]
+        total = int(totals[listing])
+        results[index]["versions"][version] = {
+            "instructions": count,
+            "total_cost": total,
+            "avg_cost": round(total / count, 2) if count else 0.0,
+            "costs": costs[start:end].tolist(),
+            "types": {
+                OPCODE_NAMES[op]: int(n) for op, n in enumerate(type_counts[listing]) if n
+            },
+        }
+
+    for result in results:
+        result["improvements"] = _improvements(result["versions"].get("optimized"), result["versions"].get("llm"))
+    return results
+
+
+def _improvements(before, after):
+    if not before or not after:
+        return None
+
+    def reduction(old, new):
+        return round((old - new) / old * 100, 1) if old else 0.0
+
+    return {
+        "cost_reduction": reduction(before["total_cost"], after["total_cost"]),
+        "instruction_reduction": reduction(before["instructions"], after["instructions"]),
+        "avg_cost_reduction": reduction(before["avg_cost"], after["avg_cost"]),
+    }
+
+
+def analyze_program(unoptimized=None, optimized=None, llm=None):
+    return analyze_programs([{"unoptimized": unoptimized, "optimized": optimized, "llm": llm}])[0]
@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from llm import log
+from llm.metrics import Counter, Histogram, bind_timings
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Seconds the models asked so far may take before the next one in
+# GEMINI_MODELS (llm/LLM.py) is asked as well
+GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "8"))
+# Threads running model calls while the request thread waits on them (per worker)
+GEMINI_HEDGE_THREADS = int(os.getenv("GEMINI_HEDGE_THREADS", "16"))
+# Recent latencies kept per model for the /gemini/stats percentiles
+GEMINI_MODEL_STATS_WINDOW = int(os.getenv("GEMINI_MODEL_STATS_WINDOW", "500"))
+
+model_latency = Histogram(
+    "neurofold_gemini_model_latency_seconds",
+    "Latency of Gemini model calls that returned a reply, hedges included.",
+    ["model"],
+)
+model_calls = Counter(
+    "neurofold_gemini_model_calls_total",
+    "Gemini model calls by outcome (won, invalid, error, cancelled).",
+    ["model", "outcome"],
+)
+
+
+class HedgeCancelled(Exception):
+    """Raised inside a model call once another model's reply has won."""
+
+
+class HedgeCancel:
+    """
+    threading.Event-like flag handed to each hedged call. Callbacks added
+    with on_cancel run when it is set, so a losing call can give back its
+    limiter lease and abort the request it has on the wire.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def set(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.warning(f"⚠️ Could not cancel hedged call: {e}")
+
+    def on_cancel(self, callback):
+        """Run `callback` once cancelled (now, if already); returns a function that removes it."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class InvalidReply(ValueError):
+    """No model's reply passed validation; `model` and `reply` are the first model's invalid one."""
+
+    def __init__(self, message, model, reply):
+        super().__init__(message)
+        self.model = model
+        self.reply = reply
+
+
+# ============================================================
+# PER-MODEL STATS
+# ============================================================
+
+class ModelStats:
+    """Call counts, wins and recent latencies per model, for /gemini/stats (per worker)."""
+
+    def __init__(self, window=GEMINI_MODEL_STATS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def record(self, model, outcome, seconds=None):
+        model_calls.inc(model=model, outcome=outcome)
+        if seconds is not None:
+            model_latency.observe(seconds, model=model)
+        with self._lock:
+            stats = self._models.get(model)
+            if stats is None:
+                stats = self._models[model] = {"calls": 0, "outcomes": {}, "latencies": deque(maxlen=self.window)}
+            stats["calls"] += 1
+            stats["outcomes"][outcome] = stats["outcomes"].get(outcome, 0) + 1
+            if seconds is not None:
+                stats["latencies"].append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            models = {model: (stats["calls"], dict(stats["outcomes"]), sorted(stats["latencies"]))
+                      for model, stats in self._models.items()}
+
+        def percentile(latencies, q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1)
+
+        snapshot = {}
+        for model, (calls, outcomes, latencies) in models.items():
+            wins = outcomes.get("won", 0)
+            snapshot[model] = {
+                "calls": calls,
+                "wins": wins,
+                "win_rate": round(wins / calls, 3) if calls else 0.0,
+                "outcomes": outcomes,
+                "latency_ms": {
+                    "p50": percentile(latencies, 0.5),
+                    "p95": percentile(latencies, 0.95),
+                    "p99": percentile(latencies, 0.99),
+                } if latencies else None,
+            }
+        return snapshot
+
+
+model_stats = ModelStats()
+
+
+# ============================================================
+# HEDGED CALLS
+# ============================================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Created lazily so each gunicorn worker gets its own threads after the fork
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=GEMINI_HEDGE_THREADS, thread_name_prefix="gemini-hedge")
+        return _executor
+
+
+def run_hedged(calls, validate, hedge_after=GEMINI_HEDGE_AFTER):
+    """
+    `calls` is a list of (model, fn) in order of preference; `fn(cancel)`
+    returns a reply and should give up (raise HedgeCancelled) once the
+    HedgeCancel `cancel` is set. The first call starts right away; the next one
+    starts when those already running have taken `hedge_after` seconds or all
+    failed. The first reply `validate(reply)` accepts (it raises ValueError
+    otherwise) wins: returns (model, reply) and cancels the rest.
+    If no reply is accepted, raises InvalidReply, or the first call's error.
+    """
+    cancel = HedgeCancel()
+    queue = list(enumerate(calls))
+    pending = {}     # future -> (index, model, started)
+    invalid = []     # (index, model, reply)
+    errors = []      # (index, error)
+
+    def finish(index, model, started, outcome):
+        """Returns the reply if `outcome` (a thunk) produced one that validates."""
+        try:
+            reply = outcome()
+        except Exception as e:
+            model_stats.record(model, "error")
+            errors.append((index, e))
+            return None
+        # Measured after outcome(): on the single-model path it makes the call
+        elapsed = time.monotonic() - started
+        try:
+            validate(reply)
+        except ValueError as e:
+            log.warning(f"⚠️ Invalid reply from {model}: {e}")
+            model_stats.record(model, "invalid", elapsed)
+            invalid.append((index, model, reply))
+            return None
+        model_stats.record(model, "won", elapsed)
+        return reply
+
+    # A single model needs no threads
+    if len(calls) == 1:
+        model, fn = calls[0]
+        started = time.monotonic()
+        reply = finish(0, model, started, lambda: fn(cancel))
+        if reply is not None:
+            return model, reply
+    else:
+        executor = _get_executor()
+
+        def launch():
+            index, (model, fn) = queue.pop(0)
+            if index:
+                log.info(f"🪁 Hedging Gemini call on {model}")
+            # The call's spans go to the request's ?timings=1 collector, not the pool thread's
+            pending[executor.submit(bind_timings(fn), cancel)] = (index, model, time.monotonic())
+
+        launch()
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=hedge_after if queue else None, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for future in sorted(done, key=lambda f: pending[f][0]):
+                    index, model, started = pending.pop(future)
+                    reply = finish(index, model, started, future.result)
+                    if reply is not None:
+                        if pending:
+                            log.info(f"🪁 {model} won the hedge")
+                        return model, reply
+                # Everything asked so far failed: don't wait for the timer
+                if not pending and queue:
+                    launch()
+        finally:
+            # Losers give back their limiter lease and drop the request they have on the wire
+            cancel.set()
+            for index, model, _ in pending.values():
+                model_stats.record(model, "cancelled")
+
+    if invalid:
+        _, model, reply = min(invalid, key=lambda item: item[0])
+        raise InvalidReply(f"No valid reply from {', '.join(model for model, _ in calls)}", model, reply)
+    raise min(errors, key=lambda item: item[0])[1]
@@ -0,0 +1,142 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import llm.LLM as pipeline
+from llm import log
+from llm.metrics import span
+from llm.cache import result_cache, CACHE_ENABLED
+from llm.chunking import split_listing
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Per-function entries live in the result cache, so this needs it enabled
+INCREMENTAL_ENABLED = CACHE_ENABLED and os.getenv("PIPELINE_INCREMENTAL", "1") != "0"
+# Smaller programs gain nothing from splitting and go through the whole-program path
+INCREMENTAL_MIN_FUNCTIONS = int(os.getenv("PIPELINE_INCREMENTAL_MIN_FUNCTIONS", "2"))
+INCREMENTAL_REVIEW_THREADS = int(os.getenv("PIPELINE_INCREMENTAL_THREADS", "4"))
+
+# String and character literals are matched whole so braces inside them don't count
+_BRACE_TOKENS = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|[{}]')
+_FUNCTION_NAME = re.compile(r"\s*\w+\s+(\w+)\s*\(")
+
+
+# ============================================================
+# SPLITTING
+# ============================================================
+
+def split_functions(source_code):
+    """
+    Split a program into its top-level functions by brace depth. Returns
+    [(name, source), ...], or None when the braces don't balance or there is
+    anything but functions at the top level; the caller then compiles the
+    program whole so the compiler reports the error as usual.
+    """
+    units = []
+    depth = 0
+    start = 0
+    for token in _BRACE_TOKENS.finditer(source_code):
+        brace = token.group()
+        if brace == "{":
+            depth += 1
+        elif brace == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0:
+                unit = source_code[start:token.end()]
+                match = _FUNCTION_NAME.match(unit)
+                if match is None:
+                    return None
+                units.append((match.group(1), unit.strip()))
+                start = token.end()
+
+    if depth != 0 or source_code[start:].strip():
+        return None
+    return units
+
+
+# ============================================================
+# INCREMENTAL PIPELINE
+# ============================================================
+
+def function_cache_key(function_source):
+    return pipeline.pipeline_cache_key(function_source, "function")
+
+
+def compile_functions(units):
+    """
+    Compile and optimize `units` in one run of the C stages and cut the output
+    back into per-function (ir_code, optimized_code) pairs. Functions don't
+    share state in either stage, so each piece matches a standalone compile up
+    to temp and label numbering. Falls back to one run per function if the
+    listings don't split cleanly; returns None when any function fails.
+    """
+    compiled = pipeline.compile_and_optimize("\n".join(source for _, source in units) + "\n")
+    if compiled is not None:
+        ir_pieces, optimized_pieces = split_listing(compiled[0]), split_listing(compiled[1])
+        if len(ir_pieces) == len(optimized_pieces) == len(units):
+            return list(zip(ir_pieces, optimized_pieces))
+
+    results = []
+    for name, function_source in units:
+        compiled = pipeline.compile_and_optimize(function_source)
+        if compiled is None:
+            log.error(f"❌ Function '{name}' failed to compile")
+            return None
+        results.append(compiled)
+    return results
+
+
+def _review_function(name, optimized_code):
+    try:
+        return pipeline.request_review(optimized_code)[1]
+    except Exception as e:
+        log.error(f"❌ Review of function '{name}' failed: {e}")
+        return pipeline.build_structured_output("", optimized_code)
+
+
+def run_incremental(units, on_stage=None):
+    """
+    Compile, optimize and review a program function by function. IR, optimized
+    IR and review are cached per function under a hash of its source, so a
+    resubmission only recompiles and re-reviews the functions that changed and
+    the response is assembled from cached and fresh pieces in program order.
+    Temps and labels are numbered per function. The caller holds the pipeline slot.
+    """
+    keys = [function_cache_key(function_source) for _, function_source in units]
+    with span("cache_lookup"):
+        entries = [result_cache.get(key) for key in keys]
+    stale = [i for i, entry in enumerate(entries) if entry is None]
+    log.info(f"🧩 {len(units)} functions: {len(units) - len(stale)} cached, {len(stale)} to recompile")
+
+    if stale:
+        compiled = compile_functions([units[i] for i in stale])
+        if compiled is None:
+            return {"success": False, "message": "Compiler or optimizer failed to run."}
+        for i, (function_ir, function_optimized) in zip(stale, compiled):
+            entries[i] = {"ir_code": function_ir, "optimized_code": function_optimized, "review": None}
+
+    ir_code = "".join(entry["ir_code"] for entry in entries)
+    pipeline._notify(on_stage, "compiled", {"ir_code": ir_code})
+    pipeline._notify(on_stage, "optimized", {"unoptimized_code": "".join(entry["optimized_code"] for entry in entries)})
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=min(INCREMENTAL_REVIEW_THREADS, len(stale))) as executor:
+            reviews = list(executor.map(
+                lambda i: _review_function(units[i][0], entries[i]["optimized_code"]), stale
+            ))
+        for i, review in zip(stale, reviews):
+            entries[i]["review"] = review
+            if pipeline.is_cacheable(review):
+                result_cache.put(keys[i], entries[i])
+
+    json_result = pipeline.merge_structured_outputs(
+        [entry["review"] for entry in entries],
+        [f"FUNCTION {name}" for name, _ in units],
+    )
+    pipeline.attach_cost_analysis([json_result], [ir_code])
+    pipeline.attach_equivalence([json_result], [ir_code])
+    pipeline._notify(on_stage, "reviewed", json_result)
+    return json_result
@@ -0,0 +1,180 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from llm import log
+from llm.LLM import LLM
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+# Snapshots live on disk so any gunicorn worker can answer GET /jobs/<id>
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(tempfile.gettempdir(), "neurofold-jobs"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs = {}
+_changed = threading.Condition()
+
+
+# ============================================================
+# JOB STATE
+# ============================================================
+
+def _job_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def _save(job):
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    path = _job_path(job["id"])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(tmp_path, path)
+
+
+def _update(job_id, **fields):
+    with _changed:
+        job = _jobs[job_id]
+        job.update(fields)
+        job["updated_at"] = time.time()
+        _save(job)
+        _changed.notify_all()
+
+
+def _add_event(job_id, stage, data=None):
+    with _changed:
+        job = _jobs[job_id]
+        job["stage"] = stage
+        job["events"].append({"stage": stage, "at": time.time(), "data": data or {}})
+        job["updated_at"] = time.time()
+        _save(job)
+        _changed.notify_all()
+
+
+def get_job(job_id):
+    """Return a job snapshot from this worker's memory or the shared job directory."""
+    with _changed:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return json.loads(json.dumps(job))
+
+    try:
+        with open(_job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _expire_jobs():
+    now = time.time()
+    with _changed:
+        for job_id in [j for j, job in _jobs.items()
+                       if job["status"] in ("done", "failed") and now - job["updated_at"] > JOB_TTL]:
+            del _jobs[job_id]
+
+    if not os.path.isdir(JOBS_DIR):
+        return
+    for name in os.listdir(JOBS_DIR):
+        path = os.path.join(JOBS_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > JOB_TTL:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def _run_job(job_id, source_code):
+    _update(job_id, status="running")
+    _add_event(job_id, "running")
+
+    try:
+        result = LLM(source_code, on_stage=lambda stage, data: _add_event(job_id, stage, data))
+    except Exception as e:
+        log.error(f"❌ Job {job_id} failed: {e}")
+        _update(job_id, status="failed", error=str(e))
+        return
+
+    if isinstance(result, dict) and result.get("success") is False:
+        _update(job_id, status="failed", error=result.get("message"), result=result)
+    else:
+        _update(job_id, status="done", result=result)
+
+
+def submit_job(source_code):
+    """Queue a pipeline run and return its job id immediately."""
+    _expire_jobs()
+
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    job = {
+        "id": job_id,
+        "status": "queued",
+        "stage": "queued",
+        "events": [{"stage": "queued", "at": now, "data": {}}],
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    with _changed:
+        _jobs[job_id] = job
+        _save(job)
+
+    _executor.submit(_run_job, job_id, source_code)
+    return job_id
+
+
+# ============================================================
+# SERVER-SENT EVENTS
+# ============================================================
+
+def sse_frame(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_job_events(job_id, poll_interval=0.25, heartbeat=15):
+    """
+    Yield SSE frames for every stage of `job_id` as it completes
+    (queued, running, compiled, optimized, reviewed), ending with
+    a `done` or `failed` frame. Jobs owned by another worker are followed by
+    polling the shared snapshot file.
+    """
+    sent = 0
+    last_frame = time.time()
+
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            yield sse_frame("failed", {"error": "Unknown job"})
+            return
+
+        for event in job["events"][sent:]:
+            yield sse_frame(event["stage"], event)
+            last_frame = time.time()
+        sent = len(job["events"])
+
+        if job["status"] in ("done", "failed"):
+            yield sse_frame(job["status"], {"result": job["result"], "error": job["error"]})
+            return
+
+        if time.time() - last_frame > heartbeat:
+            yield ": keep-alive\n\n"
+            last_frame = time.time()
+
+        with _changed:
+            if job_id in _jobs and len(_jobs[job_id]["events"]) == sent \
+                    and _jobs[job_id]["status"] not in ("done", "failed"):
+                _changed.wait(timeout=heartbeat)
+            elif job_id not in _jobs:
+                _changed.wait(timeout=poll_interval)
@@ -0,0 +1,34 @@
+import os
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# LOG_LEVEL=debug brings back the full compiler output and JSON dumps;
+# warning or error keeps the hot path quiet under load.
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+LOG_LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "info").lower(), LEVELS["info"])
+
+
+def enabled(level):
+    """Check before building an expensive message (e.g. json.dumps of a result)."""
+    return LEVELS[level] >= LOG_LEVEL
+
+
+def debug(*args, **kwargs):
+    if enabled("debug"):
+        print(*args, **kwargs)
+
+
+def info(*args, **kwargs):
+    if enabled("info"):
+        print(*args, **kwargs)
+
+
+def warning(*args, **kwargs):
+    if enabled("warning"):
+        print(*args, **kwargs)
+
+
+def error(*args, **kwargs):
+    if enabled("error"):
+        print(*args, **kwargs)
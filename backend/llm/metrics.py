@@ -0,0 +1,190 @@
+import contextlib
+import threading
+import time
+
+# ============================================================
+# METRIC TYPES
+# ============================================================
+# Minimal Prometheus text-format metrics. Values are per worker process,
+# like the cache counters; scrape every worker or aggregate by instance.
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                names = self.labelnames + ("le",)
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_label_text(names, key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_label_text(names, key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+# ============================================================
+# PIPELINE METRICS
+# ============================================================
+
+stage_seconds = Histogram(
+    "neurofold_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"],
+)
+request_seconds = Histogram(
+    "neurofold_request_duration_seconds",
+    "HTTP request latency by endpoint.",
+    ["endpoint", "status"],
+)
+gemini_attempts = Counter(
+    "neurofold_gemini_attempts_total",
+    "Gemini API calls by outcome (ok, rate_limited, unavailable, bad_request, error, timeout, connection_error, throttled).",
+    ["outcome"],
+)
+gemini_retries = Counter(
+    "neurofold_gemini_retries_total",
+    "Gemini API retries by reason.",
+    ["reason"],
+)
+gemini_json_reviews = Counter(
+    "neurofold_gemini_json_reviews_total",
+    "JSON-mode review replies by outcome (ok, invalid, fallback to the free-text prompt).",
+    ["outcome"],
+)
+
+# Extra sources rendered at scrape time, e.g. the result cache counters
+_collectors = []
+
+
+def register_collector(collect):
+    """`collect()` returns extra Prometheus text lines for /metrics."""
+    _collectors.append(collect)
+
+
+def render_metrics():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================
+# TIMING SPANS
+# ============================================================
+
+_current = threading.local()
+
+
+@contextlib.contextmanager
+def collect_timings():
+    """
+    Collect the spans recorded on this thread while the block runs, for the
+    optional per-response `timings` field. Yields a list of {stage, ms}.
+    """
+    previous = getattr(_current, "spans", None)
+    spans = []
+    _current.spans = spans
+    try:
+        yield spans
+    finally:
+        _current.spans = previous
+
+
+def bind_timings(fn):
+    """
+    Wrap `fn` so that, run on another thread (e.g. a hedged Gemini call), its
+    spans still land in the collector active on this thread.
+    """
+    spans = getattr(_current, "spans", None)
+
+    def run(*args, **kwargs):
+        previous = getattr(_current, "spans", None)
+        _current.spans = spans
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.spans = previous
+
+    return run
+
+
+def record_stage(stage, seconds):
+    """Record a duration measured elsewhere (e.g. reported by the C stages)."""
+    stage_seconds.observe(seconds, stage=stage)
+    spans = getattr(_current, "spans", None)
+    if spans is not None:
+        spans.append({"stage": stage, "ms": round(seconds * 1000, 3)})
+
+
+@contextlib.contextmanager
+def span(stage):
+    """Time a pipeline stage into the stage histogram and the current collector."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def timings_summary(spans, total_seconds=None):
+    summary = {"stages": list(spans)}
+    if total_seconds is not None:
+        summary["total_ms"] = round(total_seconds * 1000, 3)
+    return summary
@@ -0,0 +1,105 @@
+import ctypes
+import json
+import os
+import threading
+
+from llm import log
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIBRARY_PATH = os.getenv(
+    "NEUROFOLD_LIBRARY",
+    os.path.join(BASE_DIR, "compiler", "libneurofold.so"),
+)
+# Set PIPELINE_NATIVE=0 to always use the compiler/optimizer executables
+NATIVE_ENABLED = os.getenv("PIPELINE_NATIVE", "1") != "0"
+
+NF_OK = 0
+NF_PARSE_ERROR = 1
+NF_SEMANTIC_ERROR = 2
+
+_lib = None
+_load_failed = False
+_load_lock = threading.Lock()
+# The C stages keep global symbol/constant tables, so only one call at a time.
+# ctypes drops the GIL for the call itself, so other request threads keep running.
+_call_lock = threading.Lock()
+
+
+class NativeCompileError(Exception):
+    """The source was rejected by the parser or semantic analysis."""
+
+
+def _load():
+    global _lib, _load_failed
+    with _load_lock:
+        if _lib is not None or _load_failed:
+            return _lib
+        try:
+            lib = ctypes.CDLL(LIBRARY_PATH)
+        except OSError as e:
+            log.warning(f"⚠️ Native optimizer library unavailable ({e}); using executables")
+            _load_failed = True
+            return None
+
+        lib.nf_run.argtypes = [
+            ctypes.c_char_p,
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.POINTER(ctypes.c_void_p),
+        ]
+        lib.nf_run.restype = ctypes.c_int
+        lib.nf_free.argtypes = [ctypes.c_void_p]
+        lib.nf_free.restype = None
+
+        _lib = lib
+        log.info(f"✅ Loaded native optimizer library {LIBRARY_PATH}")
+        return _lib
+
+
+def available():
+    return NATIVE_ENABLED and _load() is not None
+
+
+def _take_string(lib, pointer):
+    if not pointer.value:
+        return ""
+    try:
+        return ctypes.string_at(pointer.value).decode("utf-8", errors="replace")
+    finally:
+        lib.nf_free(pointer.value)
+
+
+def compile_and_optimize(source_code):
+    """
+    Compile and constant-fold `source_code` inside this process.
+    Returns (ir_code, optimized_code, stats). Raises NativeCompileError when
+    the program does not compile.
+    """
+    lib = _load()
+    if lib is None:
+        raise RuntimeError("Native optimizer library is not loaded")
+
+    ir_ptr, optimized_ptr, stats_ptr = ctypes.c_void_p(), ctypes.c_void_p(), ctypes.c_void_p()
+    with _call_lock:
+        status = lib.nf_run(
+            source_code.encode("utf-8"),
+            ctypes.byref(ir_ptr),
+            ctypes.byref(optimized_ptr),
+            ctypes.byref(stats_ptr),
+        )
+
+    ir_code = _take_string(lib, ir_ptr)
+    optimized_code = _take_string(lib, optimized_ptr)
+    stats_text = _take_string(lib, stats_ptr)
+
+    if status == NF_PARSE_ERROR:
+        raise NativeCompileError("Parse error")
+    if status == NF_SEMANTIC_ERROR:
+        raise NativeCompileError("Semantic analysis failed")
+    if status != NF_OK:
+        raise RuntimeError(f"Native optimizer failed with status {status}")
+
+    return ir_code, optimized_code, json.loads(stats_text) if stats_text else {}
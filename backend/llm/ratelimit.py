@@ -0,0 +1,283 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from llm import log
+from llm.metrics import Counter, register_collector
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# One SQLite file holds the limiter state for every gunicorn worker on the host
+GEMINI_LIMITER_ENABLED = os.getenv("GEMINI_LIMITER_ENABLED", "1") != "0"
+GEMINI_LIMITER_DB = os.getenv(
+    "GEMINI_LIMITER_DB", os.path.join(tempfile.gettempdir(), "neurofold-gemini-limiter.sqlite3")
+)
+GEMINI_RATE = float(os.getenv("GEMINI_RATE", "5"))        # tokens (calls) refilled per second
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", "10"))      # bucket size
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+# How long a call may wait for the limiter before giving up
+GEMINI_LIMITER_TIMEOUT = float(os.getenv("GEMINI_LIMITER_TIMEOUT", "30"))
+# In-flight leases of a crashed worker are dropped after this long
+GEMINI_LEASE_TTL = float(os.getenv("GEMINI_LEASE_TTL", "90"))
+
+# Sleep bounds while waiting on a full concurrency window
+_POLL_MIN = 0.02
+_POLL_MAX = 0.25
+
+gemini_coalesced = Counter(
+    "neurofold_gemini_coalesced_total",
+    "Gemini calls answered by an identical call already in flight.",
+)
+
+
+# ============================================================
+# SHARED LIMITER
+# ============================================================
+
+class GeminiLimiter:
+    """
+    Token bucket plus an AIMD concurrency window, shared across processes
+    through SQLite. A 429/503 halves the window (once per cooldown) and makes
+    every worker wait out the cooldown; each success grows it back by about
+    one call per window. If the database can't be used the limiter fails open.
+    """
+
+    def __init__(self, path=GEMINI_LIMITER_DB, rate=GEMINI_RATE, burst=GEMINI_BURST,
+                 max_concurrency=GEMINI_MAX_CONCURRENCY, lease_ttl=GEMINI_LEASE_TTL,
+                 enabled=GEMINI_LIMITER_ENABLED):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.lease_ttl = lease_ttl
+        self.enabled = enabled
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bucket (id INTEGER PRIMARY KEY CHECK (id = 1), "
+                "tokens REAL, refilled_at REAL, concurrency REAL, cooldown_until REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (id INTEGER PRIMARY KEY AUTOINCREMENT, expires_at REAL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO bucket VALUES (1, ?, ?, ?, 0)",
+                (self.burst, time.time(), float(self.max_concurrency)),
+            )
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across workers
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _try_acquire(self):
+        """Returns (lease_id, 0), or (None, seconds to wait); None seconds means the window is full."""
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, refilled_at, concurrency, cooldown_until = conn.execute(
+                "SELECT tokens, refilled_at, concurrency, cooldown_until FROM bucket"
+            ).fetchone()
+            if now < cooldown_until:
+                return None, cooldown_until - now
+
+            tokens = min(self.burst, tokens + (now - refilled_at) * self.rate)
+            conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+            inflight = conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+            if inflight >= int(concurrency):
+                wait = None
+            elif tokens < 1:
+                wait = (1 - tokens) / self.rate
+            else:
+                tokens -= 1
+                wait = 0
+            conn.execute("UPDATE bucket SET tokens = ?, refilled_at = ?", (tokens, now))
+            if wait != 0:
+                return None, wait
+            lease = conn.execute("INSERT INTO leases (expires_at) VALUES (?)", (now + self.lease_ttl,)).lastrowid
+            return lease, 0
+
+    def acquire(self, timeout=GEMINI_LIMITER_TIMEOUT, cancel=None):
+        """
+        Wait for a token and a concurrency slot; returns a lease id, or None on
+        timeout or once `cancel` (an Event-like flag) is set.
+        """
+        if not self.enabled:
+            return 0
+        deadline = time.monotonic() + timeout
+        poll = _POLL_MIN
+        while True:
+            try:
+                lease, wait = self._try_acquire()
+            except sqlite3.Error as e:
+                log.warning(f"⚠️ Gemini limiter unavailable ({e}); calling without it")
+                return 0
+            if lease is not None:
+                return lease
+            if cancel is not None and cancel.is_set():
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if wait is None:
+                # No idea when a slot frees up: back off gently instead of spinning
+                wait = poll
+                poll = min(poll * 2, _POLL_MAX)
+            if cancel is None:
+                time.sleep(min(wait, remaining))
+            elif cancel.wait(min(wait, remaining)):
+                return None
+
+    def release(self, lease):
+        if not lease:
+            return
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM leases WHERE id = ?", (lease,))
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not release Gemini limiter lease: {e}")
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE bucket SET concurrency = MIN(?, concurrency + 1.0 / concurrency)",
+                    (float(self.max_concurrency),),
+                )
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not update Gemini limiter: {e}")
+
+    def record_throttle(self, cooldown):
+        """
+        Gemini said 429/503: shrink the shared window and pause every worker
+        for `cooldown` seconds. Returns False if the pause couldn't be stored
+        (limiter off or unavailable), so the caller has to wait itself.
+        """
+        if not self.enabled:
+            return False
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                concurrency, cooldown_until = conn.execute(
+                    "SELECT concurrency, cooldown_until FROM bucket"
+                ).fetchone()
+                # Calls already in flight will see the same storm; only the first one halves the window
+                if now >= cooldown_until:
+                    concurrency = max(1.0, concurrency / 2)
+                    log.warning(f"🚦 Gemini throttled: concurrency limit → {int(concurrency)}, pausing {cooldown:.1f}s")
+                conn.execute(
+                    "UPDATE bucket SET concurrency = ?, cooldown_until = ?, tokens = 0, refilled_at = ?",
+                    (concurrency, max(cooldown_until, now + cooldown), now),
+                )
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not update Gemini limiter: {e}")
+            return False
+        return True
+
+    def stats(self):
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connection()
+            tokens, refilled_at, concurrency, cooldown_until = conn.execute(
+                "SELECT tokens, refilled_at, concurrency, cooldown_until FROM bucket"
+            ).fetchone()
+            inflight = conn.execute("SELECT COUNT(*) FROM leases WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+        except sqlite3.Error:
+            return None
+        now = time.time()
+        return {
+            "tokens": min(self.burst, tokens + (now - refilled_at) * self.rate),
+            "concurrency": concurrency,
+            "inflight": inflight,
+            "cooldown": max(0.0, cooldown_until - now),
+        }
+
+
+# ============================================================
+# SINGLE-FLIGHT
+# ============================================================
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one run of `fn` (per worker process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            gemini_coalesced.inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+gemini_limiter = GeminiLimiter()
+gemini_flight = SingleFlight()
+
+
+def _limiter_metrics():
+    stats = gemini_limiter.stats()
+    if stats is None:
+        return []
+    return [
+        "# HELP neurofold_gemini_concurrency_limit Adaptive Gemini concurrency window shared by all workers.",
+        "# TYPE neurofold_gemini_concurrency_limit gauge",
+        f"neurofold_gemini_concurrency_limit {stats['concurrency']:.3f}",
+        "# HELP neurofold_gemini_inflight Gemini calls in flight across all workers.",
+        "# TYPE neurofold_gemini_inflight gauge",
+        f"neurofold_gemini_inflight {stats['inflight']}",
+        "# HELP neurofold_gemini_bucket_tokens Tokens left in the shared Gemini bucket.",
+        "# TYPE neurofold_gemini_bucket_tokens gauge",
+        f"neurofold_gemini_bucket_tokens {stats['tokens']:.3f}",
+        "# HELP neurofold_gemini_cooldown_seconds Remaining shared pause after a 429/503.",
+        "# TYPE neurofold_gemini_cooldown_seconds gauge",
+        f"neurofold_gemini_cooldown_seconds {stats['cooldown']:.3f}",
+    ]
+
+
+register_collector(_limiter_metrics)
@@ -0,0 +1,232 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+from llm import log
+from llm.cache import make_key
+from llm.metrics import Counter, register_collector
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Append-only history of every review, shared by all gunicorn workers
+REPORT_STORE_ENABLED = os.getenv("REPORT_STORE_ENABLED", "1") != "0"
+REPORT_STORE_DB = os.getenv(
+    "REPORT_STORE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports.sqlite3")
+)
+# The writer commits up to this many reports per transaction...
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", "64"))
+# ...or whatever has queued up after this many seconds
+REPORT_FLUSH_INTERVAL = float(os.getenv("REPORT_FLUSH_INTERVAL", "0.5"))
+# Reports beyond this backlog are dropped rather than slowing requests down
+REPORT_QUEUE_MAX = int(os.getenv("REPORT_QUEUE_MAX", "10000"))
+REPORTS_PAGE_MAX = int(os.getenv("REPORTS_PAGE_MAX", "200"))
+
+reports_written = Counter("neurofold_reports_written_total", "Reports committed to the report store.")
+reports_dropped = Counter(
+    "neurofold_reports_dropped_total",
+    "Reports not stored, by reason (queue_full, write_error).",
+    ["reason"],
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS reports ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " source_hash TEXT NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " status TEXT,"
+    " summary TEXT,"
+    " payload BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS reports_by_source ON reports (source_hash, created_at)",
+    "CREATE INDEX IF NOT EXISTS reports_by_time ON reports (created_at)",
+)
+
+
+# ============================================================
+# REPORT STORE
+# ============================================================
+
+class ReportStore:
+    """
+    Requests only enqueue their result; one daemon thread per worker batches
+    the queue into SQLite inserts. Rows are never updated, payloads (the
+    structured result, review text included) are zlib-compressed JSON.
+    """
+
+    def __init__(self, path=REPORT_STORE_DB, batch_size=REPORT_BATCH_SIZE,
+                 flush_interval=REPORT_FLUSH_INTERVAL, queue_max=REPORT_QUEUE_MAX,
+                 enabled=REPORT_STORE_ENABLED):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------------- writing ----------------
+
+    def submit(self, source_code, result):
+        """Queue one report; never blocks the caller."""
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        # Shallow copy: callers may add fields (e.g. timings) after returning
+        record = (make_key(source_code), time.time(), dict(result))
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            reports_dropped.inc(reason="queue_full")
+            log.warning("⚠️ Report queue full, dropping report")
+
+    def _ensure_writer(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="report-writer", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                if conn is None:
+                    conn = self._connect()
+                self._write(conn, batch)
+            except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+                reports_dropped.inc(len(batch), reason="write_error")
+                log.warning(f"⚠️ Could not store {len(batch)} reports in {self.path}: {e}")
+                conn = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, conn, batch):
+        rows = [
+            (
+                source_hash,
+                created_at,
+                result.get("status"),
+                result.get("summary"),
+                zlib.compress(json.dumps(result).encode("utf-8")),
+            )
+            for source_hash, created_at, result in batch
+        ]
+        with conn:
+            conn.executemany(
+                "INSERT INTO reports (source_hash, created_at, status, summary, payload) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        reports_written.inc(len(rows))
+        log.debug(f"📦 Stored {len(rows)} reports in {self.path}")
+
+    def flush(self):
+        """Block until everything queued so far is committed (tests, shutdown)."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    # ---------------- reading ----------------
+
+    def query(self, source_hash=None, status=None, since=None, until=None, limit=20, cursor=None,
+              include_payload=False):
+        """
+        Newest first. Pass the returned `next_cursor` back as `cursor` for the
+        next page; it is None on the last page.
+        """
+        clauses, params = [], []
+        for clause, value in (
+            ("source_hash = ?", source_hash),
+            ("status = ?", status),
+            ("created_at >= ?", since),
+            ("created_at < ?", until),
+            ("id < ?", cursor),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(limit, REPORTS_PAGE_MAX))
+
+        columns = "id, source_hash, created_at, status, summary" + (", payload" if include_payload else "")
+        rows = self._reader().execute(
+            f"SELECT {columns} FROM reports {where} ORDER BY id DESC LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+
+        page = [self._row(row) for row in rows[:limit]]
+        return {
+            "reports": page,
+            "next_cursor": page[-1]["id"] if len(rows) > limit else None,
+        }
+
+    def get(self, report_id):
+        row = self._reader().execute(
+            "SELECT id, source_hash, created_at, status, summary, payload FROM reports WHERE id = ?",
+            (report_id,),
+        ).fetchone()
+        return self._row(row) if row else None
+
+    @staticmethod
+    def _row(row):
+        report = {
+            "id": row[0],
+            "source_hash": row[1],
+            "created_at": row[2],
+            "status": row[3],
+            "summary": row[4],
+        }
+        if len(row) > 5:
+            report["result"] = json.loads(zlib.decompress(row[5]).decode("utf-8"))
+        return report
+
+    def stats(self):
+        return {"queued": self._queue.qsize()}
+
+
+report_store = ReportStore()
+# Daemon threads die with the process; give queued reports a chance to land
+atexit.register(report_store.flush)
+
+
+def _report_metrics():
+    return [
+        "# HELP neurofold_reports_queued Reports waiting for this worker's writer thread.",
+        "# TYPE neurofold_reports_queued gauge",
+        f"neurofold_reports_queued {report_store.stats()['queued']}",
+    ]
+
+
+register_collector(_report_metrics)
@@ -0,0 +1,229 @@
+import json
+import re
+import time
+
+import requests
+
+import llm.LLM as pipeline
+from llm import log
+from llm.metrics import span
+from llm.cache import result_cache, CACHE_ENABLED
+from llm.workspace import pipeline_slot
+from llm.breaker import gemini_breaker, GeminiUnavailableError
+from llm.ratelimit import gemini_limiter
+from llm.hedging import InvalidReply
+
+# Pause applied when a throttled stream sends no Retry-After (seconds)
+THROTTLE_COOLDOWN = 5
+
+
+# ============================================================
+# GEMINI STREAMING CALL
+# ============================================================
+
+def stream_gemini_api(prompt, timeout=60):
+    """
+    Call :streamGenerateContent over the pooled session and yield text deltas
+    as Gemini produces them. Raises requests.HTTPError on a non-200 reply so
+    the caller can fall back to the blocking call with retries. The stream
+    holds a lease from the shared limiter like any other call; raises
+    GeminiUnavailableError if none comes.
+    """
+    with span("gemini_wait"):
+        lease = gemini_limiter.acquire()
+    if lease is None:
+        log.warning("🚦 Gemini limiter stayed closed; not streaming")
+        raise GeminiUnavailableError("Gemini rate limit reached")
+
+    try:
+        response = pipeline.http_session.post(
+            pipeline.GEMINI_STREAM_ENDPOINT,
+            headers=pipeline.gemini_headers(),
+            json=pipeline.gemini_body(prompt),
+            stream=True,
+            timeout=timeout,
+        )
+        with response:
+            if response.status_code in (429, 503):
+                # Pause every worker, as the blocking call does
+                gemini_limiter.record_throttle(pipeline._retry_after(response, THROTTLE_COOLDOWN))
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                # alt=sse replies are "data: {GenerateContentResponse}" frames
+                if not line or not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(line[len("data:"):].strip())
+                except ValueError:
+                    continue
+
+                for candidate in chunk.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+        gemini_limiter.record_success()
+    finally:
+        gemini_limiter.release(lease)
+
+
+def is_throttled(error):
+    """429/503 replies are quota or load, not a Gemini failure; the limiter handles them."""
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in (429, 503)
+
+
+# ============================================================
+# INCREMENTAL SECTION PARSER
+# ============================================================
+
+class ReviewStreamParser:
+    """
+    Watches the review text grow and reports `$Suggestions:$` items and
+    `$Optimization:$` lines as soon as each one is complete. The final
+    result is still parsed from the full text by the regular extractors.
+    """
+
+    SUGGESTIONS_HEADER = "$Suggestions:$"
+    OPTIMIZATION_HEADER = "$Optimization:$"
+
+    def __init__(self):
+        self.text = ""
+        self.suggestions = []
+        self.optimization_lines = []
+
+    def feed(self, delta):
+        self.text += delta
+        return self._suggestion_events() + self._optimization_events()
+
+    def finish(self):
+        """Flush the last optimization line, which has no trailing newline."""
+        return self._optimization_events(final=True)
+
+    def _suggestion_events(self):
+        start = self.text.find(self.SUGGESTIONS_HEADER)
+        if start == -1:
+            return []
+
+        section_start = start + len(self.SUGGESTIONS_HEADER)
+        section_end = self.text.find(self.OPTIMIZATION_HEADER, section_start)
+        section = self.text[section_start:section_end if section_end != -1 else len(self.text)]
+
+        # Only closed "$...$" pairs count, so half-streamed items wait
+        items = [
+            re.sub(r"^\s*[-*•]?\s*", "", s.strip())
+            for s in re.findall(r"\$(.*?)\$", section, re.DOTALL) if s.strip()
+        ]
+        events = []
+        for item in items[len(self.suggestions):]:
+            self.suggestions.append(item)
+            events.append(("suggestion", {"index": len(self.suggestions) - 1, "text": item}))
+        return events
+
+    def _optimization_events(self, final=False):
+        start = self.text.find(self.OPTIMIZATION_HEADER)
+        if start == -1:
+            return []
+
+        body = self.text[start + len(self.OPTIMIZATION_HEADER):]
+        lines = body.split("\n")
+        if not final:
+            lines = lines[:-1]  # The last line may still be growing
+
+        code_lines = [line for line in lines if line.strip() and not line.strip().startswith("```")]
+        if len(code_lines) == len(self.optimization_lines):
+            return []
+
+        self.optimization_lines = code_lines
+        return [("optimization", {"code": "\n".join(code_lines).strip()})]
+
+
+# ============================================================
+# STREAMING PIPELINE
+# ============================================================
+
+def stream_review(source_code):
+    """
+    Run the pipeline for `source_code` and yield (event, data) pairs:
+    optimized, token, suggestion, optimization and finally reviewed
+    (or failed). Cache hits skip straight to the final event.
+    """
+    cache_key = pipeline.pipeline_cache_key(source_code) if CACHE_ENABLED else None
+    if cache_key:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            yield "optimized", {"unoptimized_code": cached.get("unoptimized_code")}
+            yield "reviewed", cached
+            return
+
+    pipeline.ensure_executables()
+
+    # Only the C stages need a slot: a slow SSE reader must not hold one while Gemini streams
+    with pipeline_slot():
+        compiled = pipeline.compile_and_optimize(source_code)
+    if compiled is None:
+        yield "failed", {"success": False, "message": "Compiler or optimizer failed to run."}
+        return
+
+    ir_code, optimized_code = compiled
+    yield "optimized", {"unoptimized_code": optimized_code}
+
+    reduction = pipeline.reduce_tac(optimized_code)
+    prompt = pipeline.build_review_prompt(reduction[0])
+    parser = ReviewStreamParser()
+
+    review_text = None
+    if not gemini_breaker.allow():
+        log.warning("⏳ Skipping LLM review: Gemini circuit breaker is open")
+    else:
+        log.info("🤖 Streaming optimized TAC review from Gemini...\n")
+        started = time.monotonic()
+        first_delta = None
+        try:
+            # Includes the time the client takes to read each event
+            with span("gemini_stream"):
+                for delta in stream_gemini_api(prompt):
+                    if first_delta is None:
+                        first_delta = time.monotonic() - started
+                    yield "token", {"text": delta}
+                    for event in parser.feed(delta):
+                        yield event
+            gemini_breaker.record(True, first_delta or 0.0)
+            for event in parser.finish():
+                yield event
+            review_text = parser.text
+        except GeminiUnavailableError as unavailable:
+            log.warning(f"⏳ Skipping LLM review: {unavailable}")
+        except requests.exceptions.RequestException as e:
+            if not is_throttled(e):
+                gemini_breaker.record(False)
+            # A throttled probe recorded nothing: free its slot for the blocking call below
+            gemini_breaker.release()
+            # Nothing useful streamed yet: fall back to the blocking call and its retries
+            if parser.text:
+                log.warning(f"⚠️ Gemini stream broke mid-review: {e}")
+                review_text = parser.text
+            else:
+                log.warning(f"⚠️ Gemini stream unavailable ({e}), falling back to blocking call")
+                try:
+                    _, (review_text, _) = pipeline.request_gemini(prompt, pipeline.validate_review_text)
+                except InvalidReply as invalid:
+                    review_text = invalid.reply[0]
+                except GeminiUnavailableError as unavailable:
+                    log.warning(f"⏳ Skipping LLM review: {unavailable}")
+                if review_text is not None:
+                    yield "token", {"text": review_text}
+        finally:
+            # Also covers a probe that ended without an outcome (limiter timeout, client gone)
+            gemini_breaker.release()
+
+    if review_text is None:
+        result = pipeline.build_pending_output(optimized_code, reduction)
+    else:
+        result = pipeline.build_structured_output(review_text, optimized_code, reduction)
+    pipeline.attach_cost_analysis([result], [ir_code])
+    pipeline.attach_equivalence([result], [ir_code])
+    pipeline.publish_reports(source_code, result)
+    if cache_key and pipeline.is_cacheable(result):
+        result_cache.put(cache_key, result)
+
+    yield "reviewed", result
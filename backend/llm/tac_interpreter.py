@@ -0,0 +1,454 @@
+import os
+import re
+
+import numpy as np
+
+from llm.metrics import Counter
+from llm.tac_passes import Instruction
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Run IR.txt, the optimizer output and the LLM's version on random inputs
+# and compare their results locally (EQUIVALENCE_CHECK=0 turns it off)
+EQUIVALENCE_CHECK = os.getenv("EQUIVALENCE_CHECK", "1") != "0"
+EQUIVALENCE_TRIALS = int(os.getenv("EQUIVALENCE_TRIALS", "1024"))
+# Arguments are drawn from [-range, range], with boundary values mixed in
+EQUIVALENCE_INPUT_RANGE = int(os.getenv("EQUIVALENCE_INPUT_RANGE", "100"))
+EQUIVALENCE_EDGE_FRACTION = float(os.getenv("EQUIVALENCE_EDGE_FRACTION", "0.1"))
+# Instructions one trial may execute (callees included) before it counts as not terminating
+EQUIVALENCE_MAX_STEPS = int(os.getenv("EQUIVALENCE_MAX_STEPS", "10000"))
+EQUIVALENCE_MAX_DEPTH = int(os.getenv("EQUIVALENCE_MAX_DEPTH", "64"))
+# Fixed seed: the same listing always gets the same inputs, so verdicts are reproducible
+EQUIVALENCE_SEED = int(os.getenv("EQUIVALENCE_SEED", "0"))
+
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+EDGE_VALUES = np.array([0, 1, -1, 2, -2, INT_MAX, INT_MIN], dtype=np.int64)
+
+# Per-trial outcome of a run
+OK = 0
+TRAP = 1    # division or modulo by zero
+LIMIT = 2   # step budget or call depth exhausted
+UNDEFINED = 3   # call to a function the listing doesn't define (e.g. a library call)
+STATUS_NAMES = {OK: "ok", TRAP: "division by zero", LIMIT: "step limit", UNDEFINED: "call to unknown function"}
+
+NAME_PATTERN = re.compile(r"^[A-Za-z_]\w*$")
+INT_PATTERN = re.compile(r"^-?\d+$")
+CHAR_PATTERN = re.compile(r"^'(\\?.)'$")
+CHAR_ESCAPES = {"\\n": "\n", "\\t": "\t", "\\0": "\0", "\\\\": "\\", "\\'": "'", '\\"': '"'}
+
+equivalence_verdicts = Counter(
+    "neurofold_equivalence_verdicts_total",
+    "Local equivalence checks against IR.txt by listing (optimizer, llm) and verdict.",
+    ["listing", "verdict"],
+)
+
+
+class UnsupportedTAC(ValueError):
+    """The listing uses something the interpreter can't run (unknown line, float literal, unknown callee...)."""
+
+
+# ============================================================
+# PARSING
+# ============================================================
+
+class Function:
+    """One FUNCTION ... END FUNCTION block with labels resolved to instruction indexes."""
+
+    def __init__(self, name):
+        self.name = name
+        self.params = []
+        self.ops = []
+        self.labels = {}
+
+
+def _operand(text):
+    """Constants become ints, names stay strings."""
+    if INT_PATTERN.match(text):
+        return int(text)
+    char = CHAR_PATTERN.match(text)
+    if char:
+        return ord(CHAR_ESCAPES.get(char.group(1), char.group(1)))
+    if NAME_PATTERN.match(text):
+        return text
+    raise UnsupportedTAC(f"can't evaluate operand {text!r}")
+
+
+def _compile_line(function, instr):
+    text = instr.raw.partition(";")[0].strip()
+    kind = instr.kind
+    if kind == "label":
+        function.labels[text[:-1]] = len(function.ops)
+    elif kind == "param":
+        function.params.append(instr.dest)
+    elif kind == "push_param" and not function.ops and NAME_PATTERN.match(instr.args[0]):
+        # Output.txt declares parameters as PUSH_PARAM lines at the top of the
+        # body (optimizer.c's parseIRLine reads both forms as IR_PARAM)
+        function.params.append(instr.args[0])
+    elif kind == "declare" or (kind == "other" and not text):
+        pass
+    elif kind == "copy":
+        function.ops.append(("copy", instr.dest, _operand(instr.args[0])))
+    elif kind == "binary":
+        function.ops.append(("binary", instr.dest, instr.op, _operand(instr.args[0]), _operand(instr.args[1])))
+    elif kind == "unary":
+        function.ops.append(("unary", instr.dest, instr.op, _operand(instr.args[0])))
+    elif kind == "push_param":
+        function.ops.append(("push", _operand(instr.args[0])))
+    elif kind == "call":
+        # "CALL name, N" pops the last N pushed values, so f(1, g(2)) gives g its 2
+        # and leaves 1 for f; without a count the callee's parameter count is used
+        callee, _, count = instr.op[len("CALL"):].partition(",")
+        callee, count = callee.strip(), count.strip()
+        if not callee:
+            # Output.txt writes "CALL , 1": nothing says which function runs
+            raise UnsupportedTAC(f"{function.name}: CALL without a function name")
+        function.ops.append(("call", instr.dest, callee, int(count) if count.isdigit() else None))
+    elif kind == "goto":
+        function.ops.append(("goto", text.split()[1]))
+    elif kind == "branch":
+        function.ops.append(("branch", _operand(instr.args[0]), instr.op))
+    elif kind == "return":
+        function.ops.append(("return", _operand(instr.args[0]) if instr.args else 0))
+    elif kind == "end":
+        function.ops.append(("return", 0))
+    else:
+        raise UnsupportedTAC(f"unknown instruction {text!r}")
+
+
+def parse_program(tac_code):
+    """Parse a TAC listing into {name: Function}; raises UnsupportedTAC."""
+    functions = {}
+    function = None
+    for line in tac_code.splitlines():
+        instr = Instruction.parse(line)
+        if instr.kind == "function":
+            name = instr.raw.partition(";")[0].strip()[len("FUNCTION "):-1].strip()
+            if name in functions:
+                raise UnsupportedTAC(f"function {name} is defined twice")
+            function = functions[name] = Function(name)
+        elif function is None:
+            if line.strip():
+                raise UnsupportedTAC(f"code outside a function: {line.strip()!r}")
+        else:
+            _compile_line(function, instr)
+            if instr.kind == "end":
+                function = None
+    if not functions:
+        raise UnsupportedTAC("no functions found")
+
+    for function in functions.values():
+        # Falling off the end (e.g. a listing without END FUNCTION) returns 0
+        function.ops.append(("return", 0))
+        # Resolve jump targets to instruction indexes
+        for index, op in enumerate(function.ops):
+            if op[0] in ("goto", "branch"):
+                if op[-1] not in function.labels:
+                    raise UnsupportedTAC(f"{function.name}: jump to unknown label {op[-1]}")
+                function.ops[index] = op[:-1] + (function.labels[op[-1]],)
+    return functions
+
+
+# ============================================================
+# VECTORIZED EXECUTION
+# ============================================================
+# Every trial is one lane of int64 arrays. Lanes carry their own program
+# counter; each step runs the lowest pending instruction for all lanes that
+# are at it, so lanes that branched apart join up again after the branch.
+
+def _wrap(values):
+    # C int arithmetic: wrap to 32 bits
+    return values.astype(np.int32).astype(np.int64)
+
+
+def _divide(a, b):
+    """C division truncates towards zero (NumPy's // floors)."""
+    return np.abs(a) // np.abs(b) * np.sign(a) * np.sign(b)
+
+
+BINARY_OPS = {
+    "+": lambda a, b: _wrap(a + b),
+    "-": lambda a, b: _wrap(a - b),
+    "*": lambda a, b: _wrap(a * b),
+    "/": lambda a, b: _wrap(_divide(a, b)),
+    "%": lambda a, b: _wrap(a - b * _divide(a, b)),
+    "<": lambda a, b: (a < b).astype(np.int64),
+    "<=": lambda a, b: (a <= b).astype(np.int64),
+    ">": lambda a, b: (a > b).astype(np.int64),
+    ">=": lambda a, b: (a >= b).astype(np.int64),
+    "==": lambda a, b: (a == b).astype(np.int64),
+    "!=": lambda a, b: (a != b).astype(np.int64),
+    "&&": lambda a, b: ((a != 0) & (b != 0)).astype(np.int64),
+    "||": lambda a, b: ((a != 0) | (b != 0)).astype(np.int64),
+}
+UNARY_OPS = {
+    "-": lambda a: _wrap(-a),
+    "!": lambda a: (a == 0).astype(np.int64),
+}
+
+
+def run_function(program, name, args, budget, memo, depth=0):
+    """
+    Run function `name` of `program` for every lane at once. `args` holds one
+    int64 array per parameter and `budget` the steps each lane may still take.
+    Returns (values, status, steps) arrays, one entry per lane.
+    """
+    function = program[name]
+    ops = function.ops
+    lanes = len(budget)
+    zeros = np.zeros(lanes, dtype=np.int64)
+    finished = len(ops)  # program counter of lanes that returned or stopped
+
+    # Uninitialized variables read as 0
+    env = {}
+    for i, param in enumerate(function.params):
+        env[param] = args[i].copy() if i < len(args) else zeros.copy()
+
+    def value(operand):
+        # Constants stay scalars and broadcast
+        if isinstance(operand, int):
+            return np.int64(operand)
+        return env[operand] if operand in env else zeros
+
+    def store(dest, result, where):
+        target = env.get(dest)
+        if target is None:
+            target = env[dest] = zeros.copy()
+        np.copyto(target, result, where=where)
+
+    pc = np.zeros(lanes, dtype=np.int64)
+    values = zeros.copy()
+    status = np.zeros(lanes, dtype=np.int8)
+    steps = zeros.copy()
+    pushed = np.zeros((0, lanes), dtype=np.int64)   # pending PUSH_PARAM values, one row per slot
+    push_count = zeros.copy()
+
+    def stop(where, code):
+        status[where] = code
+        pc[where] = finished
+
+    while True:
+        at = pc.min()
+        if at == finished:
+            break
+        sel = pc == at
+
+        steps += sel
+        over = sel & (steps > budget)
+        if over.any():
+            stop(over, LIMIT)
+            sel &= ~over
+            if not sel.any():
+                continue
+
+        op = ops[at]
+        kind = op[0]
+
+        if kind == "copy":
+            store(op[1], value(op[2]), sel)
+        elif kind == "binary":
+            a, b = value(op[3]), value(op[4])
+            if op[2] in ("/", "%"):
+                trapped = sel & (b == 0)
+                if trapped.any():
+                    stop(trapped, TRAP)
+                    sel &= ~trapped
+                b = np.where(b == 0, 1, b)
+            store(op[1], BINARY_OPS[op[2]](a, b), sel)
+        elif kind == "unary":
+            store(op[1], UNARY_OPS[op[2]](value(op[3])), sel)
+        elif kind == "push":
+            slots = np.flatnonzero(sel)
+            if push_count[slots].max() >= len(pushed):
+                pushed = np.vstack([pushed, zeros[np.newaxis]])
+            pushed[push_count[slots], slots] = np.broadcast_to(value(op[1]), lanes)[slots]
+            push_count[slots] += 1
+        elif kind == "call":
+            slots = np.flatnonzero(sel)
+            callee = program.get(op[2])
+            count = op[3] if op[3] is not None else len(callee.params) if callee else 0
+            # Pushed values are a stack: pop this call's arguments, keep the rest for outer calls
+            base = push_count[slots] - count
+            push_count[slots] = np.maximum(base, 0)
+            if callee is None:
+                stop(sel, UNDEFINED)
+                continue
+            if depth >= EQUIVALENCE_MAX_DEPTH:
+                stop(sel, LIMIT)
+                continue
+            call_args = np.zeros((len(callee.params), len(slots)), dtype=np.int64)
+            for i in range(min(count, len(callee.params))):
+                # Lanes that pushed fewer than `count` values get 0 for the missing leading ones
+                row = base + i
+                pushed_here = row >= 0
+                call_args[i, pushed_here] = pushed[row[pushed_here], slots[pushed_here]]
+            returned, call_status, call_steps = call_function(
+                program, op[2], call_args, budget[slots] - steps[slots], memo, depth + 1
+            )
+            steps[slots] += call_steps
+            result = zeros.copy()
+            result[slots] = returned
+            store(op[1], result, sel)
+            # A trap or limit inside the callee ends the caller's trial too
+            failed = call_status != OK
+            if failed.any():
+                stop(slots[failed], call_status[failed])
+                sel[slots[failed]] = False
+        elif kind == "goto":
+            pc[sel] = op[1]
+            continue
+        elif kind == "branch":
+            jump = sel & (value(op[1]) == 0)
+            pc[sel] = at + 1
+            pc[jump] = op[2]
+            continue
+        elif kind == "return":
+            np.copyto(values, value(op[1]), where=sel)
+            pc[sel] = finished
+            continue
+
+        pc[sel] = at + 1
+
+    return values, status, steps
+
+
+def call_function(program, name, args, budget, memo, depth):
+    """
+    run_function for a CALL. Functions only see their arguments, so each
+    distinct argument tuple runs once and its outcome is remembered in `memo`
+    for the rest of the check (this keeps recursion from blowing up). Lanes
+    whose remaining budget is below the steps the call needed hit the limit.
+    """
+    unique, inverse = np.unique(args.T, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    lane_budget = np.zeros(len(unique), dtype=np.int64)
+    np.maximum.at(lane_budget, inverse, budget)
+
+    values = np.zeros(len(unique), dtype=np.int64)
+    status = np.zeros(len(unique), dtype=np.int8)
+    steps = np.zeros(len(unique), dtype=np.int64)
+    keys = [(name, row.tobytes()) for row in unique]
+    missing = []
+    for index, key in enumerate(keys):
+        known = memo.get(key)
+        if known is None:
+            missing.append(index)
+        else:
+            values[index], status[index], steps[index] = known
+
+    if missing:
+        missing = np.array(missing)
+        ran = run_function(program, name, list(unique[missing].T), lane_budget[missing], memo, depth)
+        values[missing], status[missing], steps[missing] = ran
+        for index, value, code, count in zip(missing, *ran):
+            # Running out of steps depends on the budget, so only complete outcomes are reused
+            if code != LIMIT:
+                memo[keys[index]] = (value, code, count)
+
+    values, status, steps = values[inverse], status[inverse], steps[inverse]
+    over = steps > budget
+    status[over] = LIMIT
+    return values, status, np.minimum(steps, budget + 1)
+
+
+def run_program(program, name, args, max_steps=EQUIVALENCE_MAX_STEPS):
+    lanes = len(args[0]) if args else 1
+    return run_function(program, name, args, np.full(lanes, max_steps, dtype=np.int64), {})
+
+
+# ============================================================
+# EQUIVALENCE CHECK
+# ============================================================
+
+def random_inputs(count, trials, rng):
+    """`count` argument arrays of `trials` values: uniform in range, some swapped for boundary values."""
+    inputs = rng.integers(-EQUIVALENCE_INPUT_RANGE, EQUIVALENCE_INPUT_RANGE + 1, size=(count, trials))
+    edges = rng.random((count, trials)) < EQUIVALENCE_EDGE_FRACTION
+    return np.where(edges, rng.choice(EDGE_VALUES, size=(count, trials)), inputs)
+
+
+def _check_callees(program):
+    """
+    Raise UnsupportedTAC if `program` calls a function it doesn't define:
+    those trials can't be judged, so the listing gets no verdict rather than
+    a mismatch. (In the reference they only hit UNDEFINED and are skipped.)
+    """
+    for function in program.values():
+        for op in function.ops:
+            if op[0] == "call" and op[2] not in program:
+                raise UnsupportedTAC(f"{function.name}: call to {op[2]}, which the listing doesn't define")
+
+
+def check_equivalence(reference, candidates, trials=EQUIVALENCE_TRIALS, seed=EQUIVALENCE_SEED):
+    """
+    Run every function of `reference` (IR.txt) and of each candidate listing
+    ({label: tac_code}) on the same random arguments and compare return
+    values trial by trial. Trials where the reference divides by zero or runs
+    out of steps are left out. Each candidate gets a verdict: equivalent,
+    mismatch (with a counterexample), inconclusive (nothing left to compare)
+    or unsupported (the listing couldn't be run, e.g. a CALL without a name).
+    """
+    verdicts = {}
+    try:
+        reference_program = parse_program(reference)
+    except UnsupportedTAC as e:
+        return {
+            "trials": 0,
+            "functions": [],
+            **{label: {"verdict": "unsupported", "reason": f"IR: {e}"} for label in candidates},
+        }
+
+    programs = {}
+    for label, code in candidates.items():
+        try:
+            programs[label] = parse_program(code or "")
+            _check_callees(programs[label])
+        except UnsupportedTAC as e:
+            programs.pop(label, None)
+            verdicts[label] = {"verdict": "unsupported", "reason": str(e)}
+
+    rng = np.random.default_rng(seed)
+    outcomes = {label: {"compared": 0, "skipped": 0, "counterexample": None} for label in programs}
+    shared = dict.fromkeys(programs, 0)  # functions each candidate has in common with the reference
+    for name, function in reference_program.items():
+        # Without parameters every trial would be the same run
+        lanes = trials if function.params else 1
+        args = list(random_inputs(len(function.params), lanes, rng))
+        expected, expected_status, _ = run_program(reference_program, name, args)
+        comparable = expected_status == OK
+
+        for label, program in programs.items():
+            if name not in program:
+                continue
+            outcome = outcomes[label]
+            shared[label] += 1
+            actual, actual_status, _ = run_program(program, name, args)
+            wrong = comparable & ((actual_status != OK) | (actual != expected))
+            outcome["compared"] += int(comparable.sum())
+            outcome["skipped"] += int((~comparable).sum())
+            if wrong.any() and outcome["counterexample"] is None:
+                lane = int(np.flatnonzero(wrong)[0])
+                outcome["counterexample"] = {
+                    "function": name,
+                    "inputs": {param: int(arg[lane]) for param, arg in zip(function.params, args)},
+                    "expected": int(expected[lane]),
+                    "actual": int(actual[lane]) if actual_status[lane] == OK else STATUS_NAMES[int(actual_status[lane])],
+                }
+
+    for label, outcome in outcomes.items():
+        if shared[label] == 0:
+            verdicts[label] = {"verdict": "unsupported", "reason": "no functions in common with IR.txt"}
+            continue
+        if outcome["counterexample"] is not None:
+            verdict = "mismatch"
+        elif outcome["compared"] == 0:
+            verdict = "inconclusive"
+        else:
+            verdict = "equivalent"
+        verdicts[label] = {"verdict": verdict, **outcome}
+
+    for label, result in verdicts.items():
+        equivalence_verdicts.inc(listing=label, verdict=result["verdict"])
+    return {"trials": trials, "functions": list(reference_program), **{label: verdicts[label] for label in candidates}}
+
@@ -0,0 +1,282 @@
+import os
+import re
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Comma-separated pass names run over the optimizer output before it is sent
+# to Gemini, e.g. TAC_PASSES=strip_annotations,dead_temps ("none" disables).
+DEFAULT_PASSES = "strip_annotations,copy_propagation,cse,dead_temps,unused_declarations"
+TAC_PASSES = os.getenv("TAC_PASSES", DEFAULT_PASSES)
+# copy_propagation / cse / dead_temps feed each other, so repeat them a few times
+TAC_MAX_ROUNDS = int(os.getenv("TAC_MAX_ROUNDS", "4"))
+
+TEMP_PATTERN = re.compile(r"^t\d+$")
+BINARY_PATTERN = re.compile(r"^(\S+) (\+|-|\*|/|%|<=|>=|==|!=|<|>|&&|\|\|) (\S+)$")
+UNARY_PATTERN = re.compile(r"^(-|!)(\S+)$")
+COMMUTATIVE_OPS = {"+", "*", "==", "!=", "&&", "||"}
+# Kinds that render() rebuilds from their fields; everything else is kept verbatim
+REWRITABLE_KINDS = {"copy", "binary", "unary", "return", "branch", "push_param"}
+
+
+# ============================================================
+# TAC INSTRUCTIONS
+# ============================================================
+
+class Instruction:
+    """
+    One TAC line as written by compiler.c / optimizer.c. `kind` is one of
+    copy, binary, unary, call, return, branch, push_param, label, goto,
+    function, end, declare, param or other (kept verbatim).
+    """
+
+    def __init__(self, kind, dest=None, op=None, args=None, annotation="", raw=""):
+        self.kind = kind
+        self.dest = dest
+        self.op = op
+        self.args = list(args or [])
+        self.annotation = annotation
+        self.raw = raw
+
+    @classmethod
+    def parse(cls, line):
+        text, _, comment = line.partition(";")
+        text = text.strip()
+        annotation = f";{comment}".strip() if comment else ""
+
+        def make(kind, dest=None, op=None, args=None):
+            return cls(kind, dest, op, args, annotation, line)
+
+        if not text:
+            return make("other")
+        if text.startswith("FUNCTION ") and text.endswith(":"):
+            return make("function")
+        if text.startswith("END FUNCTION"):
+            return make("end")
+        if text.endswith(":") and " " not in text:
+            return make("label")
+        if text.startswith("DECLARE "):
+            return make("declare", dest=text.split()[1])
+        if text.startswith("PARAM "):
+            return make("param", dest=text.split()[1])
+        if text.startswith("PUSH_PARAM "):
+            return make("push_param", args=[text.split()[1]])
+        if text.startswith("GOTO "):
+            return make("goto")
+        if text.startswith("IF_FALSE "):
+            parts = text.split()
+            return make("branch", op=parts[3], args=[parts[1]])
+        if text == "RETURN":
+            return make("return")
+        if text.startswith("RETURN "):
+            return make("return", args=[text.split()[1]])
+
+        if " = " in text:
+            dest, expr = [part.strip() for part in text.split(" = ", 1)]
+            if expr.startswith("CALL "):
+                return make("call", dest=dest, op=expr)
+            binary = BINARY_PATTERN.match(expr)
+            if binary:
+                return make("binary", dest=dest, op=binary.group(2), args=[binary.group(1), binary.group(3)])
+            unary = UNARY_PATTERN.match(expr)
+            if unary:
+                return make("unary", dest=dest, op=unary.group(1), args=[unary.group(2)])
+            if " " not in expr:
+                return make("copy", dest=dest, args=[expr])
+
+        return make("other")
+
+    def render(self):
+        if self.kind == "copy":
+            text = f"  {self.dest} = {self.args[0]}"
+        elif self.kind == "binary":
+            text = f"  {self.dest} = {self.args[0]} {self.op} {self.args[1]}"
+        elif self.kind == "unary":
+            text = f"  {self.dest} = {self.op}{self.args[0]}"
+        elif self.kind == "return" and self.args:
+            text = f"  RETURN {self.args[0]}"
+        elif self.kind == "branch":
+            text = f"  IF_FALSE {self.args[0]} GOTO {self.op}"
+        elif self.kind == "push_param":
+            text = f"  PUSH_PARAM {self.args[0]}"
+        else:
+            return self.raw
+        return f"{text}    {self.annotation}" if self.annotation else text
+
+    def starts_block(self):
+        return self.kind in ("label", "function", "end")
+
+    def ends_block(self):
+        # Facts about values never survive a jump or a call
+        return self.kind in ("goto", "branch", "call")
+
+
+def is_temp(name):
+    return bool(name) and TEMP_PATTERN.match(name) is not None
+
+
+def _used_names(instructions):
+    used = set()
+    for instr in instructions:
+        used.update(instr.args)
+    return used
+
+
+# ============================================================
+# PASSES
+# ============================================================
+# Each pass takes the instruction list and returns (instructions, removed),
+# where `removed` is a list of the lines (or annotations) it dropped or replaced.
+
+def strip_annotations(instructions):
+    removed = []
+    for instr in instructions:
+        if instr.annotation and instr.kind in REWRITABLE_KINDS:
+            removed.append(instr.annotation)
+            instr.annotation = ""
+    return instructions, removed
+
+
+def copy_propagation(instructions):
+    """Replace uses of `tN = x` copies with x inside each basic block."""
+    removed = []
+    copies = {}
+    for instr in instructions:
+        if instr.starts_block():
+            copies.clear()
+
+        new_args = [copies.get(arg, arg) for arg in instr.args]
+        if new_args != instr.args:
+            removed.append(instr.render().strip())
+            instr.args = new_args
+
+        if instr.ends_block():
+            copies.clear()
+        elif instr.dest and instr.kind not in ("declare", "param"):
+            copies = {k: v for k, v in copies.items() if k != instr.dest and v != instr.dest}
+            if instr.kind == "copy" and is_temp(instr.dest) and instr.args[0] != instr.dest:
+                copies[instr.dest] = instr.args[0]
+    return instructions, removed
+
+
+def cse(instructions):
+    """Turn a repeated `a op b` within a basic block into a copy of the first result."""
+    removed = []
+    available = {}
+    for instr in instructions:
+        if instr.starts_block() or instr.ends_block():
+            available.clear()
+
+        key = None
+        if instr.kind in ("binary", "unary"):
+            args = tuple(instr.args)
+            if instr.op in COMMUTATIVE_OPS:
+                args = tuple(sorted(args))
+            key = (instr.kind, instr.op, args)
+            if key in available and available[key] != instr.dest:
+                removed.append(instr.render().strip())
+                instr.kind, instr.op, instr.args = "copy", None, [available[key]]
+                key = None
+
+        if instr.dest and instr.kind not in ("declare", "param"):
+            available = {
+                k: v for k, v in available.items()
+                if v != instr.dest and instr.dest not in k[2]
+            }
+            if key is not None and is_temp(instr.dest) and instr.dest not in instr.args:
+                available[key] = instr.dest
+    return instructions, removed
+
+
+def dead_temps(instructions):
+    """Drop assignments to temporaries that nothing reads (calls are kept)."""
+    used = _used_names(instructions)
+    kept, removed = [], []
+    for instr in instructions:
+        if instr.kind in ("copy", "binary", "unary") and is_temp(instr.dest) and instr.dest not in used:
+            removed.append(instr.render().strip())
+        else:
+            kept.append(instr)
+    return kept, removed
+
+
+def unused_declarations(instructions):
+    """Drop DECLARE lines for variables that are no longer assigned or read."""
+    referenced = _used_names(instructions)
+    referenced.update(instr.dest for instr in instructions if instr.kind != "declare" and instr.dest)
+    kept, removed = [], []
+    for instr in instructions:
+        if instr.kind == "declare" and instr.dest not in referenced:
+            removed.append(instr.render().strip())
+        else:
+            kept.append(instr)
+    return kept, removed
+
+
+# Run order; the middle three feed each other and repeat until nothing changes
+PASSES = {
+    "strip_annotations": strip_annotations,
+    "copy_propagation": copy_propagation,
+    "cse": cse,
+    "dead_temps": dead_temps,
+    "unused_declarations": unused_declarations,
+}
+ITERATED_PASSES = ("copy_propagation", "cse", "dead_temps")
+
+
+def enabled_passes(spec=None):
+    spec = TAC_PASSES if spec is None else spec
+    if spec.strip().lower() in ("", "none", "0"):
+        return []
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PASSES]
+    if unknown:
+        raise ValueError(f"Unknown TAC pass(es): {', '.join(unknown)}")
+    return names
+
+
+def _count_lines(code):
+    return sum(1 for line in code.splitlines() if line.strip())
+
+
+# ============================================================
+# PASS PIPELINE
+# ============================================================
+
+def run_passes(tac_code, passes=None):
+    """
+    Run the enabled passes over `tac_code` (optimizer output).
+    Returns (reduced_code, report); the report lists, per pass, how many
+    lines or annotations it removed or rewrote and which ones.
+    """
+    names = set(enabled_passes() if passes is None else passes)
+    instructions = [Instruction.parse(line) for line in tac_code.splitlines()]
+    report = {name: {"removed": 0, "items": []} for name in PASSES if name in names}
+
+    def apply(name):
+        nonlocal instructions
+        instructions, removed = PASSES[name](instructions)
+        report[name]["removed"] += len(removed)
+        report[name]["items"].extend(removed)
+        return bool(removed)
+
+    if "strip_annotations" in names:
+        apply("strip_annotations")
+
+    iterated = [name for name in ITERATED_PASSES if name in names]
+    for _ in range(TAC_MAX_ROUNDS if iterated else 0):
+        if not any([apply(name) for name in iterated]):
+            break
+
+    if "unused_declarations" in names:
+        apply("unused_declarations")
+
+    reduced_code = "\n".join(instr.render() for instr in instructions)
+    if tac_code.endswith("\n"):
+        reduced_code += "\n"
+
+    return reduced_code, {
+        "lines_before": _count_lines(tac_code),
+        "lines_after": _count_lines(reduced_code),
+        "passes": report,
+    }
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from llm import log
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Every pipeline run gets its own scratch directory so concurrent
+# requests never share source.c / IR.txt / Output.txt.
+WORKSPACE_ROOT = os.getenv("PIPELINE_WORKSPACE_ROOT", tempfile.gettempdir())
+MAX_INFLIGHT = int(os.getenv("PIPELINE_MAX_INFLIGHT", "4"))
+ACQUIRE_TIMEOUT = float(os.getenv("PIPELINE_ACQUIRE_TIMEOUT", "30"))
+
+_slots = threading.BoundedSemaphore(MAX_INFLIGHT)
+
+
+class PipelineBusyError(Exception):
+    """Raised when no pipeline slot frees up within the acquire timeout."""
+
+
+class Workspace:
+    """Paths used by one compile → optimize → review run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.source_file = os.path.join(path, "source.c")
+        self.ir_file = os.path.join(path, "IR.txt")
+        self.output_file = os.path.join(path, "Output.txt")
+        self.report_text = os.path.join(path, "Gemini_Report.txt")
+        self.report_json = os.path.join(path, "Gemini_Review.json")
+
+    def write_source(self, source_code):
+        """Write source.c for the compiler and verify it landed on disk."""
+        log.debug(f"📝 Writing source code to {self.source_file}")
+        log.debug(f"📄 Source code length: {len(source_code)} characters")
+
+        with open(self.source_file, "w", encoding="utf-8") as f:
+            f.write(source_code)
+            f.flush()  # Force write to disk
+            os.fsync(f.fileno())  # Ensure OS writes to disk
+
+        # Verify the file was written correctly
+        if not os.path.exists(self.source_file):
+            log.error(f"❌ File not found after writing: {self.source_file}")
+            return False
+
+        with open(self.source_file, "r", encoding="utf-8") as f:
+            written_content = f.read()
+        log.debug(f"✅ File written successfully. Size: {len(written_content)} bytes")
+
+        if written_content == source_code:
+            log.debug("✅ Content verification successful!")
+        else:
+            log.warning("⚠️ Content mismatch detected!")
+        return True
+
+
+@contextmanager
+def pipeline_slot(timeout=ACQUIRE_TIMEOUT):
+    """Reserve one of MAX_INFLIGHT pipeline slots for the duration of the block."""
+    if not _slots.acquire(timeout=timeout):
+        raise PipelineBusyError(
+            f"All {MAX_INFLIGHT} pipeline slots are busy, try again shortly."
+        )
+    try:
+        yield
+    finally:
+        _slots.release()
+
+
+@contextmanager
+def scratch_workspace():
+    """Yield a fresh Workspace without taking a slot; the directory is removed on exit."""
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    path = tempfile.mkdtemp(prefix="neurofold-", dir=WORKSPACE_ROOT)
+    try:
+        yield Workspace(path)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def pipeline_workspace(timeout=ACQUIRE_TIMEOUT):
+    """
+    Reserve a pipeline slot and yield a fresh Workspace.
+    The scratch directory is removed and the slot released on exit.
+    """
+    with pipeline_slot(timeout):
+        with scratch_workspace() as workspace:
+            yield workspace
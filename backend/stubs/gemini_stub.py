@@ -0,0 +1,157 @@
+"""
+Local stand-in for the Gemini REST API.
+
+Serves both :generateContent and :streamGenerateContent?alt=sse with a canned
+review, so the pipeline can be exercised without a key or network access:
+
+    python stubs/gemini_stub.py --port 8089 --latency 0.5 --chunk-delay 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8089/v1beta python app.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_REVIEW = """✅ Optimization Correct
+- Semantics preserved; no unsafe optimizations detected.
+$Suggestions:$
+- $Eliminate all temporary variables and unused DECLARE statements.$
+- $Perform full constant folding to RETURN 24.$
+$Optimization:$
+FUNCTION main:
+  RETURN 24
+END FUNCTION main"""
+
+# Served instead when the request asks for JSON (responseMimeType, see GEMINI_JSON_MODE)
+CANNED_JSON_REVIEW = json.dumps({
+    "status": "Optimization Correct",
+    "summary": "Semantics preserved; no unsafe optimizations detected.",
+    "findings": ["All folded constants match the original expressions."],
+    "suggestions": [
+        "Eliminate all temporary variables and unused DECLARE statements.",
+        "Perform full constant folding to RETURN 24.",
+    ],
+    "optimized_tac": ["FUNCTION main:", "  RETURN 24", "END FUNCTION main"],
+})
+
+
+def _response_json(text):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+        }]
+    }
+
+
+def reply_for(prompt, review_text):
+    """Answer multi-program prompts (see llm/batch.py) with one review per program."""
+    programs = re.findall(r"=== PROGRAM (\d+) ===", prompt)
+    if not programs:
+        return review_text
+    return "\n\n".join(
+        f"=== REVIEW {n} ===\n{review_text}\n=== END REVIEW {n} ===" for n in programs
+    )
+
+
+def _parse_request(raw_body):
+    """Returns (prompt text, whether a JSON reply was requested)."""
+    try:
+        request = json.loads(raw_body or b"{}")
+        prompt = "".join(p.get("text", "") for p in request["contents"][0]["parts"])
+    except (ValueError, KeyError, IndexError, AttributeError):
+        return "", False
+    config = request.get("generationConfig", {})
+    return prompt, config.get("responseMimeType") == "application/json"
+
+
+def make_handler(review_text=CANNED_REVIEW, latency=0.0, chunk_size=24, chunk_delay=0.0, status=200):
+    class GeminiStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; don't let Nagle delay the body
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            prompt, wants_json = _parse_request(self.rfile.read(length))
+            text = CANNED_JSON_REVIEW if wants_json else reply_for(prompt, review_text)
+            time.sleep(latency)
+
+            if status != 200:
+                body = json.dumps({"error": {"code": status, "message": "stubbed error"}}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            if ":streamGenerateContent" in self.path:
+                self._stream(text)
+            else:
+                body = json.dumps(_response_json(text)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def _stream(self, text):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i in range(0, len(text), chunk_size):
+                frame = json.dumps(_response_json(text[i:i + chunk_size]))
+                self.wfile.write(f"data: {frame}\r\n\r\n".encode())
+                self.wfile.flush()
+                time.sleep(chunk_delay)
+            self.close_connection = True
+
+    return GeminiStubHandler
+
+
+def start_stub(port=0, **options):
+    """Start a stub server on a daemon thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**options))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1beta"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini API stub")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte")
+    parser.add_argument("--chunk-size", type=int, default=24, help="characters per streamed chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--status", type=int, default=200, help="force an HTTP error status")
+    parser.add_argument("--review-file", help="file with the review text to serve")
+    args = parser.parse_args()
+
+    review_text = CANNED_REVIEW
+    if args.review_file:
+        with open(args.review_file, "r", encoding="utf-8") as f:
+            review_text = f.read()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(
+        review_text=review_text,
+        latency=args.latency,
+        chunk_size=args.chunk_size,
+        chunk_delay=args.chunk_delay,
+        status=args.status,
+    ))
+    print(f"🧪 Gemini stub listening on http://127.0.0.1:{args.port}/v1beta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
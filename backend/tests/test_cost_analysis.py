@@ -0,0 +1,53 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from llm.cost_analysis import OPCODE_COSTS, OPCODE_NAMES, analyze_program, encode_lines
+
+CHART = os.path.join(
+    os.path.dirname(__file__), "..", "..", "frontend", "src", "components", "TACCostComparison.jsx"
+)
+
+# Lines where a substring test and the client's word-boundary regex disagree
+LINES = [
+    "IF_FALSE t1 GOTO L1",
+    "GOTO L2",
+    "L1:",
+    "PUSH_PARAM labels",
+    "PUSH_PARAM goto_end",
+    "t3 = t1 * t2",
+    "t4 = a < b",
+    "RETURN t4",
+]
+
+
+def server_costs(lines):
+    codes = encode_lines(lines)
+    return [(OPCODE_NAMES[code], int(OPCODE_COSTS[code])) for code in codes]
+
+
+def client_costs(lines):
+    """Run the chart's calculateInstructionCost (the fallback when cost_analysis is missing) in node."""
+    source = open(CHART, encoding="utf-8").read()
+    function = re.search(r"const calculateInstructionCost = .*?\n};\n", source, re.S).group(0)
+    script = function + f"console.log(JSON.stringify({json.dumps(lines)}.map(calculateInstructionCost)));"
+    completed = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True)
+    return [(cost["type"], cost["cost"]) for cost in json.loads(completed.stdout)]
+
+
+def test_control_flow_needs_whole_words():
+    assert server_costs(["IF_FALSE t1 GOTO L1", "PUSH_PARAM labels"]) == [("control_flow", 2), ("other", 1)]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_server_and_client_costs_agree():
+    assert server_costs(LINES) == client_costs(LINES)
+
+
+def test_analysis_uses_the_same_costs():
+    analysis = analyze_program(optimized="IF_FALSE t1 GOTO L1\nPUSH_PARAM labels")
+    assert analysis["versions"]["optimized"]["costs"] == [2, 1]
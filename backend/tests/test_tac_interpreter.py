@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from llm.tac_interpreter import check_equivalence, parse_program, run_program, OK
+
+# f(a, b) = a * 2 + b, as compiler.c writes it to IR.txt
+TWO_ARGS_IR = """FUNCTION f:
+  PARAM a
+  PARAM b
+  t0 = a * 2
+  t1 = t0 + b
+  RETURN t1
+END FUNCTION f
+"""
+
+# main() = f(1, g(2)) with g(x) = x * 10 and f(a, b) = a - b: the inner call
+# is pushed and made between the outer call's arguments
+NESTED_CALL_IR = """FUNCTION g:
+  PARAM x
+  t0 = x * 10
+  RETURN t0
+END FUNCTION g
+
+FUNCTION f:
+  PARAM a
+  PARAM b
+  t1 = a - b
+  RETURN t1
+END FUNCTION f
+
+FUNCTION main:
+  t2 = 1
+  PUSH_PARAM t2
+  t3 = 2
+  PUSH_PARAM t3
+  t4 = CALL g, 1
+  PUSH_PARAM t4
+  t5 = CALL f, 2
+  RETURN t5
+END FUNCTION main
+"""
+
+
+def verdict(reference, listing):
+    return check_equivalence(reference, {"candidate": listing}, trials=64)["candidate"]
+
+
+def test_push_param_lines_declare_parameters():
+    # Output.txt declares parameters as PUSH_PARAM lines at the top of the body
+    listing = "FUNCTION f:\n  PUSH_PARAM a\n  PUSH_PARAM b\n  t0 = a * 2\n  t1 = t0 + b\n  RETURN t1\nEND FUNCTION f\n"
+    assert parse_program(listing)["f"].params == ["a", "b"]
+    assert verdict(TWO_ARGS_IR, listing)["verdict"] == "equivalent"
+
+
+def test_wrong_listing_is_a_mismatch():
+    listing = "FUNCTION f:\n  PUSH_PARAM a\n  PUSH_PARAM b\n  t0 = a * 2\n  RETURN t0\nEND FUNCTION f\n"
+    result = verdict(TWO_ARGS_IR, listing)
+    assert result["verdict"] == "mismatch"
+    counterexample = result["counterexample"]
+    inputs = counterexample["inputs"]
+    assert counterexample["expected"] == inputs["a"] * 2 + inputs["b"]
+
+
+@pytest.mark.parametrize("call", ["t0 = CALL , 1", "t0 = CALL g, 1"])
+def test_unresolvable_call_is_unsupported(call):
+    listing = f"FUNCTION f:\n  PUSH_PARAM a\n  PUSH_PARAM b\n  PUSH_PARAM a\n  {call}\n  RETURN t0\nEND FUNCTION f\n"
+    assert verdict(TWO_ARGS_IR, listing)["verdict"] == "unsupported"
+
+
+def test_nested_call_pops_its_own_arguments():
+    values, status, _ = run_program(parse_program(NESTED_CALL_IR), "main", [])
+    assert status[0] == OK
+    assert values[0] == 1 - 2 * 10
+
+
+def test_nested_call_listing_is_checked():
+    folded = "FUNCTION main:\n  RETURN -19\nEND FUNCTION main\n"
+    assert verdict(NESTED_CALL_IR, folded)["verdict"] == "equivalent"
+    swapped = "FUNCTION main:\n  RETURN 19\nEND FUNCTION main\n"
+    assert verdict(NESTED_CALL_IR, swapped)["verdict"] == "mismatch"
+
+
+def test_call_without_count_takes_the_callee_parameters():
+    listing = NESTED_CALL_IR.replace("CALL g, 1", "CALL g").replace("CALL f, 2", "CALL f")
+    values, status, _ = run_program(parse_program(listing), "main", [])
+    assert (status[0], values[0]) == (OK, -19)
+
+
+def test_lanes_run_independently():
+    program = parse_program(TWO_ARGS_IR)
+    a, b = np.array([0, 3, -7]), np.array([5, 4, 2])
+    values, status, _ = run_program(program, "f", [a, b])
+    assert list(status) == [OK] * 3
+    assert list(values) == list(a * 2 + b)
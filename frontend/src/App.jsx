@@ -3,12 +3,45 @@ import Navbar from "./components/NavBar";
 import CodeInput from "./components/CodeInput";
 import OutputPanel from "./components/OutputPanel";
 
+const API_BASE = "https://neurofold-j01j.onrender.com";
+//const API_BASE = "http://127.0.0.1:5010";
+
+// Parse a fetch() response body as server-sent events.
+// `onEvent(event, data)` is called for every complete frame.
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      frame.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+};
+
 function App() {
   const [optimizedCode, setOptimizedCode] = useState("");
   const [optimizationLog, setOptimizationLog] = useState([]);
   const [status, setStatus] = useState("");
   const [unOptimizedCode, setUnOptimizedCode] = useState("");
   const [fullText, setFullText] = useState("");
+  const [costAnalysis, setCostAnalysis] = useState(null);
+  const [equivalence, setEquivalence] = useState(null);
   const [loading, setLoading] = useState(false);
 
   // Utility function to save text file
@@ -24,34 +57,65 @@ function App() {
     URL.revokeObjectURL(url);
   };
 
+  const applyResult = (data) => {
+    setOptimizedCode(data.optimized_code || "");
+    setOptimizationLog(data.suggestions || []);
+    setStatus(data.status || "");
+    setFullText(data.full_text || "");
+    setUnOptimizedCode(data.unoptimized_code || "");
+    setCostAnalysis(data.cost_analysis || null);
+    setEquivalence(data.equivalence || null);
+  };
+
   const handleOptimize = async (code) => {
     setLoading(true);
+    setUnOptimizedCode("");
+    setOptimizedCode("");
+    setOptimizationLog([]);
+    setFullText("");
+    setCostAnalysis(null);
+    setEquivalence(null);
     try {
-/*      const res = await fetch("http://127.0.0.1:5010/run-llm", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ code }),
-      });
-*/
-      const res = await fetch("https://neurofold-j01j.onrender.com/run-llm", {
+      // Stream the review so suggestions show up while Gemini is still writing
+      const res = await fetch(`${API_BASE}/run-llm/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ code }),
       });
 
-
       if (!res.ok) {
         throw new Error(`Server error: ${res.status}`);
       }
 
-      const data = await res.json();
+      let result = null;
+      await readEventStream(res, (event, data) => {
+        switch (event) {
+          case "optimized":
+            setUnOptimizedCode(data.unoptimized_code || "");
+            break;
+          case "token":
+            setFullText((prev) => prev + data.text);
+            break;
+          case "suggestion":
+            setOptimizationLog((prev) => [...prev, data.text]);
+            break;
+          case "optimization":
+            setOptimizedCode(data.code);
+            break;
+          case "reviewed":
+            result = data;
+            break;
+          case "failed":
+            throw new Error(data.message || "Pipeline failed");
+          default:
+            break;
+        }
+      });
 
-      // Update state
-      setOptimizedCode(data.optimized_code || "");
-      setOptimizationLog(data.suggestions || []);
-      setStatus(data.status || "");
-      setFullText(data.full_text || "");
-      setUnOptimizedCode(data.unoptimized_code || "");
+      if (!result) {
+        throw new Error("Stream ended before the review finished");
+      }
+      applyResult(result);
 
     } catch (err) {
       console.error("Error:", err);
@@ -84,6 +148,8 @@ function App() {
           status={status}
           loading={loading}
           unOptimizedCode={unOptimizedCode}
+          costAnalysis={costAnalysis}
+          equivalence={equivalence}
         />
       </div>
 
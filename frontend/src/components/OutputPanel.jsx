@@ -7,10 +7,13 @@ function OutputPanel({
   status,
   loading,
   unOptimizedCode,
+  costAnalysis,
+  equivalence,
 }) {
   const [activeTab, setActiveTab] = useState("before");
 
-  if (loading) {
+  // Once the optimizer's TAC has streamed in, show it while the LLM reviews
+  if (loading && !unOptimizedCode) {
     return (
       <div className="flex flex-col justify-center items-center h-full bg-base-100 rounded-xl shadow-md p-6">
         <span className="loading loading-spinner loading-lg text-primary"></span>
@@ -61,6 +64,13 @@ function OutputPanel({
         </div>
       </div>
 
+      {loading && (
+        <div className="flex items-center gap-2 mt-4 text-primary">
+          <span className="loading loading-spinner loading-sm"></span>
+          <span className="text-sm font-semibold">Reviewing with LLM...</span>
+        </div>
+      )}
+
       {/* Tab Content */}
       <div className="border-t border-base-300 mt-4">
         {activeTab === "before" && (
@@ -120,6 +130,7 @@ function OutputPanel({
               <TACCostComparison
                 unOptimizedCode={unOptimizedCode}
                 optimizedCode={optimizedCode}
+                costAnalysis={costAnalysis}
               />
             ) : (
               <div className="alert alert-warning">
@@ -184,6 +195,59 @@ function OutputPanel({
           <span>{status}</span>
         </div>
       )}
+
+      {status === "Review Pending" && (
+        <div role="alert" className="alert alert-warning mt-4">
+          <svg
+            xmlns="http://www.w3.org/2000/svg"
+            className="h-6 w-6 shrink-0 stroke-current"
+            fill="none"
+            viewBox="0 0 24 24"
+          >
+            <path
+              strokeLinecap="round"
+              strokeLinejoin="round"
+              strokeWidth="2"
+              d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"
+            />
+          </svg>
+          <span>{status}: the LLM is unavailable, showing the optimizer output only</span>
+        </div>
+      )}
+
+      {/* Local equivalence check of each listing against IR.txt */}
+      {equivalence && (
+        <div className="flex flex-wrap items-center gap-2 mt-4 text-sm">
+          <span className="font-semibold">Equivalence with IR:</span>
+          {[
+            ["optimizer", "Optimizer"],
+            ["llm", "LLM version"],
+          ]
+            .filter(([key]) => equivalence[key])
+            .map(([key, label]) => {
+              const check = equivalence[key];
+              const example = check.counterexample;
+              const badge =
+                {
+                  equivalent: "badge-success",
+                  mismatch: "badge-error",
+                }[check.verdict] || "badge-ghost";
+              return (
+                <span
+                  key={key}
+                  className={`badge ${badge}`}
+                  title={
+                    example
+                      ? `${example.function}(${Object.values(example.inputs).join(", ")}): expected ${example.expected}, got ${example.actual}`
+                      : check.reason || `${check.compared} trials compared`
+                  }
+                >
+                  {label}: {check.verdict}
+                </span>
+              );
+            })}
+        </div>
+      )}
     </div>
   );
 }
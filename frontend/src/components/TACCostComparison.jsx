@@ -1,82 +1,84 @@
 // frontend/src/components/TACCostComparison.jsx
-import React, { useState, useEffect } from 'react';
+import React, { useMemo } from 'react';
 import { LineChart, Line, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { TrendingDown, Code, Zap, Activity } from 'lucide-react';
 
-const TACCostComparison = ({ unOptimizedCode, optimizedCode }) => {
-  const [stats, setStats] = useState(null);
-  const [waveformData, setWaveformData] = useState([]);
-  const [totalCostData, setTotalCostData] = useState([]);
-  const [instructionCountData, setInstructionCountData] = useState([]);
-  const [avgCostData, setAvgCostData] = useState([]);
+const calculateInstructionCost = (line) => {
+  const lineLower = line.toLowerCase().trim();
+  
+  // High cost operations
+  if (lineLower.includes('*') || lineLower.includes('mult')) {
+    return { cost: 10, type: 'multiplication' };
+  } else if (lineLower.includes('/') || lineLower.includes('div')) {
+    return { cost: 10, type: 'division' };
+  } else if (lineLower.includes('%') || lineLower.includes('mod')) {
+    return { cost: 9, type: 'modulo' };
+  }
+  
+  // Medium cost operations
+  else if (lineLower.includes('+') && !lineLower.includes('++')) {
+    return { cost: 5, type: 'addition' };
+  } else if (lineLower.includes('-') && !lineLower.includes('--') && !lineLower.includes('->')) {
+    return { cost: 5, type: 'subtraction' };
+  }
+  
+  // Low cost operations
+  else if (lineLower.includes('=') && !lineLower.includes('==') && !lineLower.includes('!=')) {
+    return { cost: 3, type: 'assignment' };
+  } else if (lineLower.includes('return')) {
+    return { cost: 2, type: 'return' };
+  } else if (lineLower.match(/==|!=|<|>|<=|>=/)) {
+    return { cost: 4, type: 'comparison' };
+  } else if (lineLower.match(/\bif\b|\bgoto\b|\blabel\b/)) {
+    return { cost: 2, type: 'control_flow' };
+  }
+  
+  // Default cost
+  else {
+    return { cost: 1, type: 'other' };
+  }
+};
 
-  const calculateInstructionCost = (line) => {
-    const lineLower = line.toLowerCase().trim();
-    
-    // High cost operations
-    if (lineLower.includes('*') || lineLower.includes('mult')) {
-      return { cost: 10, type: 'multiplication' };
-    } else if (lineLower.includes('/') || lineLower.includes('div')) {
-      return { cost: 10, type: 'division' };
-    } else if (lineLower.includes('%') || lineLower.includes('mod')) {
-      return { cost: 9, type: 'modulo' };
-    }
-    
-    // Medium cost operations
-    else if (lineLower.includes('+') && !lineLower.includes('++')) {
-      return { cost: 5, type: 'addition' };
-    } else if (lineLower.includes('-') && !lineLower.includes('--') && !lineLower.includes('->')) {
-      return { cost: 5, type: 'subtraction' };
-    }
-    
-    // Low cost operations
-    else if (lineLower.includes('=') && !lineLower.includes('==') && !lineLower.includes('!=')) {
-      return { cost: 3, type: 'assignment' };
-    } else if (lineLower.includes('return')) {
-      return { cost: 2, type: 'return' };
-    } else if (lineLower.match(/==|!=|<|>|<=|>=/)) {
-      return { cost: 4, type: 'comparison' };
-    } else if (lineLower.match(/\bif\b|\bgoto\b|\blabel\b/)) {
-      return { cost: 2, type: 'control_flow' };
-    }
-    
-    // Default cost
-    else {
-      return { cost: 1, type: 'other' };
-    }
-  };
+// Fallback while the server-side analysis (result.cost_analysis) is not in yet
+const analyzeTACCode = (code) => {
+  if (!code || typeof code !== 'string') return { costs: [] };
 
-  const analyzeTACCode = (code) => {
-    if (!code || typeof code !== 'string') return { costs: [], lines: [] };
-    
-    const lines = code.split('\n').filter(line => line.trim());
-    const costs = lines.map(line => calculateInstructionCost(line).cost);
-    
-    return { costs, lines };
-  };
+  const costs = code.split('\n')
+    .filter(line => line.trim())
+    .map(line => calculateInstructionCost(line).cost);
 
-  useEffect(() => {
-    const irAnalysis = analyzeTACCode(unOptimizedCode);
-    const optimizedAnalysis = analyzeTACCode(optimizedCode);
+  return { costs };
+};
 
-    // Calculate statistics
-    const irTotal = irAnalysis.costs.reduce((a, b) => a + b, 0);
-    const optimizedTotal = optimizedAnalysis.costs.reduce((a, b) => a + b, 0);
+const buildCharts = (irCosts, optimizedCosts) => {
+  const irTotal = irCosts.reduce((a, b) => a + b, 0);
+  const optimizedTotal = optimizedCosts.reduce((a, b) => a + b, 0);
 
-    const irAvg = irTotal / irAnalysis.costs.length || 0;
-    const optimizedAvg = optimizedTotal / optimizedAnalysis.costs.length || 0;
+  const irAvg = irTotal / irCosts.length || 0;
+  const optimizedAvg = optimizedTotal / optimizedCosts.length || 0;
 
-    const costReduction = ((irTotal - optimizedTotal) / irTotal * 100) || 0;
-    const instructionReduction = ((irAnalysis.costs.length - optimizedAnalysis.costs.length) / irAnalysis.costs.length * 100) || 0;
+  const costReduction = ((irTotal - optimizedTotal) / irTotal * 100) || 0;
+  const instructionReduction = ((irCosts.length - optimizedCosts.length) / irCosts.length * 100) || 0;
 
-    setStats({
+  const maxLength = Math.max(irCosts.length, optimizedCosts.length);
+  const waveformData = new Array(maxLength);
+  for (let i = 0; i < maxLength; i++) {
+    waveformData[i] = {
+      index: i,
+      original: irCosts[i] || null,
+      optimized: optimizedCosts[i] || null
+    };
+  }
+
+  return {
+    stats: {
       ir: {
-        instructions: irAnalysis.costs.length,
+        instructions: irCosts.length,
         totalCost: irTotal,
         avgCost: irAvg
       },
       optimized: {
-        instructions: optimizedAnalysis.costs.length,
+        instructions: optimizedCosts.length,
         totalCost: optimizedTotal,
         avgCost: optimizedAvg
       },
@@ -84,40 +86,32 @@ const TACCostComparison = ({ unOptimizedCode, optimizedCode }) => {
         costReduction,
         instructionReduction
       }
-    });
-
-    // Prepare waveform data
-    const maxLength = Math.max(irAnalysis.costs.length, optimizedAnalysis.costs.length);
-
-    const waveform = [];
-    for (let i = 0; i < maxLength; i++) {
-      waveform.push({
-        index: i,
-        original: irAnalysis.costs[i] || null,
-        optimized: optimizedAnalysis.costs[i] || null
-      });
-    }
-    setWaveformData(waveform);
-
-    // Prepare total cost data
-    setTotalCostData([
+    },
+    waveformData,
+    totalCostData: [
       { name: 'Before LLM', cost: irTotal, fill: '#ef4444' },
       { name: 'After LLM', cost: optimizedTotal, fill: '#10b981' }
-    ]);
-
-    // Prepare instruction count data
-    setInstructionCountData([
-      { name: 'Before LLM', count: irAnalysis.costs.length, fill: '#ef4444' },
-      { name: 'After LLM', count: optimizedAnalysis.costs.length, fill: '#10b981' }
-    ]);
-
-    // Prepare average cost data
-    setAvgCostData([
+    ],
+    instructionCountData: [
+      { name: 'Before LLM', count: irCosts.length, fill: '#ef4444' },
+      { name: 'After LLM', count: optimizedCosts.length, fill: '#10b981' }
+    ],
+    avgCostData: [
       { name: 'Before LLM', avg: parseFloat(irAvg.toFixed(2)), fill: '#ef4444' },
       { name: 'After LLM', avg: parseFloat(optimizedAvg.toFixed(2)), fill: '#10b981' }
-    ]);
+    ]
+  };
+};
 
-  }, [unOptimizedCode, optimizedCode]);
+const TACCostComparison = ({ unOptimizedCode, optimizedCode, costAnalysis }) => {
+  // Only recomputed when the listings or the server analysis change
+  const { stats, waveformData, totalCostData, instructionCountData, avgCostData } = useMemo(() => {
+    const versions = costAnalysis?.versions;
+    if (versions?.optimized && versions?.llm) {
+      return buildCharts(versions.optimized.costs, versions.llm.costs);
+    }
+    return buildCharts(analyzeTACCode(unOptimizedCode).costs, analyzeTACCode(optimizedCode).costs);
+  }, [unOptimizedCode, optimizedCode, costAnalysis]);
 
   if (!stats) {
     return (
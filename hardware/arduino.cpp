@@ -19,15 +19,14 @@ byte colPins[COLS] = {5, 4, 3, 2};
 Keypad keypad = Keypad(makeKeymap(keys), rowPins, colPins, ROWS, COLS);
 
 // --- Globals ---
+// main.py sends one pre-rendered page per line: LCD_ROWS rows of LCD_COLS characters
+const int LCD_COLS = 16;
+const int LCD_ROWS = 2;
+
 String incomingText = "";
 bool newMessage = false;
-bool isScrolling = false;
-bool interruptScroll = false;
-
-const int SCROLL_DELAY = 600;
-const int PAUSE_TIME = 1000;
 
-void scrollText(String msg, int speedMs);
+void showPage(String page);
 
 void setup() {
   Serial.begin(9600);
@@ -39,17 +38,9 @@ void setup() {
 
 void loop() {
   char key = keypad.getKey();
-  if (key) {
-    if (key == '1' || key == '2' || key == '3') {
-      if (isScrolling) {
-        interruptScroll = true; // signal scroll to stop
-      }
-
-      lcd.clear();
-      lcd.print("Requesting...");
-      Serial.println(key);
-      delay(300);
-    }
+  // 1-3 pick a view, * / # page back and forward, A reloads the latest review
+  if (key == '1' || key == '2' || key == '3' || key == '*' || key == '#' || key == 'A') {
+    Serial.println(key);
   }
 
   while (Serial.available() > 0) {
@@ -62,59 +53,20 @@ void loop() {
   }
 
   if (newMessage) {
-    lcd.clear();
-    lcd.setCursor(0, 0);
-    lcd.print("Received!");
-    delay(500);
-
-    scrollText(incomingText, SCROLL_DELAY);
-
+    showPage(incomingText);
     incomingText = "";
     newMessage = false;
-    lcd.clear();
-    lcd.print("Ready...");
   }
 }
 
-void scrollText(String msg, int speedMs) {
-  msg.trim();
-  msg += " ";
-  int len = msg.length();
-
-  isScrolling = true;
-  interruptScroll = false;
-
-  if (len <= 16) {
-    lcd.clear();
-    lcd.setCursor(0, 0);
-    lcd.print(msg);
-    delay(PAUSE_TIME);
-    isScrolling = false;
-    return;
-  }
-
-  delay(PAUSE_TIME);
-
-  for (int i = 0; i <= len - 16; i++) {
-    // 🔹 Check if a new key is pressed mid-scroll
-    char k = keypad.getKey();
-    if (k == '1' || k == '2' || k == '3') {
-      interruptScroll = true;
-      Serial.println(k); // tell Python to send new text
-    }
-
-    // 🔹 Break out if interrupted
-    if (interruptScroll) {
-      isScrolling = false;
-      return;
+void showPage(String page) {
+  lcd.clear();
+  for (int row = 0; row < LCD_ROWS; row++) {
+    int start = row * LCD_COLS;
+    if (start >= (int)page.length()) {
+      break;
     }
-
-    lcd.clear();
-    lcd.setCursor(0, 0);
-    lcd.print(msg.substring(i, i + 16));
-    delay(speedMs);
+    lcd.setCursor(0, row);
+    lcd.print(page.substring(start, min((int)page.length(), start + LCD_COLS)));
   }
-
-  delay(PAUSE_TIME);
-  isScrolling = false;
 }
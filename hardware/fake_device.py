@@ -0,0 +1,85 @@
+"""
+Stand-in for the Arduino keypad and 16x2 LCD on a pseudo-terminal (POSIX),
+so main.py can be run without the board:
+
+    python hardware/fake_device.py                # prints the port to use
+    python hardware/main.py --port /dev/pts/N
+
+Type keys (1, 2, 3, *, #, A) and press Enter to "press" them; every page the
+bridge sends back is drawn as the LCD would show it. `--keys 1##3` presses a
+fixed sequence instead and exits, for scripted checks.
+"""
+import argparse
+import os
+import pty
+import select
+import sys
+import time
+import tty
+
+LCD_COLS = 16
+LCD_ROWS = 2
+
+
+def draw_lcd(page):
+    border = "+" + "-" * LCD_COLS + "+"
+    rows = [page[i * LCD_COLS:(i + 1) * LCD_COLS].ljust(LCD_COLS) for i in range(LCD_ROWS)]
+    print("\n".join([border] + [f"|{row}|" for row in rows] + [border]), flush=True)
+
+
+def press(master, key):
+    os.write(master, f"{key}\r\n".encode())
+
+
+def read_pages(master, buffer, timeout):
+    """Wait up to `timeout` seconds for data; returns (complete pages, leftover bytes)."""
+    ready, _, _ = select.select([master], [], [], timeout)
+    if ready:
+        buffer += os.read(master, 1024)
+    *pages, buffer = buffer.split(b"\n")
+    return [page.decode(errors="ignore") for page in pages], buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", help="press these keys one by one, print the pages and exit")
+    parser.add_argument("--key-delay", type=float, default=0.5, help="seconds to wait for each reply with --keys")
+    args = parser.parse_args()
+
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    print(f"🔌 Fake device ready on {os.ttyname(slave)}", flush=True)
+
+    buffer = b""
+    if args.keys:
+        # Give main.py time to connect (it waits 2s for the board reset)
+        input("Press Enter once main.py is connected...") if sys.stdin.isatty() else time.sleep(3)
+        for key in args.keys:
+            press(master, key)
+            deadline = time.monotonic() + args.key_delay
+            while time.monotonic() < deadline:
+                pages, buffer = read_pages(master, buffer, deadline - time.monotonic())
+                for page in pages:
+                    print(f"⌨️ {key}")
+                    draw_lcd(page)
+        return
+
+    while True:
+        ready, _, _ = select.select([master, sys.stdin], [], [])
+        if sys.stdin in ready:
+            line = sys.stdin.readline()
+            if not line:
+                break
+            for key in line.strip():
+                press(master, key)
+        if master in ready:
+            pages, buffer = read_pages(master, buffer, 0)
+            for page in pages:
+                draw_lcd(page)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting fake device.")
@@ -1,47 +1,175 @@
-import serial
-import time
+import argparse
+import json
 import os
+import textwrap
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import serial
 
 # === User Configuration ===
-COM_PORT = 'COM3'      # Change if your Arduino uses a different COM port
+COM_PORT = os.getenv("NEUROFOLD_SERIAL_PORT", "COM3")  # Change if your Arduino uses a different COM port
 BAUD_RATE = 9600
+BACKEND_URL = os.getenv("NEUROFOLD_BACKEND_URL", "http://127.0.0.1:10000")
+REFRESH_SECONDS = float(os.getenv("NEUROFOLD_REFRESH_SECONDS", "10"))
+# Last review fetched, so the display still works when the backend is down
+CACHE_FILE = os.getenv(
+    "NEUROFOLD_BRIDGE_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "latest_review.json"),
+)
+
+LCD_COLS = 16
+LCD_ROWS = 2
 
-FILES = {
-    "1": r"C:\Users\srini\Downloads\CD PROJECT\code_before_optimization.txt",
-    "2": r"C:\Users\srini\Downloads\CD PROJECT\code_after_optimization.txt",
-    "3": r"C:\Users\srini\Downloads\CD PROJECT\optimization_suggestions.txt"
+# Keypad keys (forwarded by arduino.cpp)
+VIEW_KEYS = {
+    "1": "before",       # optimizer output
+    "2": "after",        # LLM's optimized version
+    "3": "suggestions",
 }
+PREV_KEY = "*"
+NEXT_KEY = "#"
+REFRESH_KEY = "A"
+
+
+# === Function: Fetch the latest review ===
+def fetch_latest_review():
+    """Returns (report_id, result) for the newest review on the backend, or None."""
+    url = f"{BACKEND_URL}/reports?limit=1&full=1"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            reports = json.load(response).get("reports", [])
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        print(f"⚠️ Backend unavailable ({e})")
+        return None
+    if not reports:
+        return None
+    return reports[0]["id"], reports[0].get("result", {})
+
+
+def load_cached_review():
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        return cached["id"], cached["result"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_cached_review(report_id, result):
+    tmp_path = f"{CACHE_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"id": report_id, "result": result}, f)
+        os.replace(tmp_path, CACHE_FILE)
+    except OSError as e:
+        print(f"⚠️ Could not cache review: {e}")
+
+
+# === Function: Pre-render LCD pages ===
+def render_pages(text):
+    """Wrap `text` into LCD_COLS-wide rows and group them into full-screen pages."""
+    # The LCD only has ASCII glyphs; emoji and arrows are dropped
+    text = text.encode("ascii", "ignore").decode()
+    rows = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line:
+            rows.extend(textwrap.wrap(line, LCD_COLS, break_long_words=True))
+    if not rows:
+        rows = ["Nothing to show"]
+
+    pages = []
+    for start in range(0, len(rows), LCD_ROWS):
+        screen = rows[start:start + LCD_ROWS]
+        screen += [""] * (LCD_ROWS - len(screen))
+        pages.append("".join(row.ljust(LCD_COLS) for row in screen))
+    return pages
 
-# === Function: Send file contents to Arduino ===
-def send_to_arduino(ser, file_path):
-    """Reads a file and sends its text to Arduino."""
-    if not os.path.exists(file_path):
-        print(f"❌ File not found: {file_path}")
-        return
 
-    print(f"📤 Sending {os.path.basename(file_path)} ...")
+def render_views(result):
+    suggestions = [result.get("summary") or result.get("status") or "No review yet"]
+    suggestions += [f"- {s}" for s in result.get("suggestions", [])]
+    return {
+        "before": render_pages(result.get("unoptimized_code") or "No review yet"),
+        "after": render_pages(result.get("optimized_code") or "No LLM version"),
+        "suggestions": render_pages("\n".join(suggestions)),
+    }
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        text = file.read().replace('\n', ' ')
 
-    # Limit message size (LCD cannot scroll very long text effectively)
-    text = text[:500]  # Adjust length if needed
+class ReviewPages:
+    """Rendered pages of the latest review plus the page on screen; keypresses never wait on I/O."""
 
-    ser.write(text.encode())
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.report_id = None
+        self._views = render_views({})
+        self._view = "before"
+        self._page = 0
+
+    def update(self, report_id, result):
+        views = render_views(result)
+        with self._lock:
+            self.report_id = report_id
+            self._views = views
+            self._page = min(self._page, len(views[self._view]) - 1)
+
+    def handle_key(self, key):
+        """Returns the page to show for `key`, or None if the key means nothing here."""
+        with self._lock:
+            if key in VIEW_KEYS:
+                self._view = VIEW_KEYS[key]
+                self._page = 0
+            elif key == NEXT_KEY:
+                self._page = min(self._page + 1, len(self._views[self._view]) - 1)
+            elif key == PREV_KEY:
+                self._page = max(self._page - 1, 0)
+            elif key != REFRESH_KEY:
+                return None
+            pages = self._views[self._view]
+            print(f"📟 {self._view} page {self._page + 1}/{len(pages)}")
+            return pages[self._page]
+
+
+class Refresher(threading.Thread):
+    """Polls the backend every REFRESH_SECONDS (or when woken) and re-renders on a new review."""
+
+    def __init__(self, pages):
+        super().__init__(daemon=True)
+        self.pages = pages
+        self._wake = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def run(self):
+        while True:
+            latest = fetch_latest_review()
+            if latest is not None and latest[0] != self.pages.report_id:
+                self.pages.update(*latest)
+                save_cached_review(*latest)
+                print(f"🔄 Loaded review #{latest[0]}")
+            self._wake.wait(REFRESH_SECONDS)
+            self._wake.clear()
+
+
+# === Function: Send one page to Arduino ===
+def send_page(ser, page):
+    ser.write(page.encode("ascii", "ignore"))
     ser.write(b'\n')
     ser.flush()
 
-    print("✅ Sent successfully!\n")
-    ser.reset_input_buffer()  # Clear input buffer for next keypad input
-
 
 # === Function: Establish connection ===
-def connect_serial():
+def connect_serial(port):
     """Try to connect to the Arduino serial port."""
     while True:
         try:
-            print(f"🔌 Connecting to Arduino on {COM_PORT} ...")
-            ser = serial.Serial(COM_PORT, BAUD_RATE, timeout=1)
+            print(f"🔌 Connecting to Arduino on {port} ...")
+            # No timeout: readline() blocks in the OS until a key arrives
+            ser = serial.Serial(port, BAUD_RATE, timeout=None)
             time.sleep(2)  # Allow time for Arduino to reset
             print("✅ Connected! Waiting for keypad input...\n")
             return ser
@@ -50,24 +178,43 @@ def connect_serial():
             time.sleep(3)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Show the latest NeuroFold review on the Arduino LCD.")
+    parser.add_argument("--port", default=COM_PORT, help="serial port, e.g. COM3 or a pty from fake_device.py")
+    return parser.parse_args()
+
+
 # === Main Loop ===
 if __name__ == "__main__":
-    ser = connect_serial()
+    args = parse_args()
+
+    pages = ReviewPages()
+    cached = load_cached_review()
+    if cached is not None:
+        pages.update(*cached)
+    refresher = Refresher(pages)
+    refresher.start()
+
+    ser = connect_serial(args.port)
 
     while True:
         try:
-            if ser.in_waiting > 0:
-                key = ser.readline().decode(errors='ignore').strip()
-                if key in FILES:
-                    send_to_arduino(ser, FILES[key])
-                elif key != "":
-                    print(f"⚠️ Unknown key received: {key}")
+            key = ser.readline().decode(errors='ignore').strip()
+            if key == "":
+                continue
+            if key == REFRESH_KEY:
+                refresher.wake()
+            page = pages.handle_key(key)
+            if page is None:
+                print(f"⚠️ Unknown key received: {key}")
+                continue
+            send_page(ser, page)
 
         except serial.SerialException:
             print("⚠️ Serial connection lost. Reconnecting...")
             time.sleep(2)
             ser.close()
-            ser = connect_serial()
+            ser = connect_serial(args.port)
 
         except KeyboardInterrupt:
             print("\n🛑 Exiting program.")